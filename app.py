@@ -1,12 +1,25 @@
 import streamlit as st
-import numpy as np
-import tensorflow as tf
-from sklearn.preprocessing import StandardScaler, LabelEncoder, OneHotEncoder
-import pandas as pd
-import pickle
+import os
+import time
+import uuid
 from datetime import datetime
-import plotly.graph_objects as go
-import plotly.express as px
+import artifacts
+import attribution
+import charts
+import drift
+import percentile
+import perf
+import history
+import shadow
+import whatif
+from prediction_cache import cache as prediction_cache
+
+# pandas, plotly.express and the batch scorer are imported where they are used,
+# and the model/encoders load in a background thread, so the page starts
+# rendering before any of them are ready.
+
+# Wall time of this rerun, reported as the 'rerun' stage
+rerun_started = time.perf_counter()
 
 # Configure page layout
 st.set_page_config(
@@ -16,9 +29,10 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Initialize session state for prediction history
-if 'prediction_history' not in st.session_state:
-    st.session_state.prediction_history = []
+# Start loading the model and encoders while the page renders, and pick up new
+# artifacts on disk without a restart (loaded and validated in the background)
+artifacts.start_loading()
+artifacts.watch()
 
 # Custom CSS for advanced professional styling
 st.markdown("""
@@ -431,143 +445,59 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
-# Load the trained model
+# Saved predictions live in a SQLite file shared by all sessions
 @st.cache_resource
-def load_model():
-    return tf.keras.models.load_model('model.h5')
+def load_history_store():
+    return history.HistoryStore()
 
-# Load the encoders and scaler
-@st.cache_resource
-def load_encoders():
-    with open('label_encoder_gender.pkl', 'rb') as file:
-        label_encoder_gender = pickle.load(file)
-    with open('onehot_encoder_geo.pkl', 'rb') as file:
-        onehot_encoder_geo = pickle.load(file)
-    with open('scaler.pkl', 'rb') as file:
-        scaler = pickle.load(file)
-    return label_encoder_gender, onehot_encoder_geo, scaler
-
-model = load_model()
-label_encoder_gender, onehot_encoder_geo, scaler = load_encoders()
-
-# Create gauge chart
-def create_gauge_chart(value, title="Churn Probability"):
-    if value > 70:
-        color = "#ff6b6b"
-    elif value > 40:
-        color = "#ffc107"
-    else:
-        color = "#51cf66"
-    
-    fig = go.Figure(go.Indicator(
-        mode="gauge+number",
-        value=value,
-        domain={'x': [0, 1], 'y': [0, 1]},
-        number={'suffix': "%", 'font': {'size': 40, 'color': 'white'}},
-        gauge={
-            'axis': {'range': [0, 100], 'tickwidth': 1, 'tickcolor': "rgba(255,255,255,0.3)"},
-            'bar': {'color': color, 'thickness': 0.3},
-            'bgcolor': "rgba(255,255,255,0.1)",
-            'borderwidth': 0,
-            'steps': [
-                {'range': [0, 40], 'color': 'rgba(81, 207, 102, 0.2)'},
-                {'range': [40, 70], 'color': 'rgba(255, 193, 7, 0.2)'},
-                {'range': [70, 100], 'color': 'rgba(255, 107, 107, 0.2)'}
-            ],
-            'threshold': {
-                'line': {'color': color, 'width': 4},
-                'thickness': 0.75,
-                'value': value
-            }
-        }
-    ))
-    
-    fig.update_layout(
-        paper_bgcolor='rgba(0,0,0,0)',
-        plot_bgcolor='rgba(0,0,0,0)',
-        font={'color': 'white'},
-        height=280,
-        margin=dict(l=20, r=20, t=40, b=20)
-    )
-    return fig
-
-# Create radar chart for customer profile
-def create_radar_chart(credit_score, age, tenure, balance, num_products, estimated_salary):
-    categories = ['Credit Score', 'Age', 'Tenure', 'Balance', 'Products', 'Salary']
-    
-    # Normalize values to 0-100 scale
-    values = [
-        (credit_score - 300) / 550 * 100,  # Credit score: 300-850
-        age / 92 * 100,  # Age: 0-92
-        tenure / 10 * 100,  # Tenure: 0-10
-        min(balance / 250000 * 100, 100),  # Balance: 0-250000
-        num_products / 4 * 100,  # Products: 1-4
-        min(estimated_salary / 200000 * 100, 100)  # Salary: 0-200000
-    ]
-    
-    fig = go.Figure()
-    
-    fig.add_trace(go.Scatterpolar(
-        r=values + [values[0]],
-        theta=categories + [categories[0]],
-        fill='toself',
-        fillcolor='rgba(102, 126, 234, 0.3)',
-        line=dict(color='#667eea', width=2),
-        name='Customer Profile'
-    ))
-    
-    fig.update_layout(
-        polar=dict(
-            radialaxis=dict(
-                visible=True,
-                range=[0, 100],
-                gridcolor='rgba(255,255,255,0.1)',
-                tickfont=dict(color='rgba(255,255,255,0.5)')
-            ),
-            angularaxis=dict(
-                gridcolor='rgba(255,255,255,0.1)',
-                tickfont=dict(color='rgba(255,255,255,0.8)')
-            ),
-            bgcolor='rgba(0,0,0,0)'
-        ),
-        showlegend=False,
-        paper_bgcolor='rgba(0,0,0,0)',
-        plot_bgcolor='rgba(0,0,0,0)',
-        height=300,
-        margin=dict(l=60, r=60, t=40, b=40)
-    )
-    return fig
-
-# Create factor impact chart
-def create_factor_chart(factors):
-    colors = ['#51cf66' if v > 0 else '#ff6b6b' for v in factors.values()]
-    
-    fig = go.Figure(go.Bar(
-        x=list(factors.values()),
-        y=list(factors.keys()),
-        orientation='h',
-        marker=dict(
-            color=colors,
-            line=dict(width=0)
-        )
-    ))
-    
-    fig.update_layout(
-        paper_bgcolor='rgba(0,0,0,0)',
-        plot_bgcolor='rgba(0,0,0,0)',
-        font=dict(color='white'),
-        height=300,
-        margin=dict(l=10, r=10, t=20, b=20),
-        xaxis=dict(
-            gridcolor='rgba(255,255,255,0.1)',
-            zerolinecolor='rgba(255,255,255,0.3)',
-            title='Impact on Churn (negative = lower risk)'
-        ),
-        yaxis=dict(
-            gridcolor='rgba(255,255,255,0.1)'
-        )
-    )
-    return fig
+history_store = load_history_store()
+# Tags the predictions this browser session saves, the only ones its Clear History removes
+history_session = st.session_state.setdefault('history_session', uuid.uuid4().hex)
+
+# Loaders of things derived from the artifacts are keyed by version and get the
+# artifacts.Runtime itself unhashed. Two entries each: a hot reload builds the
+# next version's (artifacts.warmups below) while sessions still use the served one.
+
+# Sorted reference scores for percentile ranks, rebuilt (incrementally) when the bundle or dataset changes
+@st.cache_resource(max_entries=2)
+def load_percentile_index(version, _runtime):
+    return percentile.load_index(_runtime.bundle(), model=_runtime.model())
+
+# Attribution explainer for one version of the artifacts
+@st.cache_resource(max_entries=2)
+def load_explainer(version, _runtime):
+    return attribution.ShapleyExplainer.from_csv(_runtime.model(), _runtime.feature_transform())
+
+# Running feature statistics of every customer scored in this process (form inputs
+# and uploads), one monitor per artifact version since the scaling defines them
+@st.cache_resource(max_entries=1)
+def load_drift_monitor(version):
+    return drift.DriftMonitor()
+
+# The same statistics of the training data, read when the first drift report is shown
+@st.cache_resource(max_entries=2)
+def load_drift_reference(version, _runtime):
+    return drift.load_reference(_runtime.feature_transform())
+
+# Reference customers scored and indexed for top-K retrieval (the Top Risk tab)
+@st.cache_resource(max_entries=2)
+def load_topk_index(version, _runtime):
+    import topk
+
+    return topk.build_index(_runtime.model(), _runtime.feature_transform())
+
+artifacts.warmups.update(
+    percentile_index=lambda runtime: load_percentile_index(runtime.version, runtime),
+    topk_index=lambda runtime: load_topk_index(runtime.version, runtime),
+    explainer=lambda runtime: load_explainer(runtime.version, runtime),
+    drift_reference=lambda runtime: load_drift_reference(runtime.version, runtime),
+)
+
+# Trend chart resolutions: individual predictions or rolling aggregates (bucket size in seconds)
+TREND_BUCKETS = {'Points': None, 'Minute': 60, 'Hour': 3600, 'Day': 86400}
+
+# Chart figures are built once per session and patched with each rerun's values
+figures = st.session_state.setdefault('figures', charts.FigureTemplates())
 
 # Header
 st.markdown("""
@@ -576,6 +506,74 @@ st.markdown("""
         <p>AI-Powered Churn Risk Assessment & Analytics Platform</p>
     </div>
 """, unsafe_allow_html=True)
+perf.mark('first_render')
+
+# Each panel below is a fragment: a widget inside it reruns only that panel, not
+# the CSS, sidebar and other tabs. Values other panels need go through
+# st.session_state, the whole page reruns when the user switches tabs.
+
+# Delete the scores file of a batch result that is no longer offered for download
+def discard_batch_result(batch_result):
+    if batch_result is not None:
+        try:
+            os.remove(batch_result['path'])
+        except OSError:
+            pass
+
+# Batch prediction option
+@st.fragment
+@perf.stage('batch_panel')
+def batch_panel():
+    st.markdown("### 📁 Batch Prediction")
+    uploaded_file = st.file_uploader("Upload CSV file", type=['csv'])
+    if uploaded_file is None:
+        discard_batch_result(st.session_state.pop('batch_result', None))
+    else:
+        upload_id = (uploaded_file.name, uploaded_file.size)
+        batch_result = st.session_state.get('batch_result')
+        if batch_result is not None and batch_result['upload_id'] != upload_id:
+            discard_batch_result(st.session_state.pop('batch_result'))
+            batch_result = None
+
+        if st.button("🚀 Score File", use_container_width=True):
+            progress_bar = st.progress(0.0, text="Scoring customers...")
+
+            def update_progress(fraction, rows):
+                progress_bar.progress(fraction, text=f"Scored {rows:,} customers...")
+
+            import batch
+
+            runtime = artifacts.current()
+            try:
+                uploaded_file.seek(0)
+                output_path, rows, unscored = batch.score_upload(
+                    uploaded_file, runtime.model(), runtime.feature_transform(),
+                    progress_callback=update_progress, monitor=load_drift_monitor(runtime.version),
+                    shadow=shadow.scorer()
+                )
+            except ValueError as error:
+                progress_bar.empty()
+                st.error(f"Could not score file: {error}")
+            else:
+                progress_bar.progress(1.0, text=f"Scored {rows:,} customers")
+                # Scoring the same upload again replaces the previous file
+                discard_batch_result(batch_result)
+                batch_result = {'upload_id': upload_id, 'path': output_path, 'rows': rows, 'unscored': unscored}
+                st.session_state.batch_result = batch_result
+
+        if batch_result is not None:
+            st.success(f"{batch_result['rows']:,} customers scored!")
+            if batch_result['unscored']:
+                st.warning(f"{batch_result['unscored']:,} rows have missing values or unknown categories and "
+                           f"could not be scored, their RiskLevel is empty in the download")
+            with open(batch_result['path'], 'rb') as scores_file:
+                st.download_button(
+                    "⬇️ Download Scores",
+                    scores_file,
+                    file_name=f"{uploaded_file.name.rsplit('.', 1)[0]}_scores.csv.gz",
+                    mime="application/gzip",
+                    use_container_width=True
+                )
 
 # Sidebar for quick stats and settings
 with st.sidebar:
@@ -590,27 +588,120 @@ with st.sidebar:
     # Quick stats
     st.markdown("### 📈 Model Stats")
     st.metric("Model Accuracy", "86.4%", "↑ 2.3%")
-    st.metric("Predictions Today", len(st.session_state.prediction_history), "")
+    st.metric("Predictions Today", history_store.count_today(), "")
+    cache_stats = prediction_cache.stats()
+    st.metric(
+        "Cache Hit Rate",
+        f"{cache_stats['hit_rate']:.0%}",
+        f"{cache_stats['hits']} hits / {cache_stats['misses']} misses",
+        delta_color="off"
+    )
+    reload_status = artifacts.reload_status()
+    if reload_status['last_error']:
+        st.warning(f"New artifacts not loaded, serving the previous version: {reload_status['last_error']}")
+    if reload_status['content_hash']:
+        reloaded = (f" · reloaded {reload_status['reloads']}×, last at "
+                    f"{datetime.fromtimestamp(reload_status['last_reload']):%H:%M:%S}" if reload_status['reloads'] else "")
+        st.caption(f"Model {reload_status['content_hash'][:12]}{reloaded}")
+
+    # Rolling per-stage timings across all sessions
+    stage_timings = perf.summary()
+    with st.expander("⏱️ Stage Timings (p50 / p95)"):
+        if stage_timings:
+            rows = "\n".join(
+                f"| {name} | {stats['p50_ms']:.2f} ms | {stats['p95_ms']:.2f} ms | {stats['count']:,} |"
+                for name, stats in stage_timings.items()
+            )
+            st.markdown("| Stage | p50 | p95 | Calls |\n|---|---|---|---|\n" + rows)
+            col_json, col_prom = st.columns(2)
+            with col_json:
+                st.download_button("JSON", perf.to_json(), file_name="stage_timings.json",
+                                   mime="application/json", use_container_width=True)
+            with col_prom:
+                st.download_button("Prometheus", perf.to_prometheus(), file_name="stage_timings.prom",
+                                   mime="text/plain", use_container_width=True)
+        else:
+            st.caption("No timings recorded yet")
+
+    # Drift against the training data; alerts stay visible outside the expander
+    runtime = artifacts.current()
+    drift_stats = load_drift_monitor(runtime.version).snapshot()
+    drift_report = []
+    if drift_stats is not None:
+        drift_report = drift.compare(drift_stats, load_drift_reference(runtime.version, runtime),
+                                     runtime.feature_transform())
+    drift_alerts = drift.alerts(drift_report)
+    if drift_alerts:
+        drift_message = "📡 **Feature drift:** " + ", ".join(
+            f"{entry['feature']} (PSI {entry['psi']:.2f})" for entry in drift_alerts[:3])
+        if len(drift_alerts) > 3:
+            drift_message += f" and {len(drift_alerts) - 3} more"
+        if drift_alerts[0]['status'] == 'alert':
+            st.error(drift_message)
+        else:
+            st.warning(drift_message)
+    with st.expander("📡 Feature Drift"):
+        if drift_report:
+            rows = "\n".join(
+                f"| {entry['feature']} | {entry['mean']:,.2f} | {entry['train_mean']:,.2f} | "
+                f"{entry['psi']:.3f} | {entry['ks']:.3f} | {entry['status']} |"
+                for entry in drift_report
+            )
+            st.markdown("| Feature | Mean | Train | PSI | KS | Status |\n|---|---|---|---|---|---|\n" + rows)
+            st.caption(f"{drift_stats.rows:,} customers scored in this process"
+                       + (f", statuses start at {drift.MIN_ROWS:,}" if drift_stats.rows < drift.MIN_ROWS else ""))
+        else:
+            st.caption("No customers scored yet")
+
+    # Champion/challenger comparison, only when a challenger is configured
+    challenger = shadow.scorer()
+    if challenger is not None:
+        with st.expander("🥊 Challenger"):
+            summary = challenger.summary()
+            st.caption(f"Shadow model: {summary['challenger']}")
+            if summary['rows']:
+                st.markdown(
+                    f"| Metric | Value |\n|---|---|\n"
+                    f"| Customers compared | {summary['rows']:,} |\n"
+                    f"| Risk level disagreement | {summary['disagreement_rate']:.1%} |\n"
+                    f"| Decision flips at {shadow.DECISION_THRESHOLD} | {summary['decision_flip_rate']:.1%} |\n"
+                    f"| Mean score delta | {summary['mean_delta'] * 100:+.2f} pts |\n"
+                    f"| Mean / max abs delta | {summary['mean_abs_delta'] * 100:.2f} / "
+                    f"{summary['max_abs_delta'] * 100:.2f} pts |"
+                )
+            else:
+                st.caption("No customers compared yet")
+            if summary['dropped']:
+                st.caption(f"{summary['dropped']:,} rows skipped while the challenger was behind")
+            if summary['last_error']:
+                st.warning(f"Challenger failed: {summary['last_error']}")
+    elif shadow.last_error:
+        st.warning(f"🥊 Shadow scoring is off, the challenger could not be loaded: {shadow.last_error}")
     
     st.markdown("---")
     
-    # Batch prediction option
-    st.markdown("### 📁 Batch Prediction")
-    uploaded_file = st.file_uploader("Upload CSV file", type=['csv'])
-    if uploaded_file is not None:
-        st.success("File uploaded successfully!")
-    
+    batch_panel()
+
     st.markdown("---")
     
     # Clear history button
-    if st.button("🗑️ Clear History", use_container_width=True):
-        st.session_state.prediction_history = []
+    if st.button("🗑️ Clear History", use_container_width=True,
+                 help="Removes the predictions saved in this session, other sessions' history is kept"):
+        history_store.clear(history_session)
         st.rerun()
 
-# Main tabs
-tab1, tab2, tab3 = st.tabs(["🎯 Prediction", "📊 Analytics", "📜 History"])
+# Main tabs. Switching tabs reruns the page and only the open tab builds its
+# charts (tab.open), hidden tabs are not computed or sent to the browser.
+tab1, tab2, tab3, tab4 = st.tabs(["🎯 Prediction", "📊 Analytics", "📜 History", "🏆 Top Risk"], key="main_tab",
+                                 on_change="rerun")
+
+# Prediction tab: inputs and result share one fragment, the result depends on every input
+@st.fragment
+@perf.stage('prediction_panel')
+def prediction_panel():
+    # Every artifact this run uses comes from one version, even if a reload swaps in the next meanwhile
+    runtime = artifacts.current()
 
-with tab1:
     # Create columns for input and output
     col1, col2 = st.columns([1, 1], gap="large")
     
@@ -625,11 +716,12 @@ with tab1:
         
         # Demographics
         st.markdown('<p class="input-label">📍 Demographics</p>', unsafe_allow_html=True)
+        feature_transform = runtime.feature_transform()
         col_geo, col_gender = st.columns(2)
         with col_geo:
-            geography = st.selectbox('Geography', onehot_encoder_geo.categories_[0], label_visibility="collapsed")
+            geography = st.selectbox('Geography', feature_transform.geo_categories, label_visibility="collapsed")
         with col_gender:
-            gender = st.selectbox('Gender', label_encoder_gender.classes_, label_visibility="collapsed")
+            gender = st.selectbox('Gender', feature_transform.gender_classes, label_visibility="collapsed")
         
         age = st.slider('🎂 Age (years)', 18, 92, value=45)
         
@@ -681,32 +773,41 @@ with tab1:
     
     with col2:
         # Prepare the input data
-        input_data = pd.DataFrame({
-            'CreditScore': [credit_score],
-            'Gender': [label_encoder_gender.transform([gender])[0]],
-            'Age': [age],
-            'Tenure': [tenure],
-            'Balance': [balance],
-            'NumOfProducts': [num_of_products],
-            'HasCrCard': [has_cr_card],
-            'IsActiveMember': [is_active_member],
-            'EstimatedSalary': [estimated_salary]
-        })
-
-        # One-hot encode 'Geography'
-        geo_encoded = onehot_encoder_geo.transform([[geography]]).toarray()
-        geo_encoded_df = pd.DataFrame(geo_encoded, columns=onehot_encoder_geo.get_feature_names_out(['Geography']))
-
-        # Combine one-hot encoded columns with input data
-        input_data = pd.concat([input_data.reset_index(drop=True), geo_encoded_df], axis=1)
-
-        # Scale the input data
-        input_data_scaled = scaler.transform(input_data)
-
-        # Predict churn
-        prediction = model.predict(input_data_scaled, verbose=0)
-        prediction_proba = prediction[0][0]
+        input_data = {
+            'CreditScore': credit_score,
+            'Geography': geography,
+            'Gender': gender,
+            'Age': age,
+            'Tenure': tenure,
+            'Balance': balance,
+            'NumOfProducts': num_of_products,
+            'HasCrCard': has_cr_card,
+            'IsActiveMember': is_active_member,
+            'EstimatedSalary': estimated_salary
+        }
+
+        # Encode, scale and predict, reusing the score if any session already computed it
+        version = runtime.version
+        def predict_churn():
+            # Encoding and scaling are one fused step in FeatureTransform
+            with perf.stage('preprocess'):
+                input_data_scaled = feature_transform.transform_record(input_data)
+            # Only customers not seen before reach the drift statistics
+            with perf.stage('drift'):
+                load_drift_monitor(version).update(input_data_scaled)
+            with perf.stage('inference'):
+                prediction = runtime.model().predict(input_data_scaled, verbose=0)
+            # The challenger scores the same row on its own thread, this only enqueues it
+            challenger = shadow.scorer()
+            if challenger is not None:
+                challenger.submit(input_data_scaled, prediction[:, 0], feature_transform)
+            return float(prediction[0][0])
+
+        prediction_proba = prediction_cache.lookup(input_data, predict_churn, version=version)
         churn_risk = prediction_proba * 100
+        st.session_state.customer = input_data
+        st.session_state.churn_risk = churn_risk
+        perf.mark('first_prediction')
 
         # Determine risk level and styling
         if churn_risk > 70:
@@ -740,7 +841,10 @@ with tab1:
                 </div>
         """, unsafe_allow_html=True)
         
-        st.plotly_chart(create_gauge_chart(churn_risk), use_container_width=True, config={'displayModeBar': False})
+        if tab1.open:
+            with perf.stage('gauge_chart'):
+                gauge_chart = figures.gauge(churn_risk)
+            st.plotly_chart(gauge_chart, use_container_width=True, config={'displayModeBar': False})
         
         st.markdown(f"""
             <div style="text-align: center; margin-top: -20px;">
@@ -748,6 +852,19 @@ with tab1:
             </div>
         """, unsafe_allow_html=True)
         
+        # Rank against every scored reference customer (binary search in the sorted index)
+        percentile_index = load_percentile_index(version, runtime)
+        population_rank = percentile_index.rank(prediction_proba)
+        st.markdown(f"""
+            <p style="text-align: center; margin: 0.75rem 0 0;">
+                Riskier than <strong>{population_rank:.1f}%</strong> of {len(percentile_index):,} reference customers
+            </p>
+        """, unsafe_allow_html=True)
+        if tab1.open:
+            with perf.stage('distribution_chart'):
+                distribution_chart = figures.distribution(*percentile_index.histogram(), churn_risk)
+            st.plotly_chart(distribution_chart, use_container_width=True, config={'displayModeBar': False})
+        
         st.markdown("</div>", unsafe_allow_html=True)
         
         # Recommendation box
@@ -800,7 +917,7 @@ with tab1:
         
         # Save to history button
         if st.button("💾 Save to History", use_container_width=True, type="primary"):
-            st.session_state.prediction_history.append({
+            history_store.append({
                 'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M"),
                 'geography': geography,
                 'age': age,
@@ -808,10 +925,20 @@ with tab1:
                 'balance': balance,
                 'risk': churn_risk,
                 'level': risk_level
-            })
+            }, session=history_session)
             st.success("Prediction saved to history!")
 
-with tab2:
+with tab1:
+    prediction_panel()
+
+@st.fragment
+@perf.stage('analytics_panel')
+def analytics_panel():
+    runtime = artifacts.current()
+    input_data = st.session_state.customer
+    churn_risk = st.session_state.churn_risk
+    balance, estimated_salary = input_data['Balance'], input_data['EstimatedSalary']
+
     st.markdown("""
         <div class="glass-card">
             <div class="section-header">
@@ -824,26 +951,51 @@ with tab2:
     
     with col_radar:
         st.markdown("#### Customer Profile Radar")
+        with perf.stage('radar_chart'):
+            radar_chart = figures.radar(input_data['CreditScore'], input_data['Age'], input_data['Tenure'],
+                                        balance, input_data['NumOfProducts'], estimated_salary)
         st.plotly_chart(
-            create_radar_chart(credit_score, age, tenure, balance, num_of_products, estimated_salary),
+            radar_chart,
             use_container_width=True,
             config={'displayModeBar': False}
         )
     
     with col_factors:
         st.markdown("#### Churn Risk Factors")
-        
-        # Calculate factor impacts (simplified heuristics)
-        factors = {
-            'Active Member': 15 if is_active_member else -20,
-            'Credit Card': 5 if has_cr_card else -5,
-            'Products (>1)': 10 if num_of_products > 1 else -15,
-            'High Tenure': 15 if tenure > 5 else -10,
-            'Credit Score': 10 if credit_score > 700 else (-15 if credit_score < 500 else 0),
-            'Age Factor': -10 if age > 50 else 5
-        }
-        
-        st.plotly_chart(create_factor_chart(factors), use_container_width=True, config={'displayModeBar': False})
+    
+        # Shapley values of each field against a background sample of customers,
+        # cached per input so switching tabs does not recompute them
+        explainer = load_explainer(runtime.version, runtime)
+        with perf.stage('attribution'):
+            contributions = attribution.cache.lookup(
+                input_data, lambda: explainer.explain(input_data), version=runtime.version)
+        factors = {name: value * 100 for name, value in contributions.items()}
+    
+        with perf.stage('factor_chart'):
+            factor_chart = figures.factors(factors)
+        st.plotly_chart(factor_chart, use_container_width=True, config={'displayModeBar': False})
+        st.caption(f"Contributions relative to an average customer ({explainer.base_value * 100:.1f}% churn risk), "
+                   f"they add up to this customer's {churn_risk:.1f}%.")
+    
+    st.markdown("</div>", unsafe_allow_html=True)
+    
+    # What-if sensitivity
+    st.markdown("""
+        <div class="glass-card">
+            <div class="section-header">
+                <div class="section-icon">🔍</div>
+                <h3>What-If Analysis</h3>
+            </div>
+    """, unsafe_allow_html=True)
+    
+    # Every grid point of every input is scored in one batched call instead of one rerun per slider position
+    with perf.stage('whatif'):
+        curves = whatif.sensitivity_curves(runtime.model(), runtime.feature_transform(), input_data)
+    with perf.stage('whatif_chart'):
+        whatif_chart = figures.whatif(curves, input_data)
+    st.plotly_chart(whatif_chart, use_container_width=True, config={'displayModeBar': False})
+    st.caption("Churn risk as one input varies and everything else stays at this customer's values. "
+               "Dotted lines mark the medium (40%) and high (70%) risk thresholds.")
     
     st.markdown("</div>", unsafe_allow_html=True)
     
@@ -885,7 +1037,13 @@ with tab2:
     
     st.markdown("</div>", unsafe_allow_html=True)
 
-with tab3:
+with tab2:
+    if tab2.open:
+        analytics_panel()
+
+@st.fragment
+@perf.stage('history_panel')
+def history_panel():
     st.markdown("""
         <div class="glass-card">
             <div class="section-header">
@@ -894,9 +1052,26 @@ with tab3:
             </div>
     """, unsafe_allow_html=True)
     
-    if len(st.session_state.prediction_history) > 0:
+    total_saved = history_store.count()
+    if total_saved > 0:
+        import pandas as pd
+
+        # Filter and paginate in SQLite, only the visible page is loaded
+        col_level, col_size, col_page = st.columns(3)
+        with col_level:
+            level_filter = st.selectbox('Risk Level', ['All', 'HIGH RISK', 'MEDIUM RISK', 'LOW RISK'])
+        level = None if level_filter == 'All' else level_filter
+        with col_size:
+            page_size = st.selectbox('Rows per page', [25, 50, 100, 250], index=1)
+        matching = history_store.count(level=level) if level else total_saved
+        page_count = max(1, -(-matching // page_size))
+        with col_page:
+            page = st.number_input('Page', min_value=1, max_value=page_count, value=1, step=1,
+                                   key=f"history_page_{level_filter}_{page_size}")
+        st.caption(f"{matching:,} predictions · page {page} of {page_count}")
+
         # Display history as a table
-        history_df = pd.DataFrame(st.session_state.prediction_history)
+        history_df = pd.DataFrame(history_store.page(page, page_size, level), columns=history.COLUMNS)
         
         # Create styled dataframe
         st.dataframe(
@@ -914,24 +1089,17 @@ with tab3:
             }
         )
         
-        # History chart
-        if len(st.session_state.prediction_history) > 1:
+        # History chart: recent predictions or rolling aggregates, downsampled with LTTB
+        if total_saved > 1:
             st.markdown("#### Risk Trend")
-            fig = px.line(
-                history_df, 
-                x='timestamp', 
-                y='risk',
-                markers=True,
-                color_discrete_sequence=['#667eea']
-            )
-            fig.update_layout(
-                paper_bgcolor='rgba(0,0,0,0)',
-                plot_bgcolor='rgba(0,0,0,0)',
-                font=dict(color='white'),
-                xaxis=dict(gridcolor='rgba(255,255,255,0.1)'),
-                yaxis=dict(gridcolor='rgba(255,255,255,0.1)', range=[0, 100])
-            )
-            st.plotly_chart(fig, use_container_width=True, config={'displayModeBar': False})
+            resolution = st.radio('Resolution', list(TREND_BUCKETS), horizontal=True, label_visibility="collapsed")
+            if tab3.open:
+                if TREND_BUCKETS[resolution] is None:
+                    fig = figures.trend(*history_store.recent_points())
+                else:
+                    risk_trend = history_store.risk_trend(TREND_BUCKETS[resolution])
+                    fig = figures.trend(risk_trend['time'], risk_trend['mean_risk'], risk_trend['max_risk'])
+                st.plotly_chart(fig, use_container_width=True, config={'displayModeBar': False})
     else:
         st.markdown("""
             <div style="text-align: center; padding: 40px; color: rgba(255,255,255,0.5);">
@@ -943,6 +1111,76 @@ with tab3:
     
     st.markdown("</div>", unsafe_allow_html=True)
 
+with tab3:
+    history_panel()
+
+# Highest-risk reference customers for retention campaigns, filtered and ranked
+# from a prebuilt index (topk.py) without sorting the whole table
+@st.fragment
+@perf.stage('topk_panel')
+def topk_panel():
+    import topk
+
+    runtime = artifacts.current()
+    index = load_topk_index(runtime.version, runtime)
+
+    st.markdown("""
+        <div class="glass-card">
+            <div class="section-header">
+                <div class="section-icon">🏆</div>
+                <h3>Highest-Risk Customers</h3>
+            </div>
+    """, unsafe_allow_html=True)
+
+    col_geo, col_gender, col_products = st.columns(3)
+    with col_geo:
+        geography = st.multiselect('Geography', index.categories['Geography'].tolist(), placeholder="All")
+    with col_gender:
+        gender = st.multiselect('Gender', index.categories['Gender'].tolist(), placeholder="All")
+    with col_products:
+        products = st.multiselect('Products', index.categories['NumOfProducts'].tolist(), placeholder="All")
+    col_min, col_max, col_k = st.columns(3)
+    with col_min:
+        min_balance = st.number_input('Min Balance ($)', min_value=0.0, value=0.0, step=10000.0, format="%.0f")
+    with col_max:
+        max_balance = st.number_input('Max Balance ($, 0 = no limit)', min_value=0.0, value=0.0, step=10000.0,
+                                      format="%.0f")
+    with col_k:
+        k = st.number_input('Customers', min_value=1, max_value=10_000, value=topk.DEFAULT_K, step=50)
+
+    with perf.stage('topk_query'):
+        start = time.perf_counter()
+        positions, matched = index.query(k, geography or None, gender or None, products or None,
+                                         min_balance or None, max_balance or None)
+        query_ms = (time.perf_counter() - start) * 1000
+    st.caption(f"Top {len(positions):,} of {matched:,} matching customers ({len(index):,} in the reference data) "
+               f"· {query_ms:.1f} ms"
+               + (f" · {index.unscored:,} customers with missing values left out" if index.unscored else ""))
+
+    if len(positions):
+        results = index.frame(positions)
+        results['ChurnProbability'] *= 100
+        st.dataframe(
+            results,
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "Balance": st.column_config.NumberColumn("Balance", format="$%.0f"),
+                "ChurnProbability": st.column_config.ProgressColumn("Risk %", min_value=0, max_value=100),
+                "RiskLevel": st.column_config.TextColumn("Level", width="small"),
+            }
+        )
+        st.download_button("📥 Download CSV", results.to_csv(index=False), file_name="top_risk_customers.csv",
+                           mime="text/csv", use_container_width=True)
+    else:
+        st.caption("No customers match these filters")
+
+    st.markdown("</div>", unsafe_allow_html=True)
+
+with tab4:
+    if tab4.open:
+        topk_panel()
+
 # Footer
 st.markdown("""
     <div class="footer">
@@ -950,3 +1188,5 @@ st.markdown("""
         <p style="margin-top: 8px; font-size: 0.85em;">Model Version 2.0 | Last Updated: """ + datetime.now().strftime("%B %d, %Y") + """</p>
     </div>
 """, unsafe_allow_html=True)
+
+perf.record('rerun', time.perf_counter() - rerun_started)
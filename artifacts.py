@@ -0,0 +1,286 @@
+import os
+import threading
+import time
+import warnings
+from concurrent.futures import Future
+
+import numpy as np
+
+import bundle
+import inference
+import quantize
+
+BUNDLE_PATH = bundle.DEFAULT_PATH
+BUNDLE_FILES = (os.path.join(BUNDLE_PATH, bundle.MANIFEST_NAME), os.path.join(BUNDLE_PATH, bundle.WEIGHTS_NAME))
+
+# model.h5 is only read by the Keras backend, everything else comes from the bundle
+MODEL_PATH = 'model.h5'
+
+# What bundle.export_bundle() is built from. A deploy that only replaces these
+# (the pre-bundle layout) is exported into the bundle by the watcher.
+SOURCE_FILES = (MODEL_PATH, 'label_encoder_gender.pkl', 'onehot_encoder_geo.pkl', 'scaler.pkl')
+
+# Seconds between checks for new artifacts on disk, 0 turns hot reload off
+RELOAD_INTERVAL = float(os.environ.get('CHURN_RELOAD_INTERVAL', 2.0))
+
+# Customers a new version is warmed up and checked on before it is served
+VALIDATION_PATH = os.environ.get('CHURN_REFERENCE_DATA', 'Churn_Modelling.csv')
+VALIDATION_ROWS = 1000
+
+
+# Reduced-precision copy of the bundle model (CHURN_PRECISION=float16/int8).
+# If calibration puts it above tolerance the float32 model is served instead.
+def _load_quantized(runtime):
+    loaded = runtime.bundle()
+    try:
+        model, _ = quantize.enable(loaded.model, loaded.feature_transform, quantize.DEFAULT_MODE)
+    except ValueError as error:
+        warnings.warn(f"{error}; serving the float32 model")
+        return loaded.model
+    return model
+
+
+LOADERS = {
+    'bundle': lambda runtime: bundle.load_bundle(BUNDLE_PATH),
+    'keras': lambda runtime: inference.load_model(MODEL_PATH, 'keras'),
+    'quantized': _load_quantized,
+}
+
+
+def _run(future, loader, runtime):
+    try:
+        future.set_result(loader(runtime))
+    except BaseException as error:
+        future.set_exception(error)
+
+
+def _uses_keras():
+    return inference.DEFAULT_BACKEND == 'keras'
+
+
+def _uses_quantized():
+    return not _uses_keras() and quantize.DEFAULT_MODE != 'float32'
+
+
+# Cheap identity of the artifact files on disk (path, size, mtime)
+def _stat(paths):
+    return tuple(
+        (path, stat.st_size, stat.st_mtime_ns)
+        for path in paths
+        for stat in (os.stat(path),)
+    )
+
+
+def _disk_version():
+    return _stat(BUNDLE_FILES + ((MODEL_PATH,) if _uses_keras() else ()))
+
+
+# Bundle sources that exist, a bundle-only deployment has none of them
+def _sources():
+    return _stat(path for path in SOURCE_FILES if os.path.exists(path))
+
+
+# One version of the artifacts, identified by the fingerprint of the files it
+# was loaded from. Each artifact loads in its own background thread on first
+# use. A Runtime never changes once created: a request that took one keeps
+# scoring on it even if a newer version is swapped in meanwhile.
+class Runtime:
+    def __init__(self, version):
+        self.version = version
+        self._lock = threading.Lock()
+        self._loads = {}
+
+    def _load(self, name):
+        with self._lock:
+            future = self._loads.get(name)
+            # A failed load is retried on the next request instead of being cached
+            if future is None or (future.done() and future.exception() is not None):
+                future = Future()
+                threading.Thread(target=_run, args=(future, LOADERS[name], self), name=f'load-{name}',
+                                 daemon=True).start()
+                self._loads[name] = future
+        return future
+
+    # Kick off background loading without waiting for it
+    def start_loading(self):
+        self._load('bundle')
+        if _uses_keras():
+            self._load('keras')
+        elif _uses_quantized():
+            self._load('quantized')
+
+    # Blocking getters, they only wait if the background load has not finished yet
+    def bundle(self):
+        return self._load('bundle').result()
+
+    def feature_transform(self):
+        return self.bundle().feature_transform
+
+    # The loaded artifact, or None while it is loading or after a failed load; never blocks
+    def peek(self, name='bundle'):
+        future = self._loads.get(name)
+        if future is None or not future.done() or future.exception() is not None:
+            return None
+        return future.result()
+
+    def model(self):
+        if _uses_keras():
+            return self._load('keras').result()
+        if _uses_quantized():
+            return self._load('quantized').result()
+        return self.bundle().model
+
+
+# The served Runtime, shared by every session and request thread in the
+# process. app.py is re-executed on each rerun but this module is imported once.
+_lock = threading.Lock()
+_current = None
+
+
+# The Runtime being served right now, created (not loaded) on first use
+def current():
+    global _current
+    with _lock:
+        if _current is None:
+            _current = Runtime(_disk_version())
+        return _current
+
+
+def start_loading():
+    current().start_loading()
+
+
+# Getters for the served version. Code that makes several calls for one
+# request should take current() once, so a reload cannot mix two versions.
+def feature_transform():
+    return current().feature_transform()
+
+
+# The loaded model bundle (path, manifest, content hash) regardless of backend
+def current_bundle():
+    return current().bundle()
+
+
+def model():
+    return current().model()
+
+
+# Version of the served artifacts, used to invalidate anything derived from them
+def fingerprint():
+    return current().version
+
+
+# name -> function(runtime) called on a new version before it is swapped in, so
+# whatever is derived from the artifacts (indexes, explainers) is ready when
+# the first request on the new version needs it
+warmups = {}
+
+_status = {'reloads': 0, 'last_reload': None, 'last_error': None, 'validation': None}
+
+
+# Warm up a candidate and check it on sample customers: probabilities must be
+# finite, in [0, 1] and not constant. Returns the check's summary, including
+# how far the candidate moves scores relative to the served version.
+def validate(runtime, data_path=VALIDATION_PATH, rows=VALIDATION_ROWS):
+    import pandas as pd
+
+    data = pd.read_csv(data_path, nrows=rows)
+    features = runtime.feature_transform().transform(data)
+    candidate = runtime.model()
+    # The single-row call is the one the app and /predict make; for Keras it also builds the predict function
+    candidate.predict(features[:1], verbose=0)
+    probabilities = np.asarray(candidate.predict(features, batch_size=len(features), verbose=0))
+    if probabilities.shape != (len(features), 1):
+        raise ValueError(f"model returned shape {probabilities.shape} for {len(features)} customers")
+    probabilities = probabilities[:, 0]
+    if not np.isfinite(probabilities).all() or probabilities.min() < 0 or probabilities.max() > 1:
+        raise ValueError("model returned probabilities that are NaN or outside [0, 1]")
+    if probabilities.std() < 1e-6:
+        raise ValueError(f"model returns the same probability ({probabilities[0]:.4f}) for every customer")
+
+    served = current()
+    report = {'rows': len(features), 'mean_probability': float(probabilities.mean())}
+    if served is not runtime:
+        served_probabilities = np.asarray(
+            served.model().predict(served.feature_transform().transform(data), batch_size=len(features),
+                                   verbose=0))[:, 0]
+        report['mean_abs_change'] = float(np.abs(probabilities - served_probabilities).mean())
+    return report
+
+
+# Load, warm up and validate the artifacts on disk in the calling thread, then
+# swap them in. The served version keeps answering until the swap, which is a
+# single reference assignment; on any failure it simply stays in place.
+def reload():
+    global _current
+    candidate = Runtime(_disk_version())
+    candidate.start_loading()
+    report = validate(candidate)
+    for warmup in list(warmups.values()):
+        warmup(candidate)
+    if _disk_version() != candidate.version:
+        raise RuntimeError("artifact files changed while the new version was loading")
+    with _lock:
+        _current = candidate
+    _status.update(reloads=_status['reloads'] + 1, last_reload=time.time(), last_error=None, validation=report)
+    return candidate
+
+
+# Reload state for display: served bundle hash, reload count and time, last error
+def reload_status():
+    loaded = current().peek('bundle')
+    return {**_status, 'content_hash': loaded.content_hash if loaded is not None else None,
+            'watching': _watcher is not None}
+
+
+# Poll the artifact files and reload when they change. A change is acted on
+# once the files look the same on two consecutive polls, a deploy may still
+# be copying them; a version that failed validation is not retried until the
+# files change again. Legacy files are only re-exported when one of them is
+# newer than the bundle: train.py moves in sources the bundle was already
+# built from, older than it, and a half-moved set must not be exported.
+def _watch(interval):
+    served_sources = _sources()
+    previous = rejected = None
+    while True:
+        time.sleep(interval)
+        try:
+            observed = (_disk_version(), _sources())
+            if observed != previous:
+                previous = observed
+                continue
+            version, sources = observed
+            bundle_unchanged = version[:len(BUNDLE_FILES)] == current().version[:len(BUNDLE_FILES)]
+            # version[0] is the manifest's (path, size, mtime)
+            newer_sources = max(mtime for _, _, mtime in sources) > version[0][2] if sources else False
+            if (sources != served_sources and bundle_unchanged and newer_sources
+                    and len(sources) == len(SOURCE_FILES)):
+                # Only model.h5/pickles were replaced: rebuild the bundle, the next polls load it
+                bundle.export_bundle(BUNDLE_PATH, *SOURCE_FILES)
+                served_sources = sources
+                continue
+            served_sources = sources
+            if version != current().version and version != rejected:
+                try:
+                    reload()
+                except Exception:
+                    rejected = version
+                    raise
+        except Exception as error:
+            _status['last_error'] = f"{type(error).__name__}: {error}"
+            warnings.warn(f"Artifact reload failed, still serving the previous version: {error}")
+
+
+_watcher = None
+
+
+# Start the watcher thread once per process. Long-running services call this;
+# batch workers do not, one run is scored with one version.
+def watch(interval=RELOAD_INTERVAL):
+    global _watcher
+    if interval <= 0:
+        return
+    with _lock:
+        if _watcher is None:
+            _watcher = threading.Thread(target=_watch, args=(interval,), name='artifact-watcher', daemon=True)
+            _watcher.start()
@@ -0,0 +1,105 @@
+import os
+import sys
+from math import factorial
+
+import numpy as np
+
+from features import GEO_PREFIX
+from prediction_cache import PredictionCache
+
+BACKGROUND_PATH = 'Churn_Modelling.csv'
+
+# Customers the current input is compared against. 2 ** 10 coalitions x 64 rows
+# is exactly one inference.DEFAULT_BATCH_SIZE batch.
+BACKGROUND_SIZE = int(os.environ.get('CHURN_BACKGROUND_SIZE', 64))
+
+# Display names of the raw model fields (the same fields, in the same order, as
+# batch.FEATURE_COLUMNS; not imported from there to keep pandas out of app startup)
+LABELS = {
+    'CreditScore': 'Credit Score', 'Geography': 'Geography', 'Gender': 'Gender', 'Age': 'Age',
+    'Tenure': 'Tenure', 'Balance': 'Balance', 'NumOfProducts': 'Products', 'HasCrCard': 'Credit Card',
+    'IsActiveMember': 'Active Member', 'EstimatedSalary': 'Salary',
+}
+
+
+# Shapley weights as a (n_players, 2 ** n_players) matrix: phi = weights @ v, where
+# v[mask] is the value of the coalition whose members are the set bits of mask
+def shapley_weights(n_players):
+    masks = np.arange(2 ** n_players)
+    members = (masks[:, None] >> np.arange(n_players)) & 1
+    sizes = members.sum(axis=1)
+    weight_by_size = np.array([factorial(s) * factorial(n_players - s - 1) / factorial(n_players)
+                               for s in range(n_players)])
+    weights = np.zeros((n_players, len(masks)))
+    for i in range(n_players):
+        without = masks[members[:, i] == 0]
+        w = weight_by_size[sizes[without]]
+        weights[i, without | (1 << i)] += w
+        weights[i, without] -= w
+    return members.astype(bool), weights
+
+
+# Exact interventional Shapley values of the raw customer fields against a
+# background sample: a field outside the coalition takes the background
+# customer's value. Every coalition x background row is scored in one batch,
+# and the values add up to f(customer) - mean f(background).
+class ShapleyExplainer:
+    def __init__(self, model, feature_transform, background):
+        self.model = model
+        self.feature_transform = feature_transform
+        self.fields = list(LABELS)
+        self.background = feature_transform.transform(background)
+
+        # Feature-matrix columns owned by each raw field (Geography is one-hot)
+        index = {name: i for i, name in enumerate(feature_transform.feature_names)}
+        groups = [[i for name, i in index.items() if name.startswith(GEO_PREFIX)] if field == 'Geography'
+                  else [index[field]] for field in self.fields]
+        members, self._weights = shapley_weights(len(self.fields))
+        self._column_masks = np.zeros((len(members), feature_transform.n_features), dtype=bool)
+        for player, columns in enumerate(groups):
+            self._column_masks[:, columns] = members[:, [player]]
+
+        self.base_value = float(np.mean(model.predict(self.background, verbose=0)))
+
+    @classmethod
+    def from_csv(cls, model, feature_transform, path=BACKGROUND_PATH, size=BACKGROUND_SIZE, seed=0):
+        import pandas as pd
+
+        data = pd.read_csv(path, usecols=list(LABELS))
+        return cls(model, feature_transform, data.sample(n=min(size, len(data)), random_state=seed))
+
+    # {field label: contribution to the churn probability} for one customer record
+    def explain(self, record):
+        x = self.feature_transform.transform_record(record)[0]
+        rows = np.where(self._column_masks[:, None, :], x, self.background[None, :, :]).reshape(-1, len(x))
+        scores = self.model.predict(rows, batch_size=len(rows), verbose=0)
+        values = np.asarray(scores, dtype=np.float64).reshape(len(self._column_masks), -1).mean(axis=1)
+        return {LABELS[field]: float(phi) for field, phi in zip(self.fields, self._weights @ values)}
+
+
+# Attributions per customer record, shared by every session like the prediction cache
+cache = PredictionCache()
+
+
+# Print the attributions of a few customers and check they add up to f(x) - base
+def check_additivity(data_path=BACKGROUND_PATH, rows=5, atol=1e-5):
+    import pandas as pd
+    import bundle
+
+    loaded = bundle.load_bundle()
+    explainer = ShapleyExplainer.from_csv(loaded.model, loaded.feature_transform, data_path)
+    print(f"Base value (mean churn probability of {len(explainer.background)} background customers): "
+          f"{explainer.base_value:.4f}")
+    worst = 0.0
+    for record in pd.read_csv(data_path, nrows=rows).to_dict('records'):
+        contributions = explainer.explain(record)
+        prediction = float(loaded.model.predict(loaded.feature_transform.transform_record(record))[0, 0])
+        worst = max(worst, abs(explainer.base_value + sum(contributions.values()) - prediction))
+        top = sorted(contributions.items(), key=lambda item: -abs(item[1]))[:3]
+        print(f"p={prediction:.4f}  " + ', '.join(f"{name} {value:+.4f}" for name, value in top))
+    print(f"Max |base + sum(contributions) - prediction|: {worst:.3e}")
+    return worst <= atol
+
+
+if __name__ == '__main__':
+    sys.exit(0 if check_additivity(*sys.argv[1:2]) else 1)
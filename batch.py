@@ -0,0 +1,571 @@
+import argparse
+import gzip
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+import drift
+
+# Raw input columns the model needs (everything in Churn_Modelling.csv except ids and the label)
+FEATURE_COLUMNS = [
+    'CreditScore', 'Geography', 'Gender', 'Age', 'Tenure', 'Balance',
+    'NumOfProducts', 'HasCrCard', 'IsActiveMember', 'EstimatedSalary'
+]
+
+# Identifier columns copied through to the scored output when present
+ID_COLUMNS = ['RowNumber', 'CustomerId', 'Surname']
+
+DEFAULT_CHUNK_SIZE = 50_000
+
+RISK_LEVELS = ('LOW RISK', 'MEDIUM RISK', 'HIGH RISK')
+# RiskLevel of a row that could not be scored: a missing value or unknown category makes its probability NaN
+UNSCORED_LEVEL = ''
+
+# Columnar inputs are read with pyarrow, imported only when one is used
+PARQUET_SUFFIXES = ('.parquet', '.pq')
+ARROW_SUFFIXES = ('.arrow', '.feather', '.ipc')
+
+# Identifier carried into the scores of a columnar input; wide upstream tables
+# are projected down to it plus FEATURE_COLUMNS before anything is decoded
+COLUMNAR_ID_COLUMNS = ['CustomerId']
+
+# Dictionary-encoded string column in the shape FeatureTransform accepts
+DictionaryColumn = namedtuple('DictionaryColumn', ['categories', 'codes'])
+
+
+# Check that a chunk carries every column the model needs
+def check_columns(columns):
+    missing = [col for col in FEATURE_COLUMNS if col not in columns]
+    if missing:
+        raise ValueError(f"Missing required columns: {', '.join(missing)}")
+
+
+# Index into RISK_LEVELS with the same thresholds the prediction tab uses,
+# NaN probabilities get len(RISK_LEVELS), the index of UNSCORED_LEVEL
+def risk_level_codes(probabilities):
+    risk = probabilities * 100
+    return np.select([risk > 70, risk > 40, np.isnan(risk)], [2, 1, len(RISK_LEVELS)], default=0).astype(np.int8)
+
+
+def risk_levels(probabilities):
+    return np.array((*RISK_LEVELS, UNSCORED_LEVEL))[risk_level_codes(probabilities)]
+
+
+# Rows of a scored chunk (DataFrame or Arrow record batch) without a probability
+def count_unscored(scored):
+    if isinstance(scored, pd.DataFrame):
+        probabilities = scored['ChurnProbability']
+    else:
+        probabilities = scored.column('ChurnProbability')
+    return int(np.isnan(np.asarray(probabilities, dtype=np.float64)).sum())
+
+
+# Churn probabilities for a mapping of raw columns (DataFrame or dict of arrays).
+# monitor (a drift.DriftMonitor or drift.RunningStats) receives the scaled features,
+# shadow (a shadow.ShadowScorer) the same features with the probabilities.
+def score_columns(columns, model, feature_transform, monitor=None, shadow=None):
+    features = feature_transform.transform(columns)
+    if monitor is not None:
+        monitor.update(features)
+    probabilities = model.predict(features, batch_size=len(features), verbose=0)[:, 0]
+    if shadow is not None:
+        shadow.submit(features, probabilities, feature_transform)
+    return probabilities
+
+
+# Score one chunk and keep only the identifier columns plus the results
+def score_frame(df, model, feature_transform, monitor=None, shadow=None):
+    check_columns(df.columns)
+    probabilities = score_columns(df, model, feature_transform, monitor, shadow)
+
+    scored = df[[col for col in ID_COLUMNS if col in df.columns]].copy()
+    scored['ChurnProbability'] = probabilities
+    scored['RiskLevel'] = risk_levels(probabilities)
+    return scored
+
+
+# Stream a CSV through the model chunk by chunk, yielding scored chunks.
+# Only one chunk is held in memory at a time regardless of file size.
+def score_csv(source, model, feature_transform, chunk_size=DEFAULT_CHUNK_SIZE, monitor=None, shadow=None):
+    for chunk in pd.read_csv(source, chunksize=chunk_size):
+        yield score_frame(chunk, model, feature_transform, monitor, shadow)
+
+
+# Score an uploaded CSV into a gzip-compressed CSV on disk. Returns its path, the
+# row count and how many rows could not be scored (empty RiskLevel).
+# progress_callback receives (fraction_done, rows_scored) after every chunk.
+def score_upload(uploaded_file, model, feature_transform, chunk_size=DEFAULT_CHUNK_SIZE,
+                 progress_callback=None, monitor=None, shadow=None):
+    total_bytes = getattr(uploaded_file, 'size', None)
+    output = tempfile.NamedTemporaryFile(prefix='churn_scores_', suffix='.csv.gz', delete=False)
+    output.close()
+
+    rows = unscored = 0
+    try:
+        with gzip.open(output.name, 'wt', newline='') as handle:
+            for scored in score_csv(uploaded_file, model, feature_transform, chunk_size, monitor, shadow):
+                scored.to_csv(handle, header=rows == 0, index=False)
+                rows += len(scored)
+                unscored += count_unscored(scored)
+                if progress_callback is not None:
+                    fraction = uploaded_file.tell() / total_bytes if total_bytes else 0.0
+                    progress_callback(min(fraction, 1.0), rows)
+    except BaseException:
+        # Nothing points at a partial file, the caller only gets a path on success
+        os.remove(output.name)
+        raise
+
+    return output.name, rows, unscored
+
+
+def is_parquet(path):
+    return str(path).lower().endswith(PARQUET_SUFFIXES)
+
+
+def is_columnar(path):
+    return str(path).lower().endswith(PARQUET_SUFFIXES + ARROW_SUFFIXES)
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Parquet/Arrow batch scoring requires pyarrow (pip install pyarrow)") from None
+    return pyarrow
+
+
+# Column names and number of row groups (Parquet) or record batches (Arrow IPC/Feather)
+def columnar_layout(path):
+    pa = _pyarrow()
+    if is_parquet(path):
+        parquet = pa.parquet.ParquetFile(path)
+        return parquet.schema_arrow.names, parquet.num_row_groups
+    with pa.memory_map(path) as source:
+        reader = pa.ipc.open_file(source)
+        return reader.schema.names, reader.num_record_batches
+
+
+# Record batches of units [start, end) of a columnar file, projected to the id and
+# feature columns. Parquet is memory-mapped and Gender/Geography are read as
+# dictionaries; Arrow IPC batches are slices of the memory-mapped file.
+def read_columnar(path, start=0, end=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    pa = _pyarrow()
+    names, n_units = columnar_layout(path)
+    check_columns(names)
+    projected = [col for col in COLUMNAR_ID_COLUMNS if col in names] + FEATURE_COLUMNS
+    end = n_units if end is None else end
+    if is_parquet(path):
+        parquet = pa.parquet.ParquetFile(path, memory_map=True, read_dictionary=['Gender', 'Geography'])
+        yield from parquet.iter_batches(batch_size=chunk_size, row_groups=range(start, end), columns=projected)
+        return
+    with pa.memory_map(path) as source:
+        reader = pa.ipc.open_file(source)
+        for i in range(start, end):
+            batch = reader.get_batch(i).select(projected)
+            for offset in range(0, batch.num_rows, chunk_size):
+                yield batch.slice(offset, chunk_size)
+
+
+# Record batch columns as NumPy arrays for FeatureTransform.transform(). Null-free
+# numeric columns come back as zero-copy views of the Arrow buffers, and string
+# columns stay dictionary-encoded so each distinct value is looked up once.
+def arrow_columns(batch):
+    pa = _pyarrow()
+    columns = {}
+    for name, array in zip(batch.schema.names, batch.columns):
+        if pa.types.is_string(array.type) or pa.types.is_large_string(array.type):
+            array = pa.compute.dictionary_encode(array)
+        if pa.types.is_dictionary(array.type):
+            columns[name] = DictionaryColumn(array.dictionary.to_numpy(zero_copy_only=False),
+                                             array.indices.fill_null(-1).to_numpy())
+        else:
+            columns[name] = array.to_numpy(zero_copy_only=False)
+    return columns
+
+
+# Score one Arrow record batch into a record batch of ids plus results
+def score_batch(batch, model, feature_transform, monitor=None):
+    pa = _pyarrow()
+    probabilities = score_columns(arrow_columns(batch), model, feature_transform, monitor)
+    ids = [col for col in COLUMNAR_ID_COLUMNS if col in batch.schema.names]
+    levels = pa.DictionaryArray.from_arrays(risk_level_codes(probabilities),
+                                            pa.array((*RISK_LEVELS, UNSCORED_LEVEL)))
+    return pa.record_batch([*(batch.column(col) for col in ids), pa.array(probabilities), levels],
+                           names=[*ids, 'ChurnProbability', 'RiskLevel'])
+
+
+# Columnar counterpart of score_csv(), yielding scored record batches
+def score_columnar(path, model, feature_transform, chunk_size=DEFAULT_CHUNK_SIZE, monitor=None):
+    for batch in read_columnar(path, chunk_size=chunk_size):
+        yield score_batch(batch, model, feature_transform, monitor)
+
+
+# Appends scored chunks (DataFrames or Arrow record batches) to a CSV or Parquet file
+class ScoreWriter:
+    def __init__(self, path, output_format='csv'):
+        self.path = path
+        self.format = output_format
+        self.rows = 0
+        self.unscored = 0
+        self._handle = None
+
+    def write(self, scored):
+        if self.format == 'parquet':
+            pa = _pyarrow()
+            if isinstance(scored, pd.DataFrame):
+                scored = pa.RecordBatch.from_pandas(scored, preserve_index=False)
+            if self._handle is None:
+                self._handle = pa.parquet.ParquetWriter(self.path, scored.schema)
+            self._handle.write_batch(scored)
+        else:
+            if not isinstance(scored, pd.DataFrame):
+                scored = scored.to_pandas()
+            if self._handle is None:
+                self._handle = open(self.path, 'w', newline='')
+            scored.to_csv(self._handle, header=self.rows == 0, index=False)
+        self.rows += len(scored)
+        self.unscored += count_unscored(scored)
+
+    def close(self):
+        if self._handle is None:
+            # Nothing scored: leave an empty file, merge_parts() skips it
+            open(self.path, 'wb').close()
+        else:
+            self._handle.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# Default shard size for the CLI; shards are the unit of work and of resume
+DEFAULT_SHARD_BYTES = 64 * 1024 * 1024
+
+# Thread pools pinned to one thread inside each worker process, cores are used by processes instead
+THREAD_ENV_VARS = ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS', 'NUMEXPR_NUM_THREADS',
+                   'VECLIB_MAXIMUM_THREADS')
+
+
+def available_cpus():
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+# Columnar files are sharded on whole row groups / record batches, so a file
+# written as a single row group is scored by one worker
+def plan_columnar_shards(path, shard_bytes=DEFAULT_SHARD_BYTES, min_shards=1):
+    names, n_units = columnar_layout(path)
+    n_shards = max(1, min(n_units, max(min_shards, -(-os.path.getsize(path) // shard_bytes))))
+    bounds = np.linspace(0, n_units, n_shards + 1).round().astype(int)
+    return names, [(int(start), int(end)) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+
+# Split a CSV into (start, end) byte ranges of roughly shard_bytes, each starting
+# right after a newline so every shard holds whole rows. Assumes no quoted
+# fields span lines, which holds for the churn export format.
+def plan_shards(path, shard_bytes=DEFAULT_SHARD_BYTES, min_shards=1):
+    size = os.path.getsize(path)
+    with open(path, 'rb') as file:
+        header = file.readline()
+        data_start = file.tell()
+        shard_bytes = max(1, min(shard_bytes, (size - data_start) // max(min_shards, 1) or 1))
+        boundaries = [data_start]
+        position = data_start + shard_bytes
+        while position < size:
+            file.seek(position - 1)
+            file.readline()
+            position = file.tell()
+            if position >= size:
+                break
+            boundaries.append(position)
+            position += shard_bytes
+    boundaries.append(size)
+    shards = [(start, end) for start, end in zip(boundaries, boundaries[1:]) if end > start]
+    return header.decode().rstrip('\r\n').split(','), shards
+
+
+# File-like view of bytes [start, end) of a file, enough for pandas.read_csv
+class RangeReader:
+    def __init__(self, file, start, end):
+        self._file = file
+        self._remaining = end - start
+        file.seek(start)
+
+    def read(self, size=-1):
+        if size is None or size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._file.read(size)
+        self._remaining -= len(data)
+        return data
+
+
+# Per-process model and feature transform, loaded once by the pool initializer
+_worker = {}
+
+
+# Arrow's CPU pool also sizes itself from OMP_NUM_THREADS
+def _init_worker():
+    import artifacts
+
+    artifacts.start_loading()
+    _worker['model'] = artifacts.model()
+    _worker['feature_transform'] = artifacts.feature_transform()
+
+
+# Environment inherited by spawned workers: single-threaded BLAS/OpenMP
+@contextmanager
+def _worker_environment():
+    saved = {name: os.environ.get(name) for name in THREAD_ENV_VARS}
+    os.environ.update({name: '1' for name in THREAD_ENV_VARS})
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def _part_path(work_dir, index, output_format):
+    return os.path.join(work_dir, f'part-{index:05d}.{output_format}')
+
+
+def _read_csv_range(path, columns, start, end, chunk_size):
+    with open(path, 'rb') as source:
+        yield from pd.read_csv(RangeReader(source, start, end), names=columns, header=None, chunksize=chunk_size)
+
+
+# Score one shard into its part file. The .done marker is written after the part
+# is renamed into place, so a shard with a marker is always complete. It also
+# keeps the shard's drift statistics, a resumed run merges them without rescoring.
+def _score_shard(task):
+    path, columns, work_dir, index, start, end, chunk_size, output_format = task
+    part_path = _part_path(work_dir, index, output_format)
+    tmp_path = part_path + '.tmp'
+    model, feature_transform = _worker['model'], _worker['feature_transform']
+    stats = drift.RunningStats(feature_transform.n_features)
+    with ScoreWriter(tmp_path, output_format) as writer:
+        if is_columnar(path):
+            for batch in read_columnar(path, start, end, chunk_size):
+                writer.write(score_batch(batch, model, feature_transform, stats))
+        else:
+            for chunk in _read_csv_range(path, columns, start, end, chunk_size):
+                writer.write(score_frame(chunk, model, feature_transform, stats))
+    os.replace(tmp_path, part_path)
+    with open(part_path + '.done', 'w') as marker:
+        json.dump({'rows': writer.rows, 'unscored': writer.unscored, 'start': start, 'end': end,
+                   'drift': stats.to_dict()}, marker)
+    return index, writer.rows, writer.unscored, stats
+
+
+# Remove only what score_file() creates, work_dir may be a user directory
+def _clear_parts(work_dir):
+    if not os.path.isdir(work_dir):
+        return
+    for name in os.listdir(work_dir):
+        if name == 'plan.json' or (name.startswith('part-') and name.endswith(('.csv', '.parquet', '.done', '.tmp'))):
+            os.remove(os.path.join(work_dir, name))
+
+
+# Identity of an input file (absolute path, size, mtime): a saved shard plan or
+# a cache built from the file is only reused while this is unchanged
+def input_identity(path):
+    stat = os.stat(path)
+    return {'path': os.path.abspath(path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+# Concatenate part files in shard order into one CSV (gzip if the name ends in .gz)
+# or one Parquet file
+def merge_parts(work_dir, n_shards, output, output_format='csv'):
+    if output_format == 'parquet':
+        return _merge_parquet_parts(work_dir, n_shards, output)
+    opener = gzip.open if output.endswith('.gz') else open
+    tmp_output = output + '.tmp'
+    with opener(tmp_output, 'wb') as out:
+        wrote_header = False
+        for index in range(n_shards):
+            with open(_part_path(work_dir, index, output_format), 'rb') as part:
+                header = part.readline()
+                if not header:
+                    continue
+                if not wrote_header:
+                    out.write(header)
+                    wrote_header = True
+                shutil.copyfileobj(part, out, 1024 * 1024)
+    os.replace(tmp_output, output)
+
+
+# Row groups are copied across as they are, nothing is re-encoded as CSV
+def _merge_parquet_parts(work_dir, n_shards, output):
+    pa = _pyarrow()
+    tmp_output = output + '.tmp'
+    writer = None
+    try:
+        for index in range(n_shards):
+            part_path = _part_path(work_dir, index, 'parquet')
+            if os.path.getsize(part_path) == 0:
+                continue
+            part = pa.parquet.ParquetFile(part_path)
+            if writer is None:
+                writer = pa.parquet.ParquetWriter(tmp_output, part.schema_arrow)
+            for group in range(part.num_row_groups):
+                writer.write_table(part.read_row_group(group))
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        pa.parquet.write_table(pa.table({}), tmp_output)
+    os.replace(tmp_output, output)
+
+
+# Score a CSV, Parquet or Arrow file with a pool of worker processes, one shard per task.
+# Finished shards are left in work_dir as part files with .done markers; with
+# resume=True a rerun of the same input skips them, keeping the saved shard layout
+# whatever workers and shard_bytes it is given. partitioned=True keeps the
+# part files as the output instead of merging them into `output`. Scores are
+# written as Parquet when `output` is a .parquet file, or for partitioned output
+# of a columnar input, unless output_format says otherwise. The drift statistics
+# of every shard are merged into monitor when one is given. Returns the number
+# of rows and how many of them could not be scored (empty RiskLevel).
+def score_file(path, output, workers=None, shard_bytes=DEFAULT_SHARD_BYTES, chunk_size=DEFAULT_CHUNK_SIZE,
+               work_dir=None, resume=False, partitioned=False, output_format=None, log=print, monitor=None):
+    workers = workers or available_cpus()
+    work_dir = output if partitioned else (work_dir or output + '.parts')
+    if output_format is None:
+        output_format = 'parquet' if is_parquet(output) or (partitioned and is_columnar(path)) else 'csv'
+    plan_path = os.path.join(work_dir, 'plan.json')
+    identity = input_identity(path)
+
+    # A resumed run keeps the saved shard layout, it may use a different number
+    # of workers (the layout depends on it) than the run that wrote it
+    previous = None
+    if resume and os.path.exists(plan_path):
+        with open(plan_path) as file:
+            previous = json.load(file)
+        if previous['input'] != identity or previous.get('format') != output_format:
+            raise ValueError(f"{work_dir} belongs to a different input or output format, rerun without --resume")
+    planner = plan_columnar_shards if is_columnar(path) else plan_shards
+    if previous is None:
+        columns, shards = planner(path, shard_bytes, min_shards=workers)
+    else:
+        shards = [tuple(shard) for shard in previous['shards']]
+        # Plans written before the column list was kept: only the header is needed
+        columns = previous.get('columns') or planner(path, shard_bytes)[0]
+    check_columns(columns)
+    plan = {'input': identity, 'chunk_size': chunk_size, 'format': output_format, 'columns': columns,
+            'shards': shards}
+    if previous is None:
+        _clear_parts(work_dir)
+    os.makedirs(work_dir, exist_ok=True)
+    with open(plan_path, 'w') as file:
+        json.dump(plan, file)
+
+    done = {index for index in range(len(shards))
+            if os.path.exists(_part_path(work_dir, index, output_format) + '.done')}
+    tasks = [(path, columns, work_dir, index, start, end, chunk_size, output_format)
+             for index, (start, end) in enumerate(shards) if index not in done]
+    log(f"{len(shards)} shards, {len(done)} already done, {len(tasks)} to score on {workers} worker(s)")
+
+    started = time.perf_counter()
+    rows = unscored = 0
+    if tasks:
+        with _worker_environment():
+            pool = multiprocessing.get_context('spawn').Pool(min(workers, len(tasks)), initializer=_init_worker)
+        with pool:
+            for completed, (index, shard_rows, shard_unscored, stats) in enumerate(
+                    pool.imap_unordered(_score_shard, tasks), 1):
+                rows += shard_rows
+                unscored += shard_unscored
+                if monitor is not None:
+                    monitor.merge(stats)
+                elapsed = time.perf_counter() - started
+                log(f"shard {index:5d} done ({completed}/{len(tasks)}), {rows:,} rows, {rows / elapsed:,.0f} rows/s")
+
+    for index in done:
+        with open(_part_path(work_dir, index, output_format) + '.done') as marker:
+            done_shard = json.load(marker)
+        rows += done_shard['rows']
+        unscored += done_shard.get('unscored', 0)
+        if monitor is not None and 'drift' in done_shard:
+            monitor.merge(drift.RunningStats.from_dict(done_shard['drift']))
+
+    if not partitioned:
+        merge_parts(work_dir, len(shards), output, output_format)
+        _clear_parts(work_dir)
+        try:
+            os.rmdir(work_dir)
+        except OSError:
+            pass
+    return rows, unscored
+
+
+# Print the drift of the scored features against the reference data, if there is any
+def report_drift(monitor, reference_path, output=None):
+    import artifacts
+
+    stats = monitor.snapshot()
+    if stats is None or not os.path.exists(reference_path):
+        print(f"Drift not checked: {'nothing scored' if stats is None else f'no reference data at {reference_path}'}")
+        return
+    artifacts.start_loading()
+    feature_transform = artifacts.feature_transform()
+    report = drift.compare(stats, drift.load_reference(feature_transform, reference_path), feature_transform)
+    flagged = drift.alerts(report)
+    if flagged:
+        print(f"Drift against {reference_path}:\n{drift.format_report(flagged)}")
+    else:
+        print(f"No drift against {reference_path} ({stats.rows:,} rows)")
+    if output:
+        with open(output, 'w') as file:
+            json.dump({'rows': stats.rows, 'skipped': stats.skipped, 'features': report}, file, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Score a churn file with a pool of worker processes')
+    parser.add_argument('input', help='CSV, Parquet or Arrow/Feather file with the Churn_Modelling.csv columns')
+    parser.add_argument('--output', required=True,
+                        help='scores as .csv, .csv.gz or .parquet, or a directory with --partitioned')
+    parser.add_argument('--format', choices=('csv', 'parquet'),
+                        help='output format (default: from --output, or the input type when partitioned)')
+    parser.add_argument('--workers', type=int, default=available_cpus())
+    parser.add_argument('--shard-size-mb', type=float, default=DEFAULT_SHARD_BYTES / 1024 / 1024)
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help='rows per chunk inside a worker, bounds memory per process')
+    parser.add_argument('--partitioned', action='store_true',
+                        help='keep one part file per shard instead of merging')
+    parser.add_argument('--work-dir', help='part files for the merge (default: <output>.parts)')
+    parser.add_argument('--resume', action='store_true', help='skip shards finished by an interrupted run')
+    parser.add_argument('--reference', default=drift.DEFAULT_DATA_PATH,
+                        help='training data the scored features are checked for drift against')
+    parser.add_argument('--drift-report', help='write the per-feature drift report as JSON to this file')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    monitor = drift.DriftMonitor()
+    rows, unscored = score_file(args.input, args.output, args.workers, int(args.shard_size_mb * 1024 * 1024),
+                      args.chunk_size, args.work_dir, args.resume, args.partitioned, args.format, monitor=monitor)
+    print(f"Scored {rows:,} rows into {args.output} in {time.perf_counter() - started:.1f}s")
+    if unscored:
+        print(f"Warning: {unscored:,} rows have a missing value or unknown category and were not scored "
+              f"(empty RiskLevel)")
+    report_drift(monitor, args.reference, args.drift_report)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
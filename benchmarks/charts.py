@@ -0,0 +1,138 @@
+"""Chart construction and serialization cost per app.py rerun.
+
+For a sequence of customers from Churn_Modelling.csv, every chart the page
+draws is produced two ways and serialized the way st.plotly_chart does
+(Figure.to_dict() -> plotly.io.to_json):
+
+- rebuild: a new figure from charts.*_figure() on every rerun (the previous
+  behaviour of app.py)
+- template: charts.FigureTemplates, the figure is built once and only the
+  changing data values are patched in
+
+Per rerun totals compare rebuilding every chart of every tab (all tab content
+ran on each rerun before) against patching only the open tab's charts.
+
+Usage: python benchmarks/charts.py [--reruns 200] [--output charts.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import warnings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+warnings.filterwarnings('ignore')
+
+import numpy as np
+import pandas as pd
+import plotly.io as pio
+
+import attribution
+import bundle
+import charts
+import percentile
+import whatif
+
+DATA_PATH = os.path.join(ROOT, 'Churn_Modelling.csv')
+
+# Charts drawn by each tab of app.py (the history trend is left out, it depends on saved predictions)
+TABS = {'prediction': ['gauge', 'distribution'], 'analytics': ['radar', 'factors', 'whatif']}
+
+
+# Positional arguments of every chart for one customer
+def chart_inputs(record, probability, loaded, histogram, rng):
+    factors = {label: value for label, value in zip(attribution.LABELS.values(),
+                                                    rng.normal(0, 5, len(attribution.LABELS)))}
+    return {
+        'gauge': (probability * 100,),
+        'distribution': (*histogram, probability * 100),
+        'radar': (record['CreditScore'], record['Age'], record['Tenure'], record['Balance'],
+                  record['NumOfProducts'], record['EstimatedSalary']),
+        'factors': (factors,),
+        'whatif': (whatif.sensitivity_curves(loaded.model, loaded.feature_transform, record), record),
+    }
+
+
+def serialize(fig):
+    return pio.to_json(fig.to_dict(), validate=False)
+
+
+def summarize(timings):
+    timings = sorted(timings)
+    return {
+        'mean_ms': statistics.fmean(timings) * 1000,
+        'p50_ms': timings[len(timings) // 2] * 1000,
+        'p95_ms': timings[int(len(timings) * 0.95)] * 1000,
+    }
+
+
+# Per chart {build, serialize} timings over all reruns for one way of producing figures
+def run(inputs, produce):
+    timings = {name: {'build': [], 'serialize': []} for name in inputs[0]}
+    for rerun in inputs:
+        for name, args in rerun.items():
+            t = time.perf_counter()
+            fig = produce(name, args)
+            built = time.perf_counter()
+            serialize(fig)
+            timings[name]['build'].append(built - t)
+            timings[name]['serialize'].append(time.perf_counter() - built)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--reruns', type=int, default=200)
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args()
+
+    loaded = bundle.load_bundle(os.path.join(ROOT, bundle.DEFAULT_PATH))
+    histogram = percentile.load_index(loaded, DATA_PATH).histogram()
+    data = pd.read_csv(DATA_PATH, nrows=args.reruns + 1)
+    records = data[list(attribution.LABELS)].to_dict('records')
+    probabilities = loaded.model.predict(loaded.feature_transform.transform(data))[:, 0]
+    rng = np.random.default_rng(0)
+    inputs = [chart_inputs(record, float(p), loaded, histogram, rng) for record, p in zip(records, probabilities)]
+
+    rebuild = {'gauge': charts.gauge_figure, 'distribution': charts.distribution_figure,
+               'radar': charts.radar_figure, 'factors': charts.factor_figure, 'whatif': charts.whatif_figure}
+    templates = charts.FigureTemplates()
+    # The first rerun builds the templates and is reported with the rest
+    results = {
+        'rebuild': run(inputs[1:], lambda name, chart_args: rebuild[name](*chart_args)),
+        'template': run(inputs[1:], lambda name, chart_args: getattr(templates, name)(*chart_args)),
+    }
+
+    print(f"{'chart':<14} {'rebuild build':>14} {'template build':>15} {'serialize':>10}   (mean ms)")
+    for name in inputs[0]:
+        rebuilt, patched = results['rebuild'][name], results['template'][name]
+        print(f"{name:<14} {statistics.fmean(rebuilt['build']) * 1000:>14.2f} "
+              f"{statistics.fmean(patched['build']) * 1000:>15.2f} "
+              f"{statistics.fmean(patched['serialize']) * 1000:>10.2f}")
+
+    # Per rerun: before, every chart of every tab was rebuilt and sent; now only the open tab's, patched
+    def rerun_totals(result, names):
+        return [sum(result[name][part][i] for name in names for part in ('build', 'serialize'))
+                for i in range(len(inputs) - 1)]
+
+    summary = {'before': summarize(rerun_totals(results['rebuild'], [n for tab in TABS.values() for n in tab]))}
+    for tab, names in TABS.items():
+        summary[f'{tab}_tab'] = summarize(rerun_totals(results['template'], names))
+    print(f"\nPer rerun, build + serialize ({args.reruns} reruns):")
+    for name, stats in summary.items():
+        ratio = summary['before']['mean_ms'] / stats['mean_ms']
+        print(f"  {name:<16} mean {stats['mean_ms']:7.2f} ms  p95 {stats['p95_ms']:7.2f} ms  ({ratio:.1f}x)")
+
+    if args.output:
+        per_chart = {way: {name: {part: summarize(values) for part, values in parts.items()}
+                           for name, parts in result.items()} for way, result in results.items()}
+        with open(args.output, 'w') as file:
+            json.dump({'per_chart': per_chart, 'per_rerun': summary}, file, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
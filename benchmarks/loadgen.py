@@ -0,0 +1,119 @@
+"""Closed-loop load generator for server.py.
+
+Each of --concurrency threads keeps one keep-alive connection open and
+sends single-customer /predict requests (rows of Churn_Modelling.csv)
+back to back for --duration seconds. Reports throughput and latency
+percentiles, plus the server's micro-batching statistics.
+
+Usage: python benchmarks/loadgen.py --port 8000 --concurrency 32 --duration 10 [--output load.json]
+"""
+import argparse
+import csv
+import http.client
+import json
+import os
+import statistics
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+NUMERIC_FIELDS = ('CreditScore', 'Age', 'Tenure', 'Balance', 'NumOfProducts',
+                  'HasCrCard', 'IsActiveMember', 'EstimatedSalary', 'CustomerId')
+
+
+def load_payloads(path, limit=1000):
+    payloads = []
+    with open(path, newline='') as file:
+        for row in csv.DictReader(file):
+            customer = {key: row[key] for key in ('Geography', 'Gender')}
+            customer.update({key: float(row[key]) for key in NUMERIC_FIELDS})
+            payloads.append(json.dumps(customer).encode())
+            if len(payloads) == limit:
+                break
+    return payloads
+
+
+def worker(host, port, payloads, offset, stop_at, latencies, errors):
+    connection = http.client.HTTPConnection(host, port)
+    headers = {'Content-Type': 'application/json'}
+    i = offset
+    while time.perf_counter() < stop_at:
+        body = payloads[i % len(payloads)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            connection.request('POST', '/predict', body, headers)
+            response = connection.getresponse()
+            response.read()
+            if response.status != 200:
+                errors.append(response.status)
+                continue
+        except (OSError, http.client.HTTPException) as error:
+            errors.append(repr(error))
+            connection.close()
+            connection = http.client.HTTPConnection(host, port)
+            continue
+        latencies.append(time.perf_counter() - start)
+    connection.close()
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--data', default=os.path.join(ROOT, 'Churn_Modelling.csv'))
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args()
+
+    payloads = load_payloads(args.data)
+    latencies, errors = [], []
+    stop_at = time.perf_counter() + args.duration
+    threads = [
+        threading.Thread(target=worker, args=(args.host, args.port, payloads, i * 31, stop_at, latencies, errors))
+        for i in range(args.concurrency)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    connection = http.client.HTTPConnection(args.host, args.port)
+    connection.request('GET', '/health')
+    batching = json.loads(connection.getresponse().read())['batching']
+    connection.close()
+
+    latencies.sort()
+    results = {
+        'concurrency': args.concurrency,
+        'duration_s': elapsed,
+        'requests': len(latencies),
+        'errors': len(errors),
+        'throughput_rps': len(latencies) / elapsed,
+        'latency_ms': {
+            'mean': statistics.fmean(latencies) * 1000 if latencies else 0.0,
+            'p50': percentile(latencies, 0.50) * 1000,
+            'p95': percentile(latencies, 0.95) * 1000,
+            'p99': percentile(latencies, 0.99) * 1000,
+            'max': latencies[-1] * 1000 if latencies else 0.0,
+        },
+        'server_batching': batching,
+    }
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,178 @@
+"""Availability of server.py while new model artifacts are deployed.
+
+Copies the artifacts into a scratch directory, serves them with server.py and
+keeps --concurrency closed-loop clients sending /predict for one fixed
+customer. Halfway through --duration a new bundle (the served network with
+its output bias shifted, so every score changes) is written the way
+train.py/bundle.py write one, and the service is either
+
+- reload: left running, its watcher loads, validates and swaps the bundle in
+- restart: stopped and started again on the new files (the only way before)
+
+Reports failed requests, the longest stretch without a successful response,
+latency before and after the deploy, and when the new scores first appeared.
+
+Usage: python benchmarks/reload.py [--concurrency 8] [--duration 20] [--modes reload restart] [--output reload.json]
+"""
+import argparse
+import http.client
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import bundle
+from inference import NumpyModel
+
+ARTIFACT_FILES = ('model.h5', 'label_encoder_gender.pkl', 'onehot_encoder_geo.pkl', 'scaler.pkl', 'Churn_Modelling.csv')
+
+CUSTOMER = {'CreditScore': 600, 'Geography': 'Germany', 'Gender': 'Female', 'Age': 45, 'Tenure': 3,
+            'Balance': 120000.0, 'NumOfProducts': 1, 'HasCrCard': 1, 'IsActiveMember': 0,
+            'EstimatedSalary': 90000.0}
+
+
+def prepare(directory):
+    for name in ARTIFACT_FILES:
+        shutil.copy2(os.path.join(ROOT, name), directory)
+    os.makedirs(os.path.join(directory, bundle.DEFAULT_PATH))
+    for name in (bundle.MANIFEST_NAME, bundle.WEIGHTS_NAME):
+        shutil.copy2(os.path.join(ROOT, bundle.DEFAULT_PATH, name), os.path.join(directory, bundle.DEFAULT_PATH))
+
+
+# Write a new version of the bundle in place: same network, output bias + 0.5
+def deploy(directory):
+    path = os.path.join(directory, bundle.DEFAULT_PATH)
+    loaded = bundle.load_bundle(path)
+    *hidden, (kernel, bias, activation) = loaded.model.layers
+    bundle.write_bundle(path, loaded.feature_transform, NumpyModel([*hidden, (kernel, bias + 0.5, activation)]))
+
+
+def start_server(directory, port, reload_interval):
+    command = [sys.executable, os.path.join(ROOT, 'server.py'), '--port', str(port),
+               '--reload-interval', str(reload_interval)]
+    env = {key: value for key, value in os.environ.items() if key != 'CHURN_BUNDLE'}
+    env['TF_CPP_MIN_LOG_LEVEL'] = '3'
+    server = subprocess.Popen(command, cwd=directory, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{port}/health', timeout=1) as response:
+                if response.status == 200:
+                    return server
+        except OSError:
+            time.sleep(0.05)
+    server.kill()
+    raise RuntimeError(f'server.py did not start on port {port}')
+
+
+# One closed-loop client; every outcome is recorded as (start, end, probability or None)
+def client(port, stop_at, outcomes):
+    body = json.dumps(CUSTOMER).encode()
+    headers = {'Content-Type': 'application/json'}
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    while time.perf_counter() < stop_at:
+        start = time.perf_counter()
+        try:
+            connection.request('POST', '/predict', body, headers)
+            response = connection.getresponse()
+            payload = json.loads(response.read())
+            probability = payload['churn_probability'] if response.status == 200 else None
+        except (OSError, http.client.HTTPException, ValueError):
+            probability = None
+            connection.close()
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+            time.sleep(0.01)
+        outcomes.append((start, time.perf_counter(), probability))
+    connection.close()
+
+
+def latency_ms(outcomes):
+    latencies = sorted(end - start for start, end, probability in outcomes if probability is not None)
+    if not latencies:
+        return {'p50': None, 'p99': None, 'max': None}
+    return {'p50': latencies[len(latencies) // 2] * 1000, 'p99': latencies[int(len(latencies) * 0.99)] * 1000,
+            'max': latencies[-1] * 1000}
+
+
+def run(mode, port, concurrency, duration, reload_interval):
+    with tempfile.TemporaryDirectory(prefix='churn-reload-') as directory:
+        prepare(directory)
+        server = start_server(directory, port, reload_interval)
+        try:
+            outcomes = []
+            stop_at = time.perf_counter() + duration
+            clients = [threading.Thread(target=client, args=(port, stop_at, outcomes)) for _ in range(concurrency)]
+            for thread in clients:
+                thread.start()
+            time.sleep(duration / 2)
+            deployed_at = time.perf_counter()
+            deploy(directory)
+            if mode == 'restart':
+                server.terminate()
+                server.wait()
+                server = start_server(directory, port, reload_interval)
+            for thread in clients:
+                thread.join()
+        finally:
+            server.terminate()
+            server.wait()
+
+    outcomes.sort(key=lambda outcome: outcome[1])
+    before = [outcome for outcome in outcomes if outcome[0] < deployed_at]
+    old_score = next(probability for _, _, probability in before if probability is not None)
+    new = [end for _, end, probability in outcomes if probability is not None and probability != old_score]
+    successes = [end for _, end, probability in outcomes if probability is not None]
+    return {
+        'requests': len(outcomes),
+        'failed': sum(probability is None for _, _, probability in outcomes),
+        'longest_gap_ms': max(b - a for a, b in zip(successes, successes[1:])) * 1000,
+        'new_scores_after_s': new[0] - deployed_at if new else None,
+        # Requests that started after the first new score and still got the old one
+        'stale_after_switch': sum(1 for start, _, probability in outcomes
+                                  if new and start > new[0] and probability == old_score),
+        'latency_before_ms': latency_ms(before),
+        'latency_after_ms': latency_ms([outcome for outcome in outcomes if outcome[0] >= deployed_at]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=20.0)
+    parser.add_argument('--modes', nargs='+', choices=('reload', 'restart'), default=['reload', 'restart'])
+    parser.add_argument('--reload-interval', type=float, default=0.5)
+    parser.add_argument('--port', type=int, default=8611)
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args()
+
+    with socket.socket() as probe:
+        if probe.connect_ex(('127.0.0.1', args.port)) == 0:
+            parser.error(f'port {args.port} is already in use')
+
+    results = {}
+    print(f"{'mode':<8} {'requests':>9} {'failed':>7} {'longest gap':>12} {'new after':>10} {'stale':>6} "
+          f"{'p99 before':>11} {'p99 after':>10} {'max after':>10}")
+    for mode in args.modes:
+        result = results[mode] = run(mode, args.port, args.concurrency, args.duration, args.reload_interval)
+        new_after = result['new_scores_after_s']
+        print(f"{mode:<8} {result['requests']:>9,} {result['failed']:>7,} {result['longest_gap_ms']:>9.1f} ms "
+              f"{'never' if new_after is None else f'{new_after:.2f} s':>10} {result['stale_after_switch']:>6} "
+              f"{result['latency_before_ms']['p99']:>8.1f} ms {result['latency_after_ms']['p99']:>7.1f} ms "
+              f"{result['latency_after_ms']['max']:>7.1f} ms")
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
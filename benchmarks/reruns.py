@@ -0,0 +1,174 @@
+"""Rerun latency of app.py when a widget changes, measured against a live server.
+
+Starts `streamlit run app.py` headless, connects over the same websocket
+protocol the browser uses and moves the Age slider --runs times. Each move
+is sent twice:
+
+- full: as a whole-page rerun (how every widget change was handled before
+  the page was split into fragments)
+- widget: the way the browser sends it, scoped to the fragment that owns the
+  slider, if any
+
+and reports, per rerun, the script execution time measured by the server
+(from the page profile message Streamlit sends when usage stats are on; it
+only goes to this client), the round trip until the run finished message
+arrives, and the number of element deltas and bytes sent back.
+
+Usage: python benchmarks/reruns.py [--runs 30] [--port 8599] [--app app.py] [--output reruns.json]
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+AGE_LABEL = '🎂 Age (years)'
+
+
+def start_server(app, port):
+    command = [sys.executable, '-m', 'streamlit', 'run', app, '--server.headless', 'true',
+               '--server.port', str(port), '--server.fileWatcherType', 'none',
+               '--browser.gatherUsageStats', 'true']
+    env = dict(os.environ, TF_CPP_MIN_LOG_LEVEL='3')
+    server = subprocess.Popen(command, cwd=os.path.dirname(os.path.abspath(app)), env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{port}/_stcore/health', timeout=1) as response:
+                if response.status == 200:
+                    return server
+        except OSError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError(f'streamlit did not start on port {port}')
+
+
+class Session:
+    def __init__(self, connection):
+        self.connection = connection
+        self.elements = []
+
+    # Send one rerun request and read until the run finishes.
+    # Returns (round trip seconds, server execution seconds, deltas, bytes)
+    def rerun(self, widgets=(), fragment_id=''):
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        message = BackMsg()
+        message.rerun_script.query_string = ''
+        message.rerun_script.fragment_id = fragment_id
+        for widget_id, value in widgets:
+            state = message.rerun_script.widget_states.widgets.add()
+            state.id = widget_id
+            state.double_array_value.data.extend([value])
+
+        self.elements = []
+        deltas = received = 0
+        exec_seconds = None
+        start = time.perf_counter()
+        self.connection.send(message.SerializeToString())
+        while True:
+            data = self.connection.recv()
+            received += len(data)
+            forward = ForwardMsg()
+            forward.ParseFromString(data)
+            kind = forward.WhichOneof('type')
+            if kind == 'delta':
+                deltas += 1
+                if forward.delta.WhichOneof('type') == 'new_element':
+                    self.elements.append((forward.delta.new_element, forward.delta.fragment_id))
+            elif kind == 'page_profile':
+                exec_seconds = forward.page_profile.exec_time / 1e6
+            elif kind == 'script_finished':
+                return time.perf_counter() - start, exec_seconds, deltas, received
+
+    def find_slider(self, label):
+        for element, fragment_id in self.elements:
+            if element.WhichOneof('type') == 'slider' and element.slider.label == label:
+                return element.slider.id, fragment_id
+        raise RuntimeError(f'slider {label!r} not found')
+
+
+# Move the Age slider `runs` times, once as a whole-page rerun and once scoped like the browser would
+def measure(session, runs):
+    session.rerun()
+    slider_id, fragment_id = session.find_slider(AGE_LABEL)
+    # Warm-up: model, caches and chart templates
+    for age in (30, 60, 45):
+        session.rerun([(slider_id, age)])
+
+    results = {'full': [], 'widget': []}
+    for i in range(runs):
+        age = 18 + (i * 7) % 75
+        results['full'].append(session.rerun([(slider_id, age)]))
+        results['widget'].append(session.rerun([(slider_id, age + 1)], fragment_id))
+    return results, fragment_id
+
+
+def latency(seconds):
+    seconds = sorted(seconds)
+    return {
+        'mean_ms': statistics.fmean(seconds) * 1000,
+        'p50_ms': seconds[len(seconds) // 2] * 1000,
+        'p95_ms': seconds[int(len(seconds) * 0.95)] * 1000,
+    }
+
+
+def summarize(runs):
+    return {
+        'runs': len(runs),
+        'execution': latency(run[1] for run in runs),
+        'round_trip': latency(run[0] for run in runs),
+        'deltas': statistics.fmean(run[2] for run in runs),
+        'kbytes': statistics.fmean(run[3] for run in runs) / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=30)
+    parser.add_argument('--port', type=int, default=8599)
+    parser.add_argument('--app', default=os.path.join(ROOT, 'app.py'))
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args()
+
+    with socket.socket() as probe:
+        if probe.connect_ex(('127.0.0.1', args.port)) == 0:
+            parser.error(f'port {args.port} is already in use')
+
+    from websockets.sync.client import connect
+
+    server = start_server(args.app, args.port)
+    try:
+        with connect(f'ws://127.0.0.1:{args.port}/_stcore/stream', subprotocols=['streamlit'],
+                     max_size=None) as connection:
+            results, fragment_id = measure(Session(connection), args.runs)
+    finally:
+        server.terminate()
+        server.wait()
+
+    summary = {name: summarize(runs) for name, runs in results.items()}
+    summary['slider_fragment'] = fragment_id or None
+    print(f"Age slider {'in fragment ' + fragment_id if fragment_id else 'not in a fragment'}")
+    print(f"  {'':<7} {'execution p50/p95':>20} {'round trip p50/p95':>20} {'deltas':>7} {'KiB':>7}")
+    for name in ('full', 'widget'):
+        stats = summary[name]
+        execution, round_trip = stats['execution'], stats['round_trip']
+        print(f"  {name:<7} {execution['p50_ms']:9.1f} /{execution['p95_ms']:6.1f} ms "
+              f"{round_trip['p50_ms']:9.1f} /{round_trip['p95_ms']:6.1f} ms "
+              f"{stats['deltas']:7.0f} {stats['kbytes']:7.1f}")
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(summary, file, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""Cold-start benchmark for app.py.
+
+Every run starts a fresh Python process, executes app.py once through
+Streamlit's AppTest harness and reports, relative to process start:
+
+- time_to_first_render: the header has been emitted
+- time_to_first_prediction: the first churn score has been computed
+- time_to_script_end: the whole page has been produced
+
+Usage: python benchmarks/startup.py [--runs 5] [--backends numpy keras] [--output startup.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = """
+import time
+t0 = time.perf_counter()
+import json, sys
+sys.path.insert(0, {root!r})
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({app!r}, default_timeout=300).run()
+end = time.perf_counter()
+import perf
+if at.exception:
+    raise SystemExit(f"app.py raised: {{at.exception}}")
+print(json.dumps({{
+    'time_to_first_render': perf.marks['first_render'] - t0,
+    'time_to_first_prediction': perf.marks['first_prediction'] - t0,
+    'time_to_script_end': end - t0,
+    'tensorflow_loaded': 'tensorflow' in sys.modules,
+}}))
+"""
+
+
+def run_once(backend):
+    env = dict(os.environ, CHURN_BACKEND=backend, TF_CPP_MIN_LOG_LEVEL='3')
+    code = CHILD.format(root=ROOT, app=os.path.join(ROOT, 'app.py'))
+    result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def summarize(samples):
+    summary = {}
+    for key in ('time_to_first_render', 'time_to_first_prediction', 'time_to_script_end'):
+        values = [sample[key] for sample in samples]
+        summary[key] = {'median': statistics.median(values), 'min': min(values), 'max': max(values)}
+    summary['tensorflow_loaded'] = any(sample['tensorflow_loaded'] for sample in samples)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--backends', nargs='+', default=['numpy', 'keras'])
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args()
+
+    results = {'runs': args.runs, 'backends': {}}
+    for backend in args.backends:
+        samples = [run_once(backend) for _ in range(args.runs)]
+        results['backends'][backend] = summarize(samples)
+        summary = results['backends'][backend]
+        print(f"{backend:>6}: first render {summary['time_to_first_render']['median']:.3f}s, "
+              f"first prediction {summary['time_to_first_prediction']['median']:.3f}s, "
+              f"script end {summary['time_to_script_end']['median']:.3f}s "
+              f"(TensorFlow loaded: {summary['tensorflow_loaded']})")
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
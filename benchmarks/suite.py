@@ -0,0 +1,221 @@
+"""Benchmark suite for preprocessing, inference and page reruns.
+
+Measures, using Churn_Modelling.csv:
+
+- single_row: latency of scoring one customer, for the original app.py path
+  (DataFrame build -> encoders -> scaler.transform -> model.predict) and
+  for the current path (FeatureTransform.transform_record -> NumpyModel)
+- batch: rows/second for both paths at several batch sizes
+- rerun: full app.py rerun time through Streamlit's AppTest harness, with
+  and without st.plotly_chart (figure construction still runs, only the
+  chart serialization is skipped)
+
+Results are written as JSON so runs can be compared between commits:
+
+    python benchmarks/suite.py --output before.json
+    python benchmarks/suite.py --output after.json --compare before.json
+"""
+import argparse
+import contextlib
+import json
+import os
+import pickle
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import warnings
+from datetime import datetime
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '3')
+warnings.filterwarnings('ignore')
+
+import pandas as pd
+
+import inference
+from features import FeatureTransform
+
+DATA_PATH = os.path.join(ROOT, 'Churn_Modelling.csv')
+BATCH_SIZES = (1, 32, 256, 4096, 10000)
+
+
+# Call fn repeatedly and return per-call latency statistics in milliseconds
+def time_calls(fn, min_calls=20, min_seconds=0.5):
+    fn()  # warm-up
+    timings = []
+    start = time.perf_counter()
+    while len(timings) < min_calls or time.perf_counter() - start < min_seconds:
+        t = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - t)
+    timings.sort()
+    return {
+        'calls': len(timings),
+        'mean_ms': statistics.fmean(timings) * 1000,
+        'p50_ms': timings[len(timings) // 2] * 1000,
+        'p95_ms': timings[int(len(timings) * 0.95)] * 1000,
+    }
+
+
+def load_encoders():
+    encoders = []
+    for name in ('label_encoder_gender.pkl', 'onehot_encoder_geo.pkl', 'scaler.pkl'):
+        with open(os.path.join(ROOT, name), 'rb') as file:
+            encoders.append(pickle.load(file))
+    return encoders
+
+
+# The single-customer path as app.py originally implemented it
+def legacy_single(record, model, label_encoder_gender, onehot_encoder_geo, scaler):
+    input_data = pd.DataFrame({
+        'CreditScore': [record['CreditScore']],
+        'Gender': [label_encoder_gender.transform([record['Gender']])[0]],
+        'Age': [record['Age']],
+        'Tenure': [record['Tenure']],
+        'Balance': [record['Balance']],
+        'NumOfProducts': [record['NumOfProducts']],
+        'HasCrCard': [record['HasCrCard']],
+        'IsActiveMember': [record['IsActiveMember']],
+        'EstimatedSalary': [record['EstimatedSalary']]
+    })
+    geo_encoded = onehot_encoder_geo.transform([[record['Geography']]]).toarray()
+    geo_encoded_df = pd.DataFrame(geo_encoded, columns=onehot_encoder_geo.get_feature_names_out(['Geography']))
+    input_data = pd.concat([input_data.reset_index(drop=True), geo_encoded_df], axis=1)
+    return model.predict(scaler.transform(input_data), verbose=0)
+
+
+# The same steps applied to a whole DataFrame
+def legacy_batch(df, model, label_encoder_gender, onehot_encoder_geo, scaler):
+    input_data = df.drop(['RowNumber', 'CustomerId', 'Surname', 'Exited'], axis=1)
+    input_data['Gender'] = label_encoder_gender.transform(input_data['Gender'])
+    geo_encoded = onehot_encoder_geo.transform(input_data[['Geography']]).toarray()
+    geo_encoded_df = pd.DataFrame(geo_encoded, columns=onehot_encoder_geo.get_feature_names_out(['Geography']),
+                                  index=input_data.index)
+    input_data = pd.concat([input_data.drop('Geography', axis=1), geo_encoded_df], axis=1)
+    return model.predict(scaler.transform(input_data), batch_size=len(input_data), verbose=0)
+
+
+def bench_inference(data, include_keras):
+    encoders = load_encoders()
+    feature_transform = FeatureTransform.from_encoders(*encoders)
+    numpy_model = inference.load_model(os.path.join(ROOT, 'model.h5'), 'numpy')
+    models = {'numpy': numpy_model}
+    if include_keras:
+        models['keras'] = inference.load_model(os.path.join(ROOT, 'model.h5'), 'keras')
+
+    record = data.iloc[0].to_dict()
+    single_row = {
+        'current_numpy': time_calls(
+            lambda: numpy_model.predict(feature_transform.transform_record(record))),
+        'transform_record': time_calls(lambda: feature_transform.transform_record(record)),
+    }
+    for backend, model in models.items():
+        single_row[f'legacy_{backend}'] = time_calls(lambda: legacy_single(record, model, *encoders))
+        if backend == 'keras':
+            single_row['current_keras'] = time_calls(
+                lambda: model.predict(feature_transform.transform_record(record), verbose=0))
+
+    batch = {}
+    for size in BATCH_SIZES:
+        chunk = data.iloc[:size]
+        results = {
+            'current_numpy': time_calls(
+                lambda: numpy_model.predict(feature_transform.transform(chunk)), min_calls=5),
+        }
+        for backend, model in models.items():
+            results[f'legacy_{backend}'] = time_calls(lambda: legacy_batch(chunk, model, *encoders), min_calls=5)
+        for result in results.values():
+            result['rows_per_s'] = size / (result['mean_ms'] / 1000)
+        batch[str(size)] = results
+    return single_row, batch
+
+
+# Rerun app.py through AppTest, changing the Age slider every run so each
+# rerun scores a new customer
+def bench_rerun(runs, charts):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.join(ROOT, 'app.py'), default_timeout=300)
+    patch = contextlib.nullcontext() if charts else mock.patch('streamlit.plotly_chart')
+    with patch:
+        at.run()
+        timings = []
+        for i in range(runs):
+            at.slider[0].set_value(18 + i % 75)
+            t = time.perf_counter()
+            at.run()
+            timings.append(time.perf_counter() - t)
+        if at.exception:
+            raise RuntimeError(f"app.py raised: {at.exception}")
+    timings.sort()
+    return {
+        'runs': runs,
+        'mean_ms': statistics.fmean(timings) * 1000,
+        'p50_ms': timings[len(timings) // 2] * 1000,
+        'p95_ms': timings[int(len(timings) * 0.95)] * 1000,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# Print the ratio new/old for every numeric leaf present in both result sets
+def compare(old, new, path=''):
+    for key, value in new.items():
+        if key not in old:
+            continue
+        name = f'{path}.{key}' if path else key
+        if isinstance(value, dict):
+            compare(old[key], value, name)
+        elif isinstance(value, float) and old[key]:
+            print(f'{name:<55} {old[key]:>12.3f} -> {value:>12.3f}  ({value / old[key]:.2f}x)')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--output', help='write results as JSON to this file')
+    parser.add_argument('--compare', help='JSON results of an earlier run to compare against')
+    parser.add_argument('--rerun-runs', type=int, default=20)
+    parser.add_argument('--skip-keras', action='store_true', help='skip the TensorFlow backend')
+    parser.add_argument('--skip-rerun', action='store_true', help='skip the AppTest rerun benchmark')
+    args = parser.parse_args()
+
+    data = pd.read_csv(DATA_PATH)
+    single_row, batch = bench_inference(data, include_keras=not args.skip_keras)
+    results = {
+        'meta': {
+            'revision': git_revision(),
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'cpu_count': os.cpu_count(),
+        },
+        'single_row': single_row,
+        'batch': batch,
+    }
+    if not args.skip_rerun:
+        results['rerun'] = {
+            'with_charts': bench_rerun(args.rerun_runs, charts=True),
+            'without_charts': bench_rerun(args.rerun_runs, charts=False),
+        }
+
+    print(json.dumps(results, indent=2))
+    if args.compare:
+        with open(args.compare) as file:
+            compare(json.load(file), results)
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
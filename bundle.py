@@ -0,0 +1,195 @@
+"""Versioned model bundle: one directory holding everything needed to score.
+
+    model_bundle/
+        manifest.json   category tables, scaler mean/scale, layer layout, content hash
+        weights.bin     raw little-endian float32 kernels and biases, memory-mapped on load
+
+The content hash covers the manifest and the weight bytes, so a bundle whose
+files do not belong together fails to load instead of scoring silently wrong.
+
+Usage:
+    python bundle.py export [--output model_bundle]   # from model.h5 + the three pickles
+    python bundle.py check [--data Churn_Modelling.csv]
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+from features import FeatureTransform
+from inference import NumpyModel
+
+FORMAT_VERSION = 1
+DEFAULT_PATH = os.environ.get('CHURN_BUNDLE', 'model_bundle')
+MANIFEST_NAME = 'manifest.json'
+WEIGHTS_NAME = 'weights.bin'
+WEIGHTS_DTYPE = '<f4'
+
+# Every array starts on a cache-line boundary inside weights.bin
+ALIGNMENT = 64
+
+
+class Bundle:
+    def __init__(self, path, manifest, feature_transform, model):
+        self.path = path
+        self.manifest = manifest
+        self.feature_transform = feature_transform
+        self.model = model
+
+    @property
+    def content_hash(self):
+        return self.manifest['content_hash']
+
+
+def _json_bytes(manifest):
+    return json.dumps(manifest, sort_keys=True, separators=(',', ':')).encode()
+
+
+# sha256 over the manifest (minus the hash itself) followed by the weight bytes
+def content_hash(manifest, weights):
+    digest = hashlib.sha256()
+    digest.update(_json_bytes({key: value for key, value in manifest.items() if key != 'content_hash'}))
+    digest.update(memoryview(weights).cast('B'))
+    return digest.hexdigest()
+
+
+def _write_file(path, data):
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.tmp-', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            file.write(data)
+        # mkstemp creates 0600 files, bundles are meant to be read by other processes
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+# Write a FeatureTransform and NumpyModel as a bundle directory, returns the manifest.
+# weights.bin is replaced before manifest.json, and the hash check on load rejects
+# any reader that catches the two halves from different exports.
+def write_bundle(path, feature_transform, model):
+    chunks = []
+    layers = []
+    offset = 0
+
+    def place(array):
+        nonlocal offset
+        array = np.ascontiguousarray(array, dtype=WEIGHTS_DTYPE)
+        padding = -offset % ALIGNMENT
+        if padding:
+            chunks.append(bytes(padding))
+            offset += padding
+        chunks.append(array.tobytes())
+        entry = {'offset': offset, 'shape': list(array.shape)}
+        offset += array.nbytes
+        return entry
+
+    for kernel, bias, activation in model.layers:
+        layers.append({'activation': activation, 'kernel': place(kernel), 'bias': place(bias)})
+    weights = b''.join(chunks)
+
+    manifest = {
+        'format_version': FORMAT_VERSION,
+        'feature_names': feature_transform.feature_names,
+        'gender_classes': feature_transform.gender_classes,
+        'geo_categories': feature_transform.geo_categories,
+        'scaler': {
+            'mean': feature_transform.mean.tolist(),
+            'scale': feature_transform.scale.tolist(),
+        },
+        'layers': layers,
+        'weights': {'file': WEIGHTS_NAME, 'dtype': WEIGHTS_DTYPE, 'nbytes': len(weights)},
+    }
+    manifest['content_hash'] = content_hash(manifest, weights)
+
+    os.makedirs(path, exist_ok=True)
+    _write_file(os.path.join(path, WEIGHTS_NAME), weights)
+    _write_file(os.path.join(path, MANIFEST_NAME), json.dumps(manifest, indent=2).encode() + b'\n')
+    return manifest
+
+
+# Convert the legacy model.h5 + pickles into a bundle
+def export_bundle(path=DEFAULT_PATH, model_path='model.h5', gender_path='label_encoder_gender.pkl',
+                  geo_path='onehot_encoder_geo.pkl', scaler_path='scaler.pkl'):
+    feature_transform = FeatureTransform.from_pickles(gender_path, geo_path, scaler_path)
+    return write_bundle(path, feature_transform, NumpyModel.from_h5(model_path))
+
+
+# Load a bundle. The weights stay memory-mapped read-only, so every process
+# scoring from the same bundle shares one copy of the pages.
+def load_bundle(path=DEFAULT_PATH, verify=True):
+    with open(os.path.join(path, MANIFEST_NAME), 'rb') as file:
+        manifest = json.load(file)
+    if manifest.get('format_version') != FORMAT_VERSION:
+        raise ValueError(f"Unsupported bundle format version: {manifest.get('format_version')!r}")
+
+    spec = manifest['weights']
+    weights = np.memmap(os.path.join(path, spec['file']), dtype=np.uint8, mode='r')
+    if len(weights) != spec['nbytes']:
+        raise ValueError(f"{spec['file']} is {len(weights)} bytes, manifest expects {spec['nbytes']}")
+    if verify and content_hash(manifest, weights) != manifest['content_hash']:
+        raise ValueError(f"Content hash mismatch in bundle {path}")
+
+    def view(entry):
+        shape = tuple(entry['shape'])
+        count = int(np.prod(shape))
+        return np.frombuffer(weights, dtype=spec['dtype'], count=count, offset=entry['offset']).reshape(shape)
+
+    model = NumpyModel([(view(layer['kernel']), view(layer['bias']), layer['activation'])
+                        for layer in manifest['layers']])
+    feature_transform = FeatureTransform(manifest['feature_names'], manifest['gender_classes'],
+                                         manifest['geo_categories'], manifest['scaler']['mean'],
+                                         manifest['scaler']['scale'])
+    return Bundle(path, manifest, feature_transform, model)
+
+
+# Score a dataset through the bundle and through the legacy files, report the max difference
+def check_bundle(path=DEFAULT_PATH, data_path='Churn_Modelling.csv', atol=1e-6):
+    import time
+    import pandas as pd
+
+    start = time.perf_counter()
+    bundle = load_bundle(path)
+    load_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    legacy_transform = FeatureTransform.from_pickles()
+    legacy_model = NumpyModel.from_h5('model.h5')
+    legacy_ms = (time.perf_counter() - start) * 1000
+
+    data = pd.read_csv(data_path)
+    expected = legacy_model.predict(legacy_transform.transform(data))
+    actual = bundle.model.predict(bundle.feature_transform.transform(data))
+    diff = float(np.max(np.abs(expected - actual)))
+    print(f"Bundle {path} ({bundle.content_hash[:12]})")
+    print(f"Load time: bundle {load_ms:.2f} ms, pickles + model.h5 {legacy_ms:.2f} ms")
+    print(f"Max |legacy - bundle| over {len(data):,} rows: {diff:.3e}")
+    return diff <= atol
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    export_parser = subparsers.add_parser('export', help='build a bundle from model.h5 and the pickles')
+    export_parser.add_argument('--output', default=DEFAULT_PATH)
+    check_parser = subparsers.add_parser('check', help='compare a bundle against model.h5 and the pickles')
+    check_parser.add_argument('--bundle', default=DEFAULT_PATH)
+    check_parser.add_argument('--data', default='Churn_Modelling.csv')
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        manifest = export_bundle(args.output)
+        print(f"Wrote {args.output} ({manifest['content_hash'][:12]}, {manifest['weights']['nbytes']:,} weight bytes)")
+        return 0
+    return 0 if check_bundle(args.bundle, args.data) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,338 @@
+from datetime import datetime
+
+import numpy as np
+import plotly.graph_objects as go
+
+import trend
+import whatif
+
+# Risk level colors used by the gauge and the factor chart
+HIGH_COLOR = '#ff6b6b'
+MEDIUM_COLOR = '#ffc107'
+LOW_COLOR = '#51cf66'
+
+RADAR_CATEGORIES = ['Credit Score', 'Age', 'Tenure', 'Balance', 'Products', 'Salary']
+
+
+def risk_color(value):
+    if value > 70:
+        return HIGH_COLOR
+    if value > 40:
+        return MEDIUM_COLOR
+    return LOW_COLOR
+
+
+# Create gauge chart
+def gauge_figure(value):
+    color = risk_color(value)
+    fig = go.Figure(go.Indicator(
+        mode="gauge+number",
+        value=value,
+        domain={'x': [0, 1], 'y': [0, 1]},
+        number={'suffix': "%", 'font': {'size': 40, 'color': 'white'}},
+        gauge={
+            'axis': {'range': [0, 100], 'tickwidth': 1, 'tickcolor': "rgba(255,255,255,0.3)"},
+            'bar': {'color': color, 'thickness': 0.3},
+            'bgcolor': "rgba(255,255,255,0.1)",
+            'borderwidth': 0,
+            'steps': [
+                {'range': [0, 40], 'color': 'rgba(81, 207, 102, 0.2)'},
+                {'range': [40, 70], 'color': 'rgba(255, 193, 7, 0.2)'},
+                {'range': [70, 100], 'color': 'rgba(255, 107, 107, 0.2)'}
+            ],
+            'threshold': {
+                'line': {'color': color, 'width': 4},
+                'thickness': 0.75,
+                'value': value
+            }
+        }
+    ))
+
+    fig.update_layout(
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        font={'color': 'white'},
+        height=280,
+        margin=dict(l=20, r=20, t=40, b=20)
+    )
+    return fig
+
+
+# Customer profile normalized to a 0-100 scale per axis, closed for the radar outline
+def radar_values(credit_score, age, tenure, balance, num_products, estimated_salary):
+    values = [
+        (credit_score - 300) / 550 * 100,  # Credit score: 300-850
+        age / 92 * 100,  # Age: 0-92
+        tenure / 10 * 100,  # Tenure: 0-10
+        min(balance / 250000 * 100, 100),  # Balance: 0-250000
+        num_products / 4 * 100,  # Products: 1-4
+        min(estimated_salary / 200000 * 100, 100)  # Salary: 0-200000
+    ]
+    return values + [values[0]]
+
+
+# Create radar chart for customer profile
+def radar_figure(credit_score, age, tenure, balance, num_products, estimated_salary):
+    fig = go.Figure()
+
+    fig.add_trace(go.Scatterpolar(
+        r=radar_values(credit_score, age, tenure, balance, num_products, estimated_salary),
+        theta=RADAR_CATEGORIES + [RADAR_CATEGORIES[0]],
+        fill='toself',
+        fillcolor='rgba(102, 126, 234, 0.3)',
+        line=dict(color='#667eea', width=2),
+        name='Customer Profile'
+    ))
+
+    fig.update_layout(
+        polar=dict(
+            radialaxis=dict(
+                visible=True,
+                range=[0, 100],
+                gridcolor='rgba(255,255,255,0.1)',
+                tickfont=dict(color='rgba(255,255,255,0.5)')
+            ),
+            angularaxis=dict(
+                gridcolor='rgba(255,255,255,0.1)',
+                tickfont=dict(color='rgba(255,255,255,0.8)')
+            ),
+            bgcolor='rgba(0,0,0,0)'
+        ),
+        showlegend=False,
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        height=300,
+        margin=dict(l=60, r=60, t=40, b=40)
+    )
+    return fig
+
+
+# Factor names, values and bar colors, largest impact last (drawn on top)
+def factor_bars(factors):
+    factors = sorted(factors.items(), key=lambda item: abs(item[1]))
+    return ([value for _, value in factors], [name for name, _ in factors],
+            [HIGH_COLOR if value > 0 else LOW_COLOR for _, value in factors])
+
+
+# Create factor impact chart, largest impact on top
+def factor_figure(factors):
+    x, y, colors = factor_bars(factors)
+
+    fig = go.Figure(go.Bar(
+        x=x,
+        y=y,
+        orientation='h',
+        marker=dict(
+            color=colors,
+            line=dict(width=0)
+        )
+    ))
+
+    fig.update_layout(
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white'),
+        height=300,
+        margin=dict(l=10, r=10, t=20, b=20),
+        xaxis=dict(
+            gridcolor='rgba(255,255,255,0.1)',
+            zerolinecolor='rgba(255,255,255,0.3)',
+            title='Impact on churn risk, percentage points (negative = lower risk)'
+        ),
+        yaxis=dict(
+            gridcolor='rgba(255,255,255,0.1)'
+        )
+    )
+    return fig
+
+
+# Create reference score distribution with the current customer marked
+def distribution_figure(edges, counts, value):
+    centers = (edges[:-1] + edges[1:]) / 2 * 100
+    share = counts / max(counts.sum(), 1) * 100
+    colors = ['#ff6b6b' if c > 70 else '#ffd43b' if c > 40 else '#51cf66' for c in centers]
+
+    fig = go.Figure(go.Bar(
+        x=centers, y=share, width=(edges[1] - edges[0]) * 100,
+        marker=dict(color=colors, opacity=0.55, line=dict(width=0)),
+        hovertemplate='%{x:.0f}%: %{y:.1f}% of customers<extra></extra>'
+    ))
+    fig.add_vline(x=value, line=dict(color='white', width=2, dash='dash'))
+
+    fig.update_layout(
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white', size=11),
+        height=160,
+        margin=dict(l=10, r=10, t=10, b=30),
+        bargap=0,
+        xaxis=dict(range=[0, 100], ticksuffix='%', gridcolor='rgba(255,255,255,0.1)'),
+        yaxis=dict(visible=False)
+    )
+    return fig
+
+
+# Create what-if sensitivity curves, one small chart per input, current value marked
+def whatif_figure(curves, record):
+    from plotly.subplots import make_subplots
+
+    fields = list(curves)
+    n_cols = 3
+    n_rows = (len(fields) + n_cols - 1) // n_cols
+    fig = make_subplots(rows=n_rows, cols=n_cols, subplot_titles=[whatif.LABELS[f] for f in fields],
+                        vertical_spacing=0.18, horizontal_spacing=0.06)
+    for i, field in enumerate(fields):
+        grid, probabilities = curves[field]
+        row, col = i // n_cols + 1, i % n_cols + 1
+        fig.add_trace(go.Scatter(
+            x=grid, y=probabilities * 100, mode='lines',
+            line=dict(color='#667eea', width=2.5),
+            hovertemplate='%{x:,.0f}: %{y:.1f}%<extra></extra>'
+        ), row=row, col=col)
+        current = record[field]
+        fig.add_trace(go.Scatter(
+            x=[current], y=[np.interp(current, grid, probabilities) * 100], mode='markers',
+            marker=dict(color='#f093fb', size=10, line=dict(color='white', width=1.5)),
+            hovertemplate='Current: %{x:,.0f} → %{y:.1f}%<extra></extra>'
+        ), row=row, col=col)
+    # Risk level thresholds used by the prediction tab
+    for threshold, color in ((40, 'rgba(255,212,59,0.5)'), (70, 'rgba(255,107,107,0.5)')):
+        fig.add_hline(y=threshold, line=dict(color=color, width=1, dash='dot'))
+
+    fig.update_layout(
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white', size=11),
+        height=220 * n_rows,
+        margin=dict(l=10, r=10, t=30, b=10),
+        showlegend=False
+    )
+    fig.update_xaxes(gridcolor='rgba(255,255,255,0.1)')
+    fig.update_yaxes(gridcolor='rgba(255,255,255,0.1)', range=[0, 100], ticksuffix='%')
+    fig.update_annotations(font=dict(size=12, color='rgba(255,255,255,0.8)'))
+    return fig
+
+
+# Downsampled trend line as (datetimes, values, mode)
+def trend_line(times, values):
+    x, y = trend.downsample(times, values)
+    return [datetime.fromtimestamp(t) for t in x], y, 'lines+markers' if len(x) <= 100 else 'lines'
+
+
+# Create risk trend chart, each line downsampled to at most trend.MAX_POINTS points
+def trend_figure(times, risks, max_risks=None):
+    fig = go.Figure()
+
+    x, y, mode = trend_line(times, risks)
+    fig.add_trace(go.Scatter(
+        x=x,
+        y=y,
+        mode=mode,
+        line=dict(color='#667eea', width=2),
+        name='Risk' if max_risks is None else 'Mean Risk'
+    ))
+
+    if max_risks is not None:
+        x, y, _ = trend_line(times, max_risks)
+        fig.add_trace(go.Scatter(
+            x=x,
+            y=y,
+            mode='lines',
+            line=dict(color='#ff6b6b', width=1, dash='dot'),
+            name='Max Risk'
+        ))
+
+    fig.update_layout(
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white'),
+        showlegend=max_risks is not None,
+        legend=dict(orientation='h', y=1.1),
+        margin=dict(l=10, r=10, t=30, b=20),
+        xaxis=dict(gridcolor='rgba(255,255,255,0.1)'),
+        yaxis=dict(gridcolor='rgba(255,255,255,0.1)', range=[0, 100], title='Risk %')
+    )
+    return fig
+
+
+# One figure per chart, built by the *_figure() functions on first use and then
+# patched in place: only the data values that change between reruns are
+# assigned (and validated), the layout, axes, styling and static traces are
+# reused. A figure is rebuilt when its shape key changes (e.g. the what-if
+# fields or the reference histogram). Not thread-safe: keep one per session
+# (a session's reruns never overlap), st.plotly_chart serializes the figure
+# before the next patch.
+class FigureTemplates:
+    def __init__(self):
+        self._figures = {}
+
+    def _figure(self, name, key, build):
+        cached = self._figures.get(name)
+        if cached is not None and cached[0] == key:
+            return cached[1], False
+        fig = build()
+        self._figures[name] = (key, fig)
+        return fig, True
+
+    def gauge(self, value):
+        fig, built = self._figure('gauge', None, lambda: gauge_figure(value))
+        if not built:
+            color = risk_color(value)
+            with fig.batch_update():
+                indicator = fig.data[0]
+                indicator.value = value
+                indicator.gauge.bar.color = color
+                indicator.gauge.threshold.line.color = color
+                indicator.gauge.threshold.value = value
+        return fig
+
+    def radar(self, credit_score, age, tenure, balance, num_products, estimated_salary):
+        profile = (credit_score, age, tenure, balance, num_products, estimated_salary)
+        fig, built = self._figure('radar', None, lambda: radar_figure(*profile))
+        if not built:
+            fig.data[0].r = radar_values(*profile)
+        return fig
+
+    def factors(self, factors):
+        fig, built = self._figure('factors', len(factors), lambda: factor_figure(factors))
+        if not built:
+            x, y, colors = factor_bars(factors)
+            with fig.batch_update():
+                bars = fig.data[0]
+                bars.x = x
+                bars.y = y
+                bars.marker.color = colors
+        return fig
+
+    # The histogram is fixed for a given reference index, so it is part of the key
+    # and only the customer's marker line moves
+    def distribution(self, edges, counts, value):
+        key = (edges.tobytes(), counts.tobytes())
+        fig, built = self._figure('distribution', key, lambda: distribution_figure(edges, counts, value))
+        if not built:
+            fig.layout.shapes[0].update(x0=value, x1=value)
+        return fig
+
+    def whatif(self, curves, record):
+        fig, built = self._figure('whatif', tuple(curves), lambda: whatif_figure(curves, record))
+        if not built:
+            with fig.batch_update():
+                for i, (field, (grid, probabilities)) in enumerate(curves.items()):
+                    line, marker = fig.data[2 * i], fig.data[2 * i + 1]
+                    line.x = grid
+                    line.y = probabilities * 100
+                    current = record[field]
+                    marker.x = [current]
+                    marker.y = [np.interp(current, grid, probabilities) * 100]
+        return fig
+
+    def trend(self, times, risks, max_risks=None):
+        fig, built = self._figure('trend', max_risks is None, lambda: trend_figure(times, risks, max_risks))
+        if not built:
+            with fig.batch_update():
+                x, y, mode = trend_line(times, risks)
+                fig.data[0].update(x=x, y=y, mode=mode)
+                if max_risks is not None:
+                    x, y, _ = trend_line(times, max_risks)
+                    fig.data[1].update(x=x, y=y)
+        return fig
@@ -0,0 +1,294 @@
+"""Feature drift of scored customers against the training data.
+
+Every scored feature row is already in z-space: FeatureTransform scales each
+column with the scaler's training mean_ and scale_. A running Welford mean and
+variance plus a fixed-bin histogram over [-Z_LIMIT, Z_LIMIT] per column are
+updated where rows are scored (UI, batch, HTTP service), in O(1) memory.
+compare() checks them against the scaler (mean shift in training standard
+deviations, std ratio) and against histograms of the training CSV binned the
+same way (PSI and a binned two-sample KS statistic).
+
+Usage: python drift.py INPUT.csv [--reference Churn_Modelling.csv] [--output drift.json]
+scores nothing, it feeds the input's feature rows through the monitor one
+at a time, reports the per-row update cost and the drift of the input.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+DEFAULT_DATA_PATH = os.environ.get('CHURN_REFERENCE_DATA', 'Churn_Modelling.csv')
+
+# Histogram bins per column: BINS equal-width bins over [-Z_LIMIT, Z_LIMIT]
+# plus one tail bin on each side
+Z_LIMIT = 4.0
+BINS = 32
+N_BINS = BINS + 2
+_BINS_PER_Z = BINS / (2 * Z_LIMIT)
+
+# No status is given before this many rows, PSI of a handful of rows is noise
+MIN_ROWS = int(os.environ.get('CHURN_DRIFT_MIN_ROWS', 200))
+
+# PSI >= 0.1 is a moderate shift, >= 0.25 a major one (the usual credit-scoring bands)
+PSI_WARN = 0.1
+PSI_ALERT = 0.25
+# Mean moved by this many training standard deviations
+MEAN_SHIFT_ALERT = 0.5
+# Two-sample KS critical value coefficient for alpha = 0.01
+KS_COEFFICIENT = 1.628
+
+# Welford mean/variance and fixed-bin histograms of scaled feature rows.
+# Batches are folded in with Chan's parallel update, so states from several
+# processes or chunks merge exactly. Not thread-safe, DriftMonitor adds a lock.
+class RunningStats:
+    def __init__(self, n_features):
+        self.n_features = n_features
+        self.rows = 0
+        # Rows with a NaN or infinite feature are counted but not binned
+        self.skipped = 0
+        self.mean = np.zeros(n_features)
+        self.m2 = np.zeros(n_features)
+        self.counts = np.zeros((n_features, N_BINS), dtype=np.int64)
+        self._columns = np.arange(n_features)
+        self._offsets = (self._columns * N_BINS)[None, :]
+
+    # Fold in a (rows, n_features) matrix of scaled features
+    def update(self, features):
+        features = np.asarray(features)
+        finite = np.isfinite(features).all(axis=1)
+        if not finite.all():
+            self.skipped += int(len(features) - finite.sum())
+            features = features[finite]
+        if not len(features):
+            return
+        features = features.astype(np.float64)
+        batch_mean = features.mean(axis=0)
+        self._combine(len(features), batch_mean, ((features - batch_mean) ** 2).sum(axis=0))
+        bins = self._bins(features) + self._offsets
+        self.counts += np.bincount(bins.ravel(), minlength=self.counts.size).reshape(self.counts.shape)
+
+    def merge(self, other):
+        self._combine(other.rows, other.mean, other.m2)
+        self.counts += other.counts
+        self.skipped += other.skipped
+
+    def copy(self):
+        stats = RunningStats(self.n_features)
+        stats.merge(self)
+        return stats
+
+    @property
+    def variance(self):
+        return self.m2 / (self.rows - 1) if self.rows > 1 else np.zeros(self.n_features)
+
+    def to_dict(self):
+        return {'rows': self.rows, 'skipped': self.skipped, 'mean': self.mean.tolist(), 'm2': self.m2.tolist(),
+                'counts': self.counts.tolist()}
+
+    @classmethod
+    def from_dict(cls, state):
+        stats = cls(len(state['mean']))
+        stats.rows = state['rows']
+        stats.skipped = state['skipped']
+        stats.mean = np.asarray(state['mean'], dtype=np.float64)
+        stats.m2 = np.asarray(state['m2'], dtype=np.float64)
+        stats.counts = np.asarray(state['counts'], dtype=np.int64)
+        return stats
+
+    def _combine(self, rows, mean, m2):
+        if not rows:
+            return
+        total = self.rows + rows
+        delta = mean - self.mean
+        self.mean = self.mean + delta * (rows / total)
+        self.m2 = self.m2 + m2 + delta ** 2 * (self.rows * rows / total)
+        self.rows = total
+
+    # Bin index of every value, bin 0 and N_BINS - 1 hold the tails
+    def _bins(self, values):
+        positions = values * _BINS_PER_Z + (Z_LIMIT * _BINS_PER_Z + 1)
+        # Clipped to >= 0 first, so truncating to int is the floor
+        return np.clip(positions, 0, N_BINS - 1).astype(np.intp)
+
+
+# Rows folded in per batch when they arrive one at a time
+FLUSH_ROWS = 64
+
+
+# Running statistics of everything scored in this process, shared by all
+# threads and sessions. Created empty, sized by the first rows it sees.
+# Single rows (the UI and /predict) are only appended to a short buffer on the
+# scoring path and folded in FLUSH_ROWS at a time; snapshot() folds in the rest.
+class DriftMonitor:
+    def __init__(self, flush_rows=FLUSH_ROWS):
+        self.flush_rows = flush_rows
+        self.stats = None
+        self._pending = []
+        self._lock = threading.Lock()
+
+    @property
+    def rows(self):
+        with self._lock:
+            return (self.stats.rows if self.stats is not None else 0) + len(self._pending)
+
+    def update(self, features):
+        with self._lock:
+            if len(features) == 1:
+                self._pending.append(features)
+                if len(self._pending) < self.flush_rows:
+                    return
+            elif len(features):
+                self._pending.append(features)
+            self._flush()
+
+    def merge(self, stats):
+        with self._lock:
+            self._flush()
+            if self.stats is None:
+                self.stats = RunningStats(stats.n_features)
+            self.stats.merge(stats)
+
+    # Copy of the statistics so far (None before the first row), safe to compare while scoring continues
+    def snapshot(self):
+        with self._lock:
+            self._flush()
+            return self.stats.copy() if self.stats is not None else None
+
+    def reset(self):
+        with self._lock:
+            self.stats = None
+            self._pending = []
+
+    def _flush(self):
+        if not self._pending:
+            return
+        features = np.concatenate(self._pending)
+        self._pending = []
+        if self.stats is None:
+            self.stats = RunningStats(features.shape[1])
+        self.stats.update(features)
+
+
+# Statistics of the training data in the same z-space, read in chunks
+def load_reference(feature_transform, data_path=DEFAULT_DATA_PATH, chunk_size=100_000):
+    import pandas as pd
+
+    reference = RunningStats(feature_transform.n_features)
+    for chunk in pd.read_csv(data_path, chunksize=chunk_size):
+        reference.update(feature_transform.transform(chunk))
+    return reference
+
+
+def _fractions(counts):
+    return counts / np.maximum(counts.sum(axis=-1, keepdims=True), 1)
+
+
+# Population stability index per column, bins smoothed so empty ones stay finite
+def psi(live_counts, reference_counts, epsilon=1e-4):
+    live = _fractions(live_counts) + epsilon
+    reference = _fractions(reference_counts) + epsilon
+    return ((live - reference) * np.log(live / reference)).sum(axis=-1)
+
+
+# Largest CDF gap at the bin edges: the two-sample KS statistic of the binned data
+def ks_statistic(live_counts, reference_counts):
+    gaps = np.cumsum(_fractions(live_counts), axis=-1) - np.cumsum(_fractions(reference_counts), axis=-1)
+    return np.abs(gaps).max(axis=-1)
+
+
+def _status(rows, psi_value, ks, ks_critical, mean_shift):
+    if rows < MIN_ROWS:
+        return 'collecting'
+    if psi_value >= PSI_ALERT or abs(mean_shift) >= MEAN_SHIFT_ALERT:
+        return 'alert'
+    if psi_value >= PSI_WARN or ks > ks_critical:
+        return 'warn'
+    return 'ok'
+
+
+# One entry per feature column: live mean in raw units next to the scaler's
+# training mean, mean shift in training standard deviations, std ratio to the
+# scaler, PSI and KS against the reference histogram, and a status
+def compare(live, reference, feature_transform):
+    n, m = live.rows, reference.rows
+    ks_critical = KS_COEFFICIENT * np.sqrt((n + m) / (n * m)) if n and m else np.inf
+    psi_values = psi(live.counts, reference.counts)
+    ks_values = ks_statistic(live.counts, reference.counts)
+    std_ratio = np.sqrt(live.variance)
+    report = []
+    for i, name in enumerate(feature_transform.feature_names):
+        mean_shift = float(live.mean[i])
+        report.append({
+            'feature': name,
+            'rows': n,
+            'mean': float(live.mean[i] * feature_transform.scale[i] + feature_transform.mean[i]),
+            'train_mean': float(feature_transform.mean[i]),
+            'mean_shift': mean_shift,
+            'std_ratio': float(std_ratio[i]),
+            'psi': float(psi_values[i]),
+            'ks': float(ks_values[i]),
+            'ks_critical': float(ks_critical),
+            'status': _status(n, psi_values[i], ks_values[i], ks_critical, mean_shift),
+        })
+    return report
+
+
+# Features in warn or alert status, worst first
+def alerts(report):
+    flagged = [entry for entry in report if entry['status'] in ('warn', 'alert')]
+    return sorted(flagged, key=lambda entry: (entry['status'] != 'alert', -entry['psi']))
+
+
+def format_report(report):
+    lines = [f"{'feature':<20} {'mean':>12} {'train mean':>12} {'shift':>7} {'std':>6} {'psi':>7} {'ks':>6}  status"]
+    for entry in report:
+        lines.append(f"{entry['feature']:<20} {entry['mean']:>12,.2f} {entry['train_mean']:>12,.2f} "
+                     f"{entry['mean_shift']:>+7.2f} {entry['std_ratio']:>6.2f} {entry['psi']:>7.3f} "
+                     f"{entry['ks']:>6.3f}  {entry['status']}")
+    return '\n'.join(lines)
+
+
+def main():
+    import pandas as pd
+
+    import artifacts
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('input', help='CSV with the Churn_Modelling.csv columns')
+    parser.add_argument('--reference', default=DEFAULT_DATA_PATH, help='training data the input is compared to')
+    parser.add_argument('--output', help='write the report as JSON to this file')
+    args = parser.parse_args()
+
+    feature_transform = artifacts.feature_transform()
+    reference = load_reference(feature_transform, args.reference)
+    features = feature_transform.transform(pd.read_csv(args.input))
+
+    monitor = DriftMonitor()
+    start = time.perf_counter()
+    for i in range(len(features)):
+        monitor.update(features[i:i + 1])
+    per_row = (time.perf_counter() - start) / max(len(features), 1)
+    batched = RunningStats(feature_transform.n_features)
+    start = time.perf_counter()
+    batched.update(features)
+    per_batch_row = (time.perf_counter() - start) / max(len(features), 1)
+    print(f"update(): {per_row * 1e6:.2f} us per single row, {per_batch_row * 1e6:.3f} us per row "
+          f"in one batch of {len(features):,}")
+
+    report = compare(monitor.snapshot(), reference, feature_transform)
+    print(f"\n{monitor.rows:,} rows against {reference.rows:,} reference rows\n{format_report(report)}")
+    flagged = alerts(report)
+    if flagged:
+        print(f"\nDrift in: {', '.join(entry['feature'] for entry in flagged)}")
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({'rows': monitor.rows, 'reference_rows': reference.rows, 'features': report}, file, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
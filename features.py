@@ -0,0 +1,143 @@
+import pickle
+
+import numpy as np
+
+GEO_PREFIX = 'Geography_'
+
+
+# Encoders and scaler compiled into lookup tables and a per-column multiply-add.
+# transform() maps raw customer fields (Gender/Geography as strings) straight to
+# the scaled float32 feature matrix the network expects, in the scaler's column order.
+class FeatureTransform:
+    def __init__(self, feature_names, gender_classes, geo_categories, mean, scale):
+        self.feature_names = [str(name) for name in feature_names]
+        self.gender_classes = [str(value) for value in gender_classes]
+        self.geo_categories = [str(value) for value in geo_categories]
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.n_features = len(self.feature_names)
+
+        self._gender_codes = {value: code for code, value in enumerate(self.gender_classes)}
+        self._geo_codes = {value: code for code, value in enumerate(self.geo_categories)}
+
+        index = {name: i for i, name in enumerate(self.feature_names)}
+        self._gender_index = index['Gender']
+        self._geo_index = [index[GEO_PREFIX + value] for value in self.geo_categories]
+        self._numeric = [(name, i) for name, i in index.items()
+                         if name != 'Gender' and not name.startswith(GEO_PREFIX)]
+
+        # (x - mean_) / scale_ rewritten as x * mul + add
+        mul = 1.0 / self.scale
+        add = -self.mean / self.scale
+
+        # Categorical lookup tables hold the final scaled values for every category,
+        # plus a last row of NaN that code -1 (missing or unknown value) picks
+        gender_raw = np.append(np.arange(len(self.gender_classes), dtype=np.float64), np.nan)
+        geo_raw = np.vstack([np.eye(len(self.geo_categories)), np.full(len(self.geo_categories), np.nan)])
+        self._gender_table = {
+            False: gender_raw,
+            True: gender_raw * mul[self._gender_index] + add[self._gender_index],
+        }
+        self._geo_table = {
+            False: geo_raw,
+            True: geo_raw * mul[self._geo_index] + add[self._geo_index],
+        }
+
+        self._mul = mul
+        self._add = add
+
+    @classmethod
+    def from_encoders(cls, label_encoder_gender, onehot_encoder_geo, scaler):
+        return cls(scaler.feature_names_in_, label_encoder_gender.classes_,
+                   onehot_encoder_geo.categories_[0], scaler.mean_, scaler.scale_)
+
+    @classmethod
+    def from_pickles(cls, gender_path='label_encoder_gender.pkl', geo_path='onehot_encoder_geo.pkl',
+                     scaler_path='scaler.pkl'):
+        with open(gender_path, 'rb') as file:
+            label_encoder_gender = pickle.load(file)
+        with open(geo_path, 'rb') as file:
+            onehot_encoder_geo = pickle.load(file)
+        with open(scaler_path, 'rb') as file:
+            scaler = pickle.load(file)
+        return cls.from_encoders(label_encoder_gender, onehot_encoder_geo, scaler)
+
+    # Scaled features for one customer given as a dict of raw fields
+    def transform_record(self, record):
+        return self._record(record, scaled=True)
+
+    # Scaled features for a batch given as a mapping of column -> values (a DataFrame works).
+    # A row whose Gender or Geography is missing or unknown gets NaN in those
+    # columns, so it scores NaN instead of failing the whole batch.
+    def transform(self, columns):
+        return self._columns(columns, scaled=True)
+
+    # Encoded but unscaled features, the input expected by a model from fold_into()
+    def encode_record(self, record):
+        return self._record(record, scaled=False)
+
+    def encode(self, columns):
+        return self._columns(columns, scaled=False)
+
+    # Copy of a NumpyModel with the scaler folded into its first Dense layer:
+    # W' = W / scale_ (per input row), b' = b - (mean_ / scale_) @ W
+    def fold_into(self, model):
+        from inference import NumpyModel
+
+        (kernel, bias, activation), *rest = model.layers
+        kernel = kernel.astype(np.float64)
+        folded_kernel = kernel * self._mul[:, None]
+        folded_bias = bias + self._add @ kernel
+        return NumpyModel([(folded_kernel, folded_bias, activation), *rest])
+
+    def _code(self, table, value, column):
+        try:
+            return table[value]
+        except KeyError:
+            raise ValueError(f"Unknown {column} value: {value!r}") from None
+
+    def _record(self, record, scaled):
+        row = np.zeros(self.n_features, dtype=np.float64)
+        for name, i in self._numeric:
+            row[i] = record[name]
+        if scaled:
+            row *= self._mul
+            row += self._add
+        row[self._gender_index] = self._gender_table[scaled][
+            self._code(self._gender_codes, record['Gender'], 'Gender')]
+        row[self._geo_index] = self._geo_table[scaled][
+            self._code(self._geo_codes, record['Geography'], 'Geography')]
+        return row.astype(np.float32).reshape(1, -1)
+
+    # Lookup table rows for a categorical column, -1 (the NaN row) where a value is missing or unknown
+    def _codes(self, values, table):
+        if hasattr(values, 'categories') and hasattr(values, 'codes'):
+            # Categorical (e.g. from a dictionary-encoded Arrow column): look up each
+            # category once and index by code, the strings are never materialized per row.
+            # Null entries have code -1, which picks the appended -1.
+            codes = np.asarray(values.codes)
+            return np.append(self._codes(np.asarray(values.categories, dtype=object), table), -1)[codes]
+        if hasattr(values, 'map'):
+            # pandas Series: hash lookup, missing and unknown values come back as NaN
+            codes = values.map(table).to_numpy(dtype=np.float64, na_value=np.nan)
+        else:
+            values = np.asarray(values, dtype=object)
+            try:
+                uniques, inverse = np.unique(values, return_inverse=True)
+                codes = np.array([table.get(value, np.nan) for value in uniques], dtype=np.float64)[inverse]
+            except TypeError:
+                # None among the strings cannot be sorted
+                codes = np.array([table.get(value, np.nan) for value in values], dtype=np.float64)
+        return np.where(np.isnan(codes), -1, codes).astype(np.intp)
+
+    def _columns(self, columns, scaled):
+        gender_codes = self._codes(columns['Gender'], self._gender_codes)
+        geo_codes = self._codes(columns['Geography'], self._geo_codes)
+
+        out = np.empty((len(gender_codes), self.n_features), dtype=np.float32)
+        for name, i in self._numeric:
+            values = np.asarray(columns[name], dtype=np.float64)
+            out[:, i] = values * self._mul[i] + self._add[i] if scaled else values
+        out[:, self._gender_index] = self._gender_table[scaled][gender_codes]
+        out[:, self._geo_index] = self._geo_table[scaled][geo_codes]
+        return out
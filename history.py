@@ -0,0 +1,202 @@
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+DEFAULT_PATH = os.environ.get('CHURN_HISTORY_DB', 'prediction_history.db')
+
+COLUMNS = ('timestamp', 'geography', 'age', 'credit_score', 'balance', 'risk', 'level')
+
+DAY = 86400
+# Bucket sizes (seconds) of the rolling risk aggregates kept up to date on append
+RESOLUTIONS = (60, 3600, DAY)
+
+# PRAGMA user_version of the current layout: 1 added the session column and
+# made daily buckets local calendar days (they were UTC days)
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at REAL NOT NULL,
+    timestamp TEXT NOT NULL,
+    geography TEXT NOT NULL,
+    age INTEGER NOT NULL,
+    credit_score INTEGER NOT NULL,
+    balance REAL NOT NULL,
+    risk REAL NOT NULL,
+    level TEXT NOT NULL,
+    session TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_predictions_created_at ON predictions (created_at, risk);
+CREATE INDEX IF NOT EXISTS idx_predictions_level ON predictions (level, created_at);
+CREATE TABLE IF NOT EXISTS risk_rollup (
+    resolution INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    sum_risk REAL NOT NULL,
+    max_risk REAL NOT NULL,
+    PRIMARY KEY (resolution, bucket)
+);
+"""
+
+
+# Rollup bucket of a timestamp. Daily buckets are local calendar days (date
+# ordinals), the days of the saved timestamps and of count_today().
+def _bucket(created_at, resolution):
+    if resolution == DAY:
+        return datetime.fromtimestamp(created_at).toordinal()
+    return int(created_at // resolution)
+
+
+# [start, end) timestamps of a bucket
+def _bucket_range(bucket, resolution):
+    if resolution == DAY:
+        return datetime.fromordinal(bucket).timestamp(), datetime.fromordinal(bucket + 1).timestamp()
+    return bucket * resolution, (bucket + 1) * resolution
+
+
+# Saved predictions in a local SQLite file, shared by every session; each row
+# records the session that saved it, which is all clear() removes.
+# Reads are paginated and the trend comes from per-bucket aggregates updated on
+# every append, so rendering the History tab does not depend on how many
+# predictions have been saved.
+class HistoryStore:
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.executescript(SCHEMA)
+            columns = {row['name'] for row in self._conn.execute('PRAGMA table_info(predictions)')}
+            if 'session' not in columns:
+                self._conn.execute('ALTER TABLE predictions ADD COLUMN session TEXT')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS idx_predictions_session ON predictions (session)')
+            # Databases written before the rollup table existed, or with UTC daily
+            # buckets, get the aggregates rebuilt from the raw rows once
+            version = self._conn.execute('PRAGMA user_version').fetchone()[0]
+            empty_rollup = self._conn.execute('SELECT 1 FROM risk_rollup LIMIT 1').fetchone() is None
+            if empty_rollup or version < SCHEMA_VERSION:
+                self._rebuild_rollup()
+                self._conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+
+    def _rebuild_rollup(self):
+        totals = {}
+        for created_at, risk in self._conn.execute('SELECT created_at, risk FROM predictions'):
+            for resolution in RESOLUTIONS:
+                key = (resolution, _bucket(created_at, resolution))
+                count, sum_risk, max_risk = totals.get(key, (0, 0.0, risk))
+                totals[key] = (count + 1, sum_risk + risk, max(max_risk, risk))
+        self._conn.execute('DELETE FROM risk_rollup')
+        self._conn.executemany(
+            'INSERT INTO risk_rollup (resolution, bucket, count, sum_risk, max_risk) VALUES (?, ?, ?, ?, ?)',
+            [(*key, *values) for key, values in totals.items()]
+        )
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    # session identifies who saved the entry, for clear()
+    def append(self, entry, created_at=None, session=None):
+        created_at = time.time() if created_at is None else created_at
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT INTO predictions (created_at, session, {', '.join(COLUMNS)}) "
+                f"VALUES (?, ?, {', '.join('?' * len(COLUMNS))})",
+                (created_at, session, *(entry[col] for col in COLUMNS))
+            )
+            # Same transaction, so the aggregates never disagree with the raw rows
+            self._conn.executemany(
+                "INSERT INTO risk_rollup (resolution, bucket, count, sum_risk, max_risk) VALUES (?, ?, 1, ?, ?) "
+                "ON CONFLICT (resolution, bucket) DO UPDATE SET "
+                "count = count + 1, sum_risk = sum_risk + excluded.sum_risk, "
+                "max_risk = MAX(max_risk, excluded.max_risk)",
+                [(resolution, _bucket(created_at, resolution), entry['risk'], entry['risk'])
+                 for resolution in RESOLUTIONS]
+            )
+
+    # Delete the predictions one session saved, other sessions' rows stay. The
+    # aggregates of the buckets they fell in are recomputed from the remaining
+    # rows (a maximum cannot be decremented). Returns the number of rows deleted.
+    def clear(self, session):
+        with self._lock, self._conn:
+            times = [row[0] for row in
+                     self._conn.execute('SELECT created_at FROM predictions WHERE session = ?', (session,))]
+            self._conn.execute('DELETE FROM predictions WHERE session = ?', (session,))
+            for resolution in RESOLUTIONS:
+                for bucket in {_bucket(created_at, resolution) for created_at in times}:
+                    count, sum_risk, max_risk = self._conn.execute(
+                        'SELECT COUNT(*), SUM(risk), MAX(risk) FROM predictions '
+                        'WHERE created_at >= ? AND created_at < ?', _bucket_range(bucket, resolution)
+                    ).fetchone()
+                    if count:
+                        self._conn.execute(
+                            'INSERT OR REPLACE INTO risk_rollup (resolution, bucket, count, sum_risk, max_risk) '
+                            'VALUES (?, ?, ?, ?, ?)', (resolution, bucket, count, sum_risk, max_risk))
+                    else:
+                        self._conn.execute('DELETE FROM risk_rollup WHERE resolution = ? AND bucket = ?',
+                                           (resolution, bucket))
+        return len(times)
+
+    def _where(self, level=None, since=None):
+        clauses, params = [], []
+        if level is not None:
+            clauses.append('level = ?')
+            params.append(level)
+        if since is not None:
+            clauses.append('created_at >= ?')
+            params.append(since)
+        return (' WHERE ' + ' AND '.join(clauses) if clauses else ''), params
+
+    def count(self, level=None, since=None):
+        where, params = self._where(level, since)
+        return self._query(f'SELECT COUNT(*) FROM predictions{where}', params)[0][0]
+
+    # Read from today's daily bucket, so it is the same day the Risk Trend shows
+    def count_today(self):
+        rows = self._query('SELECT count FROM risk_rollup WHERE resolution = ? AND bucket = ?',
+                           (DAY, _bucket(time.time(), DAY)))
+        return rows[0][0] if rows else 0
+
+    # One page of predictions, newest first (page numbers start at 1)
+    def page(self, page=1, page_size=50, level=None):
+        where, params = self._where(level)
+        rows = self._query(
+            f"SELECT {', '.join(COLUMNS)} FROM predictions{where} "
+            f"ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?",
+            (*params, page_size, (page - 1) * page_size)
+        )
+        return [dict(row) for row in rows]
+
+    # Risk of the most recent `limit` predictions as (created_at, risk) arrays, oldest first.
+    # Served from the (created_at, risk) covering index.
+    def recent_points(self, limit=20000):
+        rows = self._query(
+            'SELECT created_at, risk FROM predictions ORDER BY created_at DESC LIMIT ?', (limit,))
+        points = np.array(rows, dtype=np.float64).reshape(-1, 2)[::-1]
+        return points[:, 0], points[:, 1]
+
+    # Rolling mean/max risk of the most recent `limit` buckets, oldest first, read
+    # from the aggregates maintained by append() rather than from the raw rows
+    def risk_trend(self, bucket_seconds=60, limit=20000):
+        if bucket_seconds not in RESOLUTIONS:
+            raise ValueError(f"bucket_seconds must be one of {RESOLUTIONS}")
+        rows = self._query(
+            'SELECT bucket, sum_risk / count, max_risk, count FROM risk_rollup '
+            'WHERE resolution = ? ORDER BY bucket DESC LIMIT ?',
+            (bucket_seconds, limit)
+        )
+        trend = np.array(rows, dtype=np.float64).reshape(-1, 4)[::-1]
+        return {
+            'time': np.array([_bucket_range(int(bucket), bucket_seconds)[0] for bucket in trend[:, 0]],
+                             dtype=np.float64),
+            'mean_risk': trend[:, 1],
+            'max_risk': trend[:, 2],
+            'count': trend[:, 3],
+        }
@@ -0,0 +1,161 @@
+import json
+import os
+import sys
+
+import numpy as np
+
+BACKENDS = ('numpy', 'keras')
+
+# Backend used when none is requested explicitly
+DEFAULT_BACKEND = os.environ.get('CHURN_BACKEND', 'numpy')
+
+# Rows pushed through the network at once, bounds the hidden activation buffers
+DEFAULT_BATCH_SIZE = 65536
+
+
+def relu(x):
+    return np.maximum(x, 0, out=x)
+
+
+# tanh form of the logistic function, stable for large |x| without overflow warnings
+def sigmoid(x):
+    x *= 0.5
+    np.tanh(x, out=x)
+    x *= 0.5
+    x += 0.5
+    return x
+
+
+def linear(x):
+    return x
+
+
+ACTIVATIONS = {'relu': relu, 'sigmoid': sigmoid, 'linear': linear}
+
+
+# Plain NumPy forward pass for a stack of Dense layers.
+# predict() mirrors the Keras signature so the two backends are interchangeable.
+class NumpyModel:
+    def __init__(self, layers):
+        self.layers = [
+            (np.ascontiguousarray(kernel, dtype=np.float32),
+             np.ascontiguousarray(bias, dtype=np.float32),
+             activation)
+            for kernel, bias, activation in layers
+        ]
+        for _, _, activation in self.layers:
+            if activation not in ACTIVATIONS:
+                raise ValueError(f"Unsupported activation: {activation}")
+        self._forward = [(kernel, bias, ACTIVATIONS[activation])
+                         for kernel, bias, activation in self.layers]
+
+    @property
+    def n_features(self):
+        return self.layers[0][0].shape[0]
+
+    # Read the Dense kernels, biases and activations out of a Keras HDF5 file
+    @classmethod
+    def from_h5(cls, path):
+        import h5py
+
+        with h5py.File(path, 'r') as f:
+            config = json.loads(f.attrs['model_config'])
+            weights = f['model_weights'] if 'model_weights' in f else f
+            layers = []
+            for layer in config['config']['layers']:
+                if layer['class_name'] == 'InputLayer':
+                    continue
+                if layer['class_name'] != 'Dense':
+                    raise ValueError(f"Unsupported layer type: {layer['class_name']}")
+                name = layer['config']['name']
+                group = weights[name]
+                kernel_name, bias_name = [n.decode() if isinstance(n, bytes) else n
+                                          for n in group.attrs['weight_names']]
+                layers.append((group[kernel_name][()], group[bias_name][()],
+                               layer['config']['activation']))
+        return cls(layers)
+
+    def _forward_batch(self, x):
+        for kernel, bias, activation in self._forward:
+            # In-place bias add, np.add(..., dtype=) takes a much slower broadcast loop
+            x = x @ kernel
+            x += bias
+            x = activation(x)
+        return x
+
+    def predict(self, x, batch_size=None, verbose=0):
+        x = np.asarray(x, dtype=np.float32)
+        if x.ndim == 1:
+            x = x.reshape(1, -1)
+        batch_size = batch_size or DEFAULT_BATCH_SIZE
+        if len(x) <= batch_size:
+            return self._forward_batch(x)
+
+        output = np.empty((len(x), self.layers[-1][0].shape[1]), dtype=np.float32)
+        for start in range(0, len(x), batch_size):
+            output[start:start + batch_size] = self._forward_batch(x[start:start + batch_size])
+        return output
+
+
+# Load the trained network with the requested backend ('numpy' or 'keras').
+# The numpy backend never imports TensorFlow.
+def load_model(path='model.h5', backend=None):
+    backend = backend or DEFAULT_BACKEND
+    if backend == 'numpy':
+        return NumpyModel.from_h5(path)
+    if backend == 'keras':
+        import tensorflow as tf
+        return tf.keras.models.load_model(path)
+    raise ValueError(f"Unknown backend '{backend}', expected one of {', '.join(BACKENDS)}")
+
+
+# Compare the NumPy backend (and the compiled feature transform) against the
+# original sklearn + Keras path on every row of a dataset
+def check_parity(data_path='Churn_Modelling.csv', model_path='model.h5', atol=1e-5):
+    import pickle
+    import pandas as pd
+    from features import FeatureTransform
+
+    with open('label_encoder_gender.pkl', 'rb') as file:
+        label_encoder_gender = pickle.load(file)
+    with open('onehot_encoder_geo.pkl', 'rb') as file:
+        onehot_encoder_geo = pickle.load(file)
+    with open('scaler.pkl', 'rb') as file:
+        scaler = pickle.load(file)
+
+    # Reference preprocessing, same steps as the notebooks
+    data = pd.read_csv(data_path)
+    input_data = data.drop(['RowNumber', 'CustomerId', 'Surname', 'Exited'], axis=1, errors='ignore')
+    input_data['Gender'] = label_encoder_gender.transform(input_data['Gender'])
+    geo_encoded = onehot_encoder_geo.transform(input_data[['Geography']]).toarray()
+    geo_encoded_df = pd.DataFrame(geo_encoded, columns=onehot_encoder_geo.get_feature_names_out(['Geography']))
+    input_data = pd.concat([input_data.drop('Geography', axis=1), geo_encoded_df], axis=1)
+    reference_features = scaler.transform(input_data)
+
+    feature_transform = FeatureTransform.from_encoders(label_encoder_gender, onehot_encoder_geo, scaler)
+    features = feature_transform.transform(data)
+    record_features = np.concatenate([feature_transform.transform_record(record)
+                                      for record in data.head(100).to_dict('records')])
+
+    numpy_model = load_model(model_path, 'numpy')
+    folded_model = feature_transform.fold_into(numpy_model)
+    keras_scores = load_model(model_path, 'keras').predict(reference_features, batch_size=4096, verbose=0)
+
+    diffs = {
+        'features (batch)': np.max(np.abs(features - reference_features)),
+        'features (record)': np.max(np.abs(record_features - reference_features[:100])),
+        'numpy model (batch)': np.max(np.abs(keras_scores - numpy_model.predict(features))),
+        # Single-row calls are what the app makes, so check that path too
+        'numpy model (single row)': np.max(np.abs(
+            keras_scores[:100] - np.concatenate([numpy_model.predict(row) for row in record_features]))),
+        'folded model (batch)': np.max(np.abs(
+            keras_scores - folded_model.predict(feature_transform.encode(data)))),
+    }
+    print(f"Rows compared: {len(data):,}")
+    for name, diff in diffs.items():
+        print(f"Max |reference - {name}|: {diff:.3e}")
+    return max(diffs.values()) <= atol
+
+
+if __name__ == '__main__':
+    sys.exit(0 if check_parity(*sys.argv[1:2]) else 1)
@@ -0,0 +1,182 @@
+"""Population percentile index: sorted churn scores of a reference dataset.
+
+The index is a generated file, kept in a cache directory (CHURN_PERCENTILE_CACHE,
+.percentile_cache by default) rather than in the tracked model bundle:
+
+    reference_scores.npy    sorted float32 scores, memory-mapped on load
+    reference_scores.json   bundle content hash + size and SHA-256 of the scored bytes of the dataset
+
+It is reused as long as the bundle hash and the dataset match. Rows appended to
+the dataset since the last build are scored on their own and merged in; a new
+model (different content hash) or an edit anywhere in the scored bytes
+rescores everything.
+
+Usage: python percentile.py [--data Churn_Modelling.csv] [--bundle model_bundle]
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+DEFAULT_DATA_PATH = os.environ.get('CHURN_REFERENCE_DATA', 'Churn_Modelling.csv')
+CACHE_DIR = os.environ.get('CHURN_PERCENTILE_CACHE', '.percentile_cache')
+SCORES_NAME = 'reference_scores.npy'
+META_NAME = 'reference_scores.json'
+
+# Read size while hashing the dataset
+HASH_BLOCK = 1 << 20
+
+
+class PercentileIndex:
+    def __init__(self, scores, meta=None):
+        self.scores = scores
+        self.meta = meta or {}
+
+    def __len__(self):
+        return len(self.scores)
+
+    # Percent of reference customers with a lower score (ties count half), by binary search
+    def rank(self, probability):
+        below = np.searchsorted(self.scores, probability, side='left')
+        at_or_below = np.searchsorted(self.scores, probability, side='right')
+        return 100.0 * (below + at_or_below) / (2 * len(self.scores))
+
+    # Counts of reference scores per equal-width bin over [0, 1]
+    def histogram(self, bins=50):
+        edges = np.linspace(0.0, 1.0, bins + 1)
+        positions = np.searchsorted(self.scores, edges, side='left')
+        positions[-1] = len(self.scores)
+        return edges, np.diff(positions)
+
+
+# SHA-256 of the file's first offset bytes and of the whole file, in one pass
+def _hashes(path, offset):
+    digest = hashlib.sha256()
+    prefix = None
+    position = 0
+    with open(path, 'rb') as file:
+        while True:
+            if position == offset:
+                prefix = digest.hexdigest()
+            block = file.read(HASH_BLOCK if position >= offset else min(HASH_BLOCK, offset - position))
+            if not block:
+                return prefix, digest.hexdigest()
+            digest.update(block)
+            position += len(block)
+
+
+# Score bytes [start, end) of a CSV whose header is the file's first line
+def _score_range(model, feature_transform, data_path, start, end, chunk_size):
+    import pandas as pd
+    from batch import RangeReader, score_columns
+
+    with open(data_path, 'rb') as file:
+        header = file.readline().decode().rstrip('\r\n').split(',')
+        start = max(start, file.tell())
+        if start >= end:
+            return np.empty(0, dtype=np.float32)
+        parts = [score_columns(chunk, model, feature_transform)
+                 for chunk in pd.read_csv(RangeReader(file, start, end), names=header, header=None,
+                                          chunksize=chunk_size)]
+    return np.concatenate(parts).astype(np.float32) if parts else np.empty(0, dtype=np.float32)
+
+
+def _save(directory, scores, meta):
+    os.makedirs(directory, exist_ok=True)
+    tmp_scores = os.path.join(directory, f'.{SCORES_NAME}.tmp')
+    with open(tmp_scores, 'wb') as file:
+        np.save(file, scores)
+    os.replace(tmp_scores, os.path.join(directory, SCORES_NAME))
+    tmp_meta = os.path.join(directory, f'.{META_NAME}.tmp')
+    with open(tmp_meta, 'w') as file:
+        json.dump(meta, file, indent=2)
+    os.replace(tmp_meta, os.path.join(directory, META_NAME))
+
+
+# Load the cached index of a bundle, building or extending it first when the
+# model or dataset changed. model is what actually serves (e.g. a quantized copy
+# of the bundle's network), the bundle's own model by default. If the cache
+# directory cannot be written the rebuilt index is still returned, just not
+# persisted. log receives one line per action.
+def load_index(loaded_bundle, data_path=DEFAULT_DATA_PATH, model=None, chunk_size=100_000, log=None,
+               directory=CACHE_DIR):
+    model = model or loaded_bundle.model
+    scores_path = os.path.join(directory, SCORES_NAME)
+    meta_path = os.path.join(directory, META_NAME)
+    size = os.path.getsize(data_path)
+
+    meta = None
+    if os.path.exists(meta_path) and os.path.exists(scores_path):
+        with open(meta_path) as file:
+            meta = json.load(file)
+
+    data_hash = None
+    if (meta and meta['model_hash'] == loaded_bundle.content_hash
+            and meta['data']['name'] == os.path.basename(data_path) and 'sha256' in meta['data']):
+        offset = meta['data']['bytes']
+        scored_hash, data_hash = _hashes(data_path, offset) if offset <= size else (None, None)
+        unchanged = scored_hash == meta['data']['sha256']
+        if unchanged and offset == size:
+            return PercentileIndex(np.load(scores_path, mmap_mode='r'), meta)
+        if unchanged:
+            # Append-only growth: score the new rows and merge them into the sorted array
+            new_scores = np.sort(_score_range(model, loaded_bundle.feature_transform, data_path, offset, size,
+                                              chunk_size))
+            old_scores = np.load(scores_path)
+            scores = np.insert(old_scores, np.searchsorted(old_scores, new_scores), new_scores)
+            if log:
+                log(f"Percentile index: merged {len(new_scores):,} appended rows into {len(old_scores):,}")
+        else:
+            meta = None
+    else:
+        meta = None
+
+    if meta is None:
+        scores = np.sort(_score_range(model, loaded_bundle.feature_transform, data_path, 0, size, chunk_size))
+        if log:
+            log(f"Percentile index: scored {len(scores):,} rows of {data_path}")
+
+    meta = {
+        'model_hash': loaded_bundle.content_hash,
+        'rows': len(scores),
+        'data': {'name': os.path.basename(data_path), 'bytes': size,
+                 'sha256': data_hash or _hashes(data_path, size)[1]},
+    }
+    try:
+        _save(directory, scores, meta)
+    except OSError as error:
+        if log:
+            log(f"Percentile index not saved: {error}")
+    return PercentileIndex(scores, meta)
+
+
+def main():
+    import bundle
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--data', default=DEFAULT_DATA_PATH)
+    parser.add_argument('--bundle', default=bundle.DEFAULT_PATH)
+    args = parser.parse_args()
+
+    loaded = bundle.load_bundle(args.bundle)
+    start = time.perf_counter()
+    index = load_index(loaded, args.data, log=print)
+    print(f"Index of {len(index):,} scores ready in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    probes = np.random.default_rng(0).random(10_000)
+    start = time.perf_counter()
+    for probability in probes:
+        index.rank(probability)
+    per_lookup = (time.perf_counter() - start) / len(probes)
+    print(f"rank(): {per_lookup * 1e6:.2f} us per lookup")
+    for probability in (0.1, 0.4, 0.7):
+        print(f"  p={probability:.1f} is riskier than {index.rank(probability):.1f}% of customers")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,82 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# perf_counter() timestamps of one-off startup milestones in this process.
+# Only the first occurrence of each mark is kept.
+marks = {}
+
+
+def mark(name):
+    marks.setdefault(name, time.perf_counter())
+
+
+# Number of most recent samples per stage the percentiles are computed over
+WINDOW = int(os.environ.get('CHURN_TIMING_WINDOW', 1000))
+
+# Rolling per-stage durations, shared by every session in the process
+_lock = threading.Lock()
+_samples = {}
+_totals = {}
+
+
+def record(name, seconds):
+    with _lock:
+        if name not in _samples:
+            _samples[name] = deque(maxlen=WINDOW)
+            _totals[name] = [0, 0.0]
+        _samples[name].append(seconds)
+        _totals[name][0] += 1
+        _totals[name][1] += seconds
+
+
+@contextmanager
+def stage(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+
+def _quantile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+# {stage: {count, sum_s, p50_ms, p95_ms, last_ms}}, percentiles over the rolling window
+def summary():
+    with _lock:
+        snapshot = {name: (list(samples), *_totals[name]) for name, samples in _samples.items()}
+    result = {}
+    for name, (samples, count, total) in snapshot.items():
+        last = samples[-1]
+        samples.sort()
+        result[name] = {
+            'count': count,
+            'sum_s': total,
+            'p50_ms': _quantile(samples, 0.50) * 1000,
+            'p95_ms': _quantile(samples, 0.95) * 1000,
+            'last_ms': last * 1000,
+        }
+    return result
+
+
+def to_json():
+    return json.dumps({'window': WINDOW, 'stages': summary()}, indent=2)
+
+
+# Prometheus text exposition format, one summary metric labelled by stage
+def to_prometheus(metric='churn_stage_seconds'):
+    lines = [
+        f'# HELP {metric} Latency of churn predictor stages over the last {WINDOW} samples',
+        f'# TYPE {metric} summary',
+    ]
+    for name, stats in summary().items():
+        lines.append(f'{metric}{{stage="{name}",quantile="0.5"}} {stats["p50_ms"] / 1000:.9f}')
+        lines.append(f'{metric}{{stage="{name}",quantile="0.95"}} {stats["p95_ms"] / 1000:.9f}')
+        lines.append(f'{metric}_sum{{stage="{name}"}} {stats["sum_s"]:.9f}')
+        lines.append(f'{metric}_count{{stage="{name}"}} {stats["count"]}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,87 @@
+import os
+import threading
+from collections import OrderedDict
+
+DEFAULT_SIZE = int(os.environ.get('CHURN_CACHE_SIZE', 4096))
+
+# Raw fields that make up a cache key, in a fixed order.
+# EstimatedSalary is a model input too, so it is part of the key.
+KEY_FIELDS = (
+    ('Geography', str), ('Gender', str), ('Age', int), ('CreditScore', int),
+    ('Balance', float), ('Tenure', int), ('NumOfProducts', int),
+    ('HasCrCard', int), ('IsActiveMember', int), ('EstimatedSalary', float),
+)
+
+
+# Canonical, hashable form of a customer record (numpy scalars become plain Python values)
+def make_key(record):
+    return tuple(cast(record[name]) for name, cast in KEY_FIELDS)
+
+
+# Thread-safe LRU of churn probabilities shared by every session in the process.
+# Entries belong to one artifact version; a new version empties the cache.
+class PredictionCache:
+    def __init__(self, maxsize=DEFAULT_SIZE):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.version = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _check_version(self, version):
+        if version != self.version:
+            self._entries.clear()
+            self.version = version
+
+    # Return the cached probability for record, calling compute() on a miss
+    def lookup(self, record, compute, version=None):
+        key = make_key(record)
+        with self._lock:
+            self._check_version(version)
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        # Computed outside the lock so concurrent sessions don't serialize on the model
+        value = compute()
+
+        with self._lock:
+            if version == self.version:
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return value
+
+    def resize(self, maxsize):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        with self._lock:
+            self.maxsize = maxsize
+            while len(self._entries) > maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+
+cache = PredictionCache()
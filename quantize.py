@@ -0,0 +1,252 @@
+"""Reduced-precision inference for the churn network.
+
+Modes:
+    float16  kernels stored as float16, math in float32
+    int8     kernels stored as per-output-channel symmetric int8; the input of
+             a layer is also quantized to int8 (one calibrated scale per layer)
+             wherever that keeps the calibration set within tolerance
+
+NumPy has no integer GEMM: each kernel is converted to float32 once, when its
+layer is built, and int8 x int8 products are accumulated in float32, which is
+exact for sums of up to 1040 terms, so results match an int32 integer GEMM.
+The modes therefore reproduce reduced-precision accuracy and weight size, not
+speed: they run no faster than float32, and int8 inputs add a rounding pass.
+
+A mode is only enabled after calibration on Churn_Modelling.csv shows the
+maximum probability deviation from the float32 model is within tolerance.
+
+Usage: python quantize.py [--mode int8] [--tolerance 0.01] [--data Churn_Modelling.csv]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+from inference import ACTIVATIONS, DEFAULT_BATCH_SIZE
+
+MODES = ('float32', 'float16', 'int8')
+
+# Precision used by artifacts.model(), float32 keeps the unquantized model
+DEFAULT_MODE = os.environ.get('CHURN_PRECISION', 'float32')
+
+# Largest allowed |p_float32 - p_quantized| on the calibration data
+DEFAULT_TOLERANCE = float(os.environ.get('CHURN_PRECISION_TOLERANCE', 0.01))
+
+CALIBRATION_PATH = 'Churn_Modelling.csv'
+
+# Activation scales clip the extreme tail instead of the single largest value
+ACTIVATION_PERCENTILE = 99.99
+
+
+# Symmetric per-output-channel int8: column j of the kernel is q[:, j] * scale[j]
+def quantize_kernel_int8(kernel):
+    scale = np.abs(kernel).max(axis=0) / 127.0
+    scale[scale == 0] = 1.0
+    q = np.clip(np.rint(kernel / scale), -127, 127).astype(np.int8)
+    return q, scale.astype(np.float32)
+
+
+def quantize_activations(x, scale, dtype=np.int8):
+    return np.clip(np.rint(x / scale), -127, 127).astype(dtype, copy=False)
+
+
+class QuantizedLayer:
+    def __init__(self, kernel, bias, activation, mode, input_scale=None):
+        if mode == 'int8':
+            self.kernel, self.kernel_scale = quantize_kernel_int8(kernel)
+        else:
+            self.kernel = np.asarray(kernel, dtype=np.float16)
+            self.kernel_scale = None
+        # What the products run on, converted once rather than on every call
+        self.compute_kernel = self.kernel.astype(np.float32)
+        self.bias = np.asarray(bias, dtype=np.float32)
+        self.activation = activation
+        # None keeps the layer input in float32
+        self.input_scale = None if input_scale is None else np.float32(input_scale)
+
+    def __call__(self, x):
+        if self.input_scale is not None:
+            # int8 x int8 accumulate (int8 values held in float32), then one rescale per output channel
+            x = quantize_activations(x, self.input_scale, np.float32) @ self.compute_kernel
+            x *= self.input_scale * self.kernel_scale
+        else:
+            x = x @ self.compute_kernel
+            if self.kernel_scale is not None:
+                x *= self.kernel_scale
+        x += self.bias
+        return ACTIVATIONS[self.activation](x)
+
+
+# Drop-in replacement for NumpyModel.predict() with quantized weights
+class QuantizedModel:
+    def __init__(self, layers, mode):
+        self.layers = layers
+        self.mode = mode
+
+    @property
+    def n_features(self):
+        return self.layers[0].kernel.shape[0]
+
+    @property
+    def weight_bytes(self):
+        return sum(layer.kernel.nbytes + layer.bias.nbytes
+                   + (0 if layer.kernel_scale is None else layer.kernel_scale.nbytes)
+                   for layer in self.layers)
+
+    def _forward_batch(self, x):
+        for layer in self.layers:
+            x = layer(x)
+        return x
+
+    def predict(self, x, batch_size=None, verbose=0):
+        x = np.asarray(x, dtype=np.float32)
+        if x.ndim == 1:
+            x = x.reshape(1, -1)
+        batch_size = batch_size or DEFAULT_BATCH_SIZE
+        if len(x) <= batch_size:
+            return self._forward_batch(x)
+
+        output = np.empty((len(x), self.layers[-1].kernel.shape[1]), dtype=np.float32)
+        for start in range(0, len(x), batch_size):
+            output[start:start + batch_size] = self._forward_batch(x[start:start + batch_size])
+        return output
+
+
+# Inputs seen by every layer of a float NumpyModel
+def layer_inputs(model, features):
+    inputs = []
+    x = np.asarray(features, dtype=np.float32)
+    for kernel, bias, activation in model.layers:
+        inputs.append(x)
+        x = x @ kernel
+        x += bias
+        x = ACTIVATIONS[activation](x)
+    return inputs
+
+
+# Build a quantized copy of a NumpyModel. For int8, per-layer activation scales
+# come from the calibration features and each layer's input is switched to
+# int8 greedily, front to back, only while the worst-case deviation this adds
+# to the weight-only int8 model on the calibration rows stays within tolerance
+# (int8 weights alone can already be further than that from float32, which
+# enable() checks separately).
+def quantize_model(model, mode, calibration_features=None, tolerance=DEFAULT_TOLERANCE):
+    if mode not in MODES or mode == 'float32':
+        raise ValueError(f"Unknown quantization mode '{mode}', expected float16 or int8")
+    layers = [QuantizedLayer(kernel, bias, activation, mode) for kernel, bias, activation in model.layers]
+    quantized = QuantizedModel(layers, mode)
+    if mode != 'int8' or calibration_features is None:
+        return quantized
+
+    weight_only = quantized.predict(calibration_features)
+    inputs = layer_inputs(model, calibration_features)
+    for layer, x in zip(layers, inputs):
+        bound = np.percentile(np.abs(x), ACTIVATION_PERCENTILE)
+        if bound == 0:
+            continue
+        layer.input_scale = np.float32(bound / 127.0)
+        if np.max(np.abs(quantized.predict(calibration_features) - weight_only)) > tolerance:
+            layer.input_scale = None
+    return quantized
+
+
+# Rank-based ROC AUC (Mann-Whitney U) with ties sharing their average rank
+def roc_auc(labels, scores):
+    labels = np.asarray(labels).astype(bool)
+    _, inverse, counts = np.unique(scores, return_inverse=True, return_counts=True)
+    average_rank = np.cumsum(counts) - (counts - 1) / 2.0
+    ranks = average_rank[inverse]
+    n_pos = labels.sum()
+    n_neg = len(labels) - n_pos
+    return (ranks[labels].sum() - n_pos * (n_pos + 1) / 2.0) / (n_pos * n_neg)
+
+
+# Deviation and quality metrics of a quantized model against the float model
+def compare(model, quantized, features, labels=None):
+    reference = model.predict(features)[:, 0]
+    candidate = quantized.predict(features)[:, 0]
+    deviation = np.abs(reference - candidate)
+    report = {
+        'mode': quantized.mode,
+        'rows': len(features),
+        'max_deviation': float(deviation.max()),
+        'mean_deviation': float(deviation.mean()),
+        'int8_layer_inputs': [layer.input_scale is not None for layer in quantized.layers],
+        'weight_bytes': quantized.weight_bytes,
+    }
+    if labels is not None:
+        labels = np.asarray(labels)
+        report['accuracy_delta'] = float(((candidate > 0.5) == labels).mean() - ((reference > 0.5) == labels).mean())
+        report['auc_delta'] = float(roc_auc(labels, candidate) - roc_auc(labels, reference))
+    return report
+
+
+def load_calibration(feature_transform, data_path=CALIBRATION_PATH):
+    import pandas as pd
+
+    data = pd.read_csv(data_path)
+    return feature_transform.transform(data), data['Exited'].to_numpy()
+
+
+# Quantize and validate in one step: calibrate on every row of the CSV and
+# refuse the mode if the float32 deviation is above tolerance
+def enable(model, feature_transform, mode=DEFAULT_MODE, tolerance=DEFAULT_TOLERANCE, data_path=CALIBRATION_PATH):
+    features, labels = load_calibration(feature_transform, data_path)
+    quantized = quantize_model(model, mode, features, tolerance)
+    report = compare(model, quantized, features, labels)
+    if report['max_deviation'] > tolerance:
+        raise ValueError(f"{mode} inference refused: max probability deviation "
+                         f"{report['max_deviation']:.4g} exceeds tolerance {tolerance:.4g}")
+    return quantized, report
+
+
+def _throughput(model, features, repeats=5):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict(features)
+        best = min(best, time.perf_counter() - start)
+    return len(features) / best
+
+
+def main():
+    import bundle
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--mode', choices=MODES[1:], action='append',
+                        help='mode(s) to evaluate (default: all)')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument('--data', default=CALIBRATION_PATH)
+    parser.add_argument('--bundle', default=bundle.DEFAULT_PATH)
+    parser.add_argument('--throughput-rows', type=int, default=200_000)
+    args = parser.parse_args()
+
+    loaded = bundle.load_bundle(args.bundle)
+    features, labels = load_calibration(loaded.feature_transform, args.data)
+    large = np.resize(features, (args.throughput_rows, features.shape[1]))
+
+    print(f"Tolerance: max probability deviation <= {args.tolerance:g} over {len(features):,} rows")
+    print(f"{'mode':<8} {'max dev':>9} {'mean dev':>9} {'acc delta':>10} {'AUC delta':>10} "
+          f"{'int8 inputs':>12} {'weights':>8} {'rows/s':>11}  status")
+    float_bytes = sum(kernel.nbytes + bias.nbytes for kernel, bias, _ in loaded.model.layers)
+    print(f"{'float32':<8} {0:>9.2e} {0:>9.2e} {0:>+10.4f} {0:>+10.4f} {'-':>12} "
+          f"{float_bytes:>8,} {_throughput(loaded.model, large):>11,.0f}  reference")
+
+    refused = False
+    for mode in args.mode or MODES[1:]:
+        quantized = quantize_model(loaded.model, mode, features, args.tolerance)
+        report = compare(loaded.model, quantized, features, labels)
+        status = 'ok' if report['max_deviation'] <= args.tolerance else 'REFUSED'
+        refused = refused or status == 'REFUSED'
+        # One letter per layer input: q = int8, f = float
+        inputs = ''.join('q' if flag else 'f' for flag in report['int8_layer_inputs'])
+        print(f"{mode:<8} {report['max_deviation']:>9.2e} {report['mean_deviation']:>9.2e} "
+              f"{report['accuracy_delta']:>+10.4f} {report['auc_delta']:>+10.4f} {inputs:>12} "
+              f"{report['weight_bytes']:>8,} {_throughput(quantized, large):>11,.0f}  {status}")
+    return 1 if refused else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
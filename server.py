@@ -0,0 +1,295 @@
+"""Headless churn scoring service.
+
+POST /predict        one customer as a JSON object of raw fields
+POST /predict/batch  {"customers": [...]} scored in a single forward pass
+GET  /health         liveness, served artifact version plus micro-batching and reload statistics
+GET  /drift          per-feature drift of the scored customers against the training data
+GET  /shadow         challenger vs served model on the same traffic (CHURN_CHALLENGER, see shadow.py)
+
+Concurrent /predict requests are queued and merged into one forward pass
+of up to --max-batch-size rows, waiting at most --max-wait-ms for a batch
+to fill. New artifacts on disk are loaded, validated and swapped in without
+a restart (--reload-interval); a request finishes on the version it started
+with. Run with: python server.py --port 8000
+"""
+import argparse
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+import artifacts
+import drift
+import shadow
+from batch import FEATURE_COLUMNS, check_columns, risk_levels
+from features import GEO_PREFIX
+
+DEFAULT_MAX_BATCH_SIZE = 64
+DEFAULT_MAX_WAIT_MS = 2.0
+
+
+# Merges rows submitted from many request threads into batched model calls.
+# A single worker thread runs the models; callers block on a Future. With a
+# shadow scorer each scored batch is handed to the challenger after the
+# futures are resolved.
+class MicroBatcher:
+    def __init__(self, max_batch_size=DEFAULT_MAX_BATCH_SIZE, max_wait_ms=DEFAULT_MAX_WAIT_MS, shadow=None):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.shadow = shadow
+        self.batches = 0
+        self.rows = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._work, name='micro-batcher', daemon=True)
+        self._thread.start()
+
+    # Rows are scored by the artifact version they were submitted with, even if a newer one is served by then
+    def submit(self, features, runtime):
+        future = Future()
+        self._queue.put((features, runtime, future))
+        return future
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def _collect(self, first):
+        pending = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(pending) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)
+                break
+            pending.append(item)
+        return pending
+
+    def _work(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            # Around a reload one batch can hold rows for two versions, each is its own forward pass
+            groups = {}
+            for item in self._collect(first):
+                groups.setdefault(id(item[1]), []).append(item)
+            for pending in groups.values():
+                self._score(pending[0][1], pending)
+
+    def _score(self, runtime, pending):
+        try:
+            features = np.concatenate([features for features, _, _ in pending])
+            probabilities = runtime.model().predict(features, batch_size=len(features), verbose=0)[:, 0]
+        except Exception as error:
+            for _, _, future in pending:
+                future.set_exception(error)
+            return
+        self.batches += 1
+        self.rows += len(pending)
+        for (_, _, future), probability in zip(pending, probabilities):
+            future.set_result(float(probability))
+        if self.shadow is not None:
+            self.shadow.submit(features, probabilities, runtime.feature_transform())
+
+    def stats(self):
+        return {
+            'batches': self.batches,
+            'rows': self.rows,
+            'mean_batch_size': self.rows / self.batches if self.batches else 0.0,
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000,
+        }
+
+
+# A null numeric field (e.g. "CreditScore": null) or a missing/unknown category
+# encodes to NaN and would score NaN, such customers are rejected with the field named
+def check_finite(features, feature_transform):
+    bad_rows = np.flatnonzero(~np.isfinite(features).all(axis=1))
+    if len(bad_rows):
+        row = bad_rows[0]
+        # The one-hot Geography_* columns are reported as the Geography field they encode
+        fields = dict.fromkeys('Geography' if name.startswith(GEO_PREFIX) else name
+                               for name, value in zip(feature_transform.feature_names, features[row])
+                               if not np.isfinite(value))
+        where = f"customer {row}: " if len(features) > 1 else ''
+        raise ValueError(f"{where}{', '.join(fields)} must be a known category or a finite number")
+
+
+def format_prediction(probability, customer):
+    result = {'churn_probability': probability, 'risk_level': str(risk_levels(np.array([probability]))[0])}
+    if 'CustomerId' in customer:
+        result['CustomerId'] = customer['CustomerId']
+    return result
+
+
+class ScoringHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes; without TCP_NODELAY the
+    # second write waits on the client's delayed ACK (~40ms per request)
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, allow_nan=False).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        length = int(self.headers.get('Content-Length', 0))
+        return json.loads(self.rfile.read(length) or b'null')
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._send_json(200, {'status': 'ok', 'batching': self.server.batcher.stats(),
+                                  'artifacts': artifacts.reload_status()})
+        elif self.path == '/drift':
+            self._send_drift()
+        elif self.path == '/shadow':
+            if self.server.shadow is None and shadow.last_error:
+                self._send_json(503, {'error': f'The challenger could not be loaded: {shadow.last_error}'})
+            elif self.server.shadow is None:
+                self._send_json(404, {'error': 'Shadow scoring is off, set CHURN_CHALLENGER to enable it'})
+            else:
+                self._send_json(200, self.server.shadow.summary())
+        else:
+            self._send_json(404, {'error': f'Unknown path {self.path}'})
+
+    def do_POST(self):
+        try:
+            payload = self._read_json()
+            if self.path == '/predict':
+                response = self._predict_one(payload)
+            elif self.path == '/predict/batch':
+                response = self._predict_many(payload)
+            else:
+                self._send_json(404, {'error': f'Unknown path {self.path}'})
+                return
+        except (ValueError, TypeError, KeyError) as error:
+            self._send_json(400, {'error': str(error)})
+            return
+        self._send_json(200, response)
+
+    def _send_drift(self):
+        runtime = artifacts.current()
+        stats = self.server.drift_monitor(runtime).snapshot()
+        if stats is None:
+            self._send_json(200, {'rows': 0, 'features': []})
+            return
+        try:
+            reference = self.server.drift_reference(runtime)
+        except OSError as error:
+            self._send_json(503, {'error': f'No reference data: {error}'})
+            return
+        report = drift.compare(stats, reference, runtime.feature_transform())
+        self._send_json(200, {'rows': stats.rows, 'skipped': stats.skipped,
+                              'alerts': [entry['feature'] for entry in drift.alerts(report)], 'features': report})
+
+    def _predict_one(self, customer):
+        if not isinstance(customer, dict):
+            raise ValueError("Expected a JSON object with the customer's fields")
+        check_columns(customer)
+        runtime = artifacts.current()
+        features = runtime.feature_transform().transform_record(customer)
+        check_finite(features, runtime.feature_transform())
+        self.server.drift_monitor(runtime).update(features)
+        probability = self.server.batcher.submit(features, runtime).result()
+        return format_prediction(probability, customer)
+
+    def _predict_many(self, payload):
+        customers = payload.get('customers') if isinstance(payload, dict) else None
+        if not isinstance(customers, list) or not all(isinstance(c, dict) for c in customers):
+            raise ValueError('Expected {"customers": [...]} with one JSON object per customer')
+        if not customers:
+            return {'predictions': []}
+        for customer in customers:
+            check_columns(customer)
+        columns = {name: [customer[name] for customer in customers] for name in FEATURE_COLUMNS}
+        runtime = artifacts.current()
+        features = runtime.feature_transform().transform(columns)
+        check_finite(features, runtime.feature_transform())
+        self.server.drift_monitor(runtime).update(features)
+        probabilities = runtime.model().predict(features, batch_size=len(features), verbose=0)[:, 0]
+        if self.server.shadow is not None:
+            self.server.shadow.submit(features, probabilities, runtime.feature_transform())
+        return {'predictions': [format_prediction(float(p), c) for p, c in zip(probabilities, customers)]}
+
+
+class ScoringServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    # Drift statistics of the served version. A reload changes the scaling the
+    # statistics are kept in, so they start over with the new version.
+    def drift_monitor(self, runtime):
+        with self._drift_lock:
+            if self._drift[0] != runtime.version:
+                self._drift = (runtime.version, drift.DriftMonitor())
+            return self._drift[1]
+
+    # Training data statistics for a version, read on its first /drift request
+    def drift_reference(self, runtime):
+        with self._reference_lock:
+            if self._reference[0] != runtime.version:
+                self._reference = (runtime.version, drift.load_reference(runtime.feature_transform(),
+                                                                         self.reference_path))
+            return self._reference[1]
+
+
+def make_server(host='127.0.0.1', port=8000, max_batch_size=DEFAULT_MAX_BATCH_SIZE,
+                max_wait_ms=DEFAULT_MAX_WAIT_MS, verbose=False, reference_path=drift.DEFAULT_DATA_PATH):
+    server = ScoringServer((host, port), ScoringHandler)
+    server.verbose = verbose
+    # Serve only once the model is loaded
+    artifacts.model()
+    server.shadow = shadow.scorer()
+    server.reference_path = reference_path
+    server._drift = server._reference = (None, None)
+    server._drift_lock = threading.Lock()
+    server._reference_lock = threading.Lock()
+    server.batcher = MicroBatcher(max_batch_size, max_wait_ms, server.shadow)
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Churn scoring HTTP service')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--max-batch-size', type=int, default=DEFAULT_MAX_BATCH_SIZE)
+    parser.add_argument('--max-wait-ms', type=float, default=DEFAULT_MAX_WAIT_MS)
+    parser.add_argument('--verbose', action='store_true', help='log every request')
+    parser.add_argument('--reference', default=drift.DEFAULT_DATA_PATH,
+                        help='training data GET /drift compares the scored customers to')
+    parser.add_argument('--reload-interval', type=float, default=artifacts.RELOAD_INTERVAL,
+                        help='seconds between checks for new artifacts, 0 disables hot reload')
+    args = parser.parse_args()
+
+    artifacts.start_loading()
+    server = make_server(args.host, args.port, args.max_batch_size, args.max_wait_ms, args.verbose,
+                         args.reference)
+    artifacts.watch(args.reload_interval)
+    print(f"Serving churn predictions on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.batcher.close()
+
+
+if __name__ == '__main__':
+    main()
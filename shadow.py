@@ -0,0 +1,281 @@
+"""Shadow scoring: a challenger network scores the champion's traffic off the request path.
+
+Set CHURN_CHALLENGER to a model bundle directory (what train.py / tune.py
+write as model_bundle) or a Keras .h5 file to enable it. Every feature matrix
+the champion scores is handed to the challenger as is: a challenger fitted
+with a different scaler gets that difference folded into its first Dense
+layer, so nothing is encoded or scaled twice. Its forward passes run on one
+background thread that drains everything queued into a single pass; the
+caller only enqueues, and when the queue is full shadow work is dropped
+rather than waited for. Disagreements and score deltas are kept as running
+totals and appended per pass to CHURN_SHADOW_LOG (JSON lines).
+
+Usage: python shadow.py CHALLENGER [--data Churn_Modelling.csv] [--output shadow.json]
+compares a challenger with the served model on a file, through the same path.
+"""
+import argparse
+import json
+import os
+import queue
+import sys
+import threading
+import time
+import warnings
+
+import numpy as np
+
+from inference import NumpyModel
+
+CHALLENGER_PATH = os.environ.get('CHURN_CHALLENGER')
+LOG_PATH = os.environ.get('CHURN_SHADOW_LOG', 'shadow_log.jsonl')
+
+# Feature matrices waiting for the challenger; more than this and new ones are dropped
+MAX_PENDING = 256
+
+# Same levels as batch.risk_level_codes (not imported, batch pulls in pandas):
+# MEDIUM above 0.4, HIGH above 0.7, NaN is a level of its own
+RISK_THRESHOLDS = (0.4, 0.7)
+DECISION_THRESHOLD = 0.5
+
+
+def risk_level_codes(probabilities):
+    probabilities = np.asarray(probabilities)
+    # side='left' keeps a probability equal to a threshold in the lower level, like batch's strict >
+    codes = np.searchsorted(RISK_THRESHOLDS, probabilities, side='left')
+    codes[np.isnan(probabilities)] = len(RISK_THRESHOLDS) + 1
+    return codes
+
+
+# Running comparison of champion and challenger scores
+class ShadowStats:
+    def __init__(self):
+        self.rows = 0
+        # Rows whose risk level (LOW/MEDIUM/HIGH) differs between the two models
+        self.disagreements = 0
+        # Rows on different sides of DECISION_THRESHOLD
+        self.decision_flips = 0
+        self.sum_delta = 0.0
+        self.sum_abs_delta = 0.0
+        self.max_abs_delta = 0.0
+
+    # Fold in one pass; returns the same figures for just these rows
+    def update(self, champion, challenger):
+        delta = challenger.astype(np.float64) - champion
+        batch = {
+            'rows': len(delta),
+            'disagreements': int((risk_level_codes(champion) != risk_level_codes(challenger)).sum()),
+            'decision_flips': int(((champion > DECISION_THRESHOLD) != (challenger > DECISION_THRESHOLD)).sum()),
+            'sum_delta': float(delta.sum()),
+            'sum_abs_delta': float(np.abs(delta).sum()),
+            'max_abs_delta': float(np.abs(delta).max()) if len(delta) else 0.0,
+        }
+        self.rows += batch['rows']
+        self.disagreements += batch['disagreements']
+        self.decision_flips += batch['decision_flips']
+        self.sum_delta += batch['sum_delta']
+        self.sum_abs_delta += batch['sum_abs_delta']
+        self.max_abs_delta = max(self.max_abs_delta, batch['max_abs_delta'])
+        return summarize(batch)
+
+    def summary(self):
+        return summarize(vars(self))
+
+
+def summarize(totals):
+    rows = totals['rows'] or 1
+    return {
+        'rows': totals['rows'],
+        'disagreement_rate': totals['disagreements'] / rows,
+        'decision_flip_rate': totals['decision_flips'] / rows,
+        'mean_delta': totals['sum_delta'] / rows,
+        'mean_abs_delta': totals['sum_abs_delta'] / rows,
+        'max_abs_delta': totals['max_abs_delta'],
+    }
+
+
+# The challenger as a NumpyModel taking the champion's scaled features. A
+# bundle fitted with its own scaler maps champion z-scores to its own with a
+# per-column affine step, folded into the first layer like FeatureTransform.fold_into().
+def align(challenger, feature_transform):
+    if isinstance(challenger, NumpyModel):
+        return challenger
+    own = challenger.feature_transform
+    if ((own.feature_names, own.gender_classes, own.geo_categories)
+            != (feature_transform.feature_names, feature_transform.gender_classes, feature_transform.geo_categories)):
+        raise ValueError("challenger was trained on different feature columns or categories than the champion")
+    ratio = feature_transform.scale / own.scale
+    shift = (feature_transform.mean - own.mean) / own.scale
+    (kernel, bias, activation), *rest = challenger.model.layers
+    kernel = kernel.astype(np.float64)
+    return NumpyModel([(kernel * ratio[:, None], bias + shift @ kernel, activation), *rest])
+
+
+# A bundle directory or a Keras .h5 file (assumed to share the champion's preprocessing)
+def load_challenger(path):
+    if os.path.isdir(path):
+        import bundle
+
+        return bundle.load_bundle(path)
+    return NumpyModel.from_h5(path)
+
+
+class ShadowScorer:
+    def __init__(self, challenger, name, log_path=LOG_PATH, max_pending=MAX_PENDING):
+        self.challenger = challenger
+        self.name = name
+        self.log_path = log_path
+        self.stats = ShadowStats()
+        self.passes = 0
+        self.dropped = 0
+        self.errors = 0
+        self.last_error = None
+        self._aligned = (None, None)
+        self._queue = queue.Queue(max_pending)
+        self._thread = threading.Thread(target=self._work, name='shadow-scorer', daemon=True)
+        self._thread.start()
+
+    # Hand a scored feature matrix to the challenger. Never blocks: this is on the request path.
+    def submit(self, features, champion_probabilities, feature_transform):
+        try:
+            self._queue.put_nowait((features, np.asarray(champion_probabilities).reshape(-1), feature_transform))
+        except queue.Full:
+            self.dropped += len(features)
+
+    # Wait until everything submitted so far has been scored (tests and offline runs)
+    def flush(self):
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait()
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def summary(self):
+        return {'challenger': self.name, **self.stats.summary(), 'passes': self.passes, 'dropped': self.dropped,
+                'errors': self.errors, 'last_error': self.last_error}
+
+    def _model_for(self, feature_transform):
+        if self._aligned[0] is not feature_transform:
+            self._aligned = (feature_transform, align(self.challenger, feature_transform))
+        return self._aligned[1]
+
+    def _work(self):
+        _lower_priority()
+        while True:
+            items = [self._queue.get()]
+            # Everything queued meanwhile goes into the same forward pass
+            while True:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            markers = [item for item in items if not isinstance(item, tuple)]
+            batches = [item for item in items if isinstance(item, tuple)]
+            # A hot reload can put two champion versions in one drain
+            by_transform = {}
+            for item in batches:
+                by_transform.setdefault(id(item[2]), []).append(item)
+            for group in by_transform.values():
+                self._score(group)
+            for marker in markers:
+                if marker is None:
+                    return
+                marker.set()
+
+    def _score(self, group):
+        try:
+            features = np.concatenate([features for features, _, _ in group])
+            champion = np.concatenate([probabilities for _, probabilities, _ in group])
+            challenger = self._model_for(group[0][2]).predict(features, batch_size=len(features))[:, 0]
+            batch = self.stats.update(champion, challenger)
+            self.passes += 1
+            self._log(batch)
+        except Exception as error:
+            self.errors += 1
+            self.last_error = f"{type(error).__name__}: {error}"
+
+    def _log(self, batch):
+        if not self.log_path:
+            return
+        with open(self.log_path, 'a') as file:
+            file.write(json.dumps({'time': time.time(), 'challenger': self.name, **batch}) + '\n')
+
+
+# On Linux a thread can be reniced on its own; the scorer then only gets the CPU
+# request threads leave idle
+def _lower_priority():
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+    except (AttributeError, OSError):
+        pass
+
+
+_lock = threading.Lock()
+_scorer = None
+# Why CHURN_CHALLENGER could not be loaded, None if it was or shadow mode is off
+last_error = None
+
+
+# The process-wide scorer for CHURN_CHALLENGER, or None when shadow mode is off.
+# The challenger is loaded on first use. A challenger that fails to load turns
+# shadow mode off for the process (see last_error), the served path never sees the error.
+def scorer():
+    global _scorer, last_error
+    if not CHALLENGER_PATH:
+        return None
+    with _lock:
+        if _scorer is None and last_error is None:
+            try:
+                challenger = load_challenger(CHALLENGER_PATH)
+                name = getattr(challenger, 'content_hash', os.path.basename(CHALLENGER_PATH))[:12]
+                _scorer = ShadowScorer(challenger, f"{CHALLENGER_PATH} ({name})")
+            except Exception as error:
+                last_error = f"{type(error).__name__}: {error}"
+                warnings.warn(f"Shadow scoring is off, challenger {CHALLENGER_PATH} could not be loaded: {error}")
+        return _scorer
+
+
+def main():
+    import pandas as pd
+
+    import artifacts
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('challenger', help='model bundle directory or Keras .h5 file')
+    parser.add_argument('--data', default='Churn_Modelling.csv')
+    parser.add_argument('--chunk-size', type=int, default=1000, help='rows per champion call')
+    parser.add_argument('--output', help='write the summary as JSON to this file')
+    args = parser.parse_args()
+
+    runtime = artifacts.current()
+    champion, feature_transform = runtime.model(), runtime.feature_transform()
+    shadow = ShadowScorer(load_challenger(args.challenger), args.challenger, log_path=None)
+    submit_seconds = 0.0
+    chunks = 0
+    for chunk in pd.read_csv(args.data, chunksize=args.chunk_size):
+        features = feature_transform.transform(chunk)
+        probabilities = champion.predict(features, batch_size=len(features), verbose=0)[:, 0]
+        start = time.perf_counter()
+        shadow.submit(features, probabilities, feature_transform)
+        submit_seconds += time.perf_counter() - start
+        chunks += 1
+    shadow.flush()
+    summary = shadow.summary()
+    shadow.close()
+
+    print(f"Champion {runtime.bundle().content_hash[:12]} vs challenger {args.challenger} on {summary['rows']:,} rows")
+    print(f"  risk level disagreement {summary['disagreement_rate']:.2%}, "
+          f"decision flips at {DECISION_THRESHOLD} {summary['decision_flip_rate']:.2%}")
+    print(f"  challenger - champion: mean {summary['mean_delta']:+.4f}, mean |delta| {summary['mean_abs_delta']:.4f}, "
+          f"max |delta| {summary['max_abs_delta']:.4f}")
+    print(f"  submit() cost on the scoring path: {submit_seconds / chunks * 1e6:.1f} us per call, "
+          f"{summary['passes']} challenger passes for {chunks} calls, {summary['dropped']} rows dropped")
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(summary, file, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
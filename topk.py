@@ -0,0 +1,209 @@
+"""Top-K highest-risk customers of a scored table, with filters for retention campaigns.
+
+The table (Churn_Modelling.csv by default) is scored once and its rows are
+laid out sorted by (Geography, Gender, NumOfProducts, Balance). Every
+combination of the three categorical filters is then one contiguous block
+whose Balance column is sorted, so a query finds each matching block's
+Balance range with a binary search and only reads the rows that match. The
+K best rows of each block are picked with a partial sort (argpartition),
+the blocks' candidates are cut down to K the same way, and only those K are
+fully sorted.
+
+Usage: python topk.py [-k 500] [--geography Germany] [--gender Female] [--products 1 2]
+                      [--min-balance 100000] [--max-balance ...] [--tile 100] [--output top.csv]
+--tile repeats the scored table to time queries at millions of rows.
+"""
+import argparse
+import itertools
+import os
+import sys
+import time
+
+import numpy as np
+
+from batch import ID_COLUMNS, check_columns, risk_levels, score_columns
+
+DEFAULT_DATA_PATH = os.environ.get('CHURN_REFERENCE_DATA', 'Churn_Modelling.csv')
+DEFAULT_K = 500
+
+# Categorical filters, in the order they make up a row's block
+FILTER_COLUMNS = ('Geography', 'Gender', 'NumOfProducts')
+RANGE_COLUMN = 'Balance'
+# Shown with the results, besides ID_COLUMNS and the filter columns
+DISPLAY_COLUMNS = ('Age', 'CreditScore', 'Tenure', 'IsActiveMember')
+
+
+class TopKIndex:
+    # columns: column name -> array of the table's rows, scores: their churn probabilities.
+    # Rows the model could not score (NaN) are left out, they have no rank.
+    def __init__(self, columns, scores):
+        scores = np.asarray(scores, dtype=np.float32)
+        scored = np.isfinite(scores)
+        self.unscored = int(len(scores) - scored.sum())
+        if self.unscored:
+            scores = scores[scored]
+            columns = {name: np.asarray(values)[scored] for name, values in columns.items()}
+        codes = []
+        self.categories = {}
+        for name in FILTER_COLUMNS:
+            self.categories[name], column_codes = np.unique(np.asarray(columns[name]), return_inverse=True)
+            codes.append(column_codes)
+        self.block_shape = tuple(len(self.categories[name]) for name in FILTER_COLUMNS)
+        blocks = np.ravel_multi_index(codes, self.block_shape)
+        balance = np.asarray(columns[RANGE_COLUMN], dtype=np.float64)
+        order = np.lexsort((balance, blocks))
+
+        self.balance = balance[order]
+        self.scores = scores[order]
+        self.columns = {name: np.asarray(values)[order] for name, values in columns.items()}
+        # Rows of block b are [block_starts[b], block_starts[b + 1])
+        self.block_starts = np.searchsorted(blocks[order], np.arange(np.prod(self.block_shape) + 1))
+
+    def __len__(self):
+        return len(self.scores)
+
+    # Positions (in index order) of the k highest scores among rows matching
+    # every filter, highest first, and how many rows matched. A categorical
+    # filter is one value or a list of them, None keeps every value; the
+    # Balance bounds are inclusive.
+    def query(self, k=DEFAULT_K, geography=None, gender=None, products=None, min_balance=None,
+              max_balance=None):
+        selected = [self._codes(name, values)
+                    for name, values in zip(FILTER_COLUMNS, (geography, gender, products))]
+        candidates = []
+        matched = 0
+        # k = 0 still counts the matching rows
+        for block in itertools.product(*selected):
+            b = np.ravel_multi_index(block, self.block_shape)
+            start, end = self.block_starts[b], self.block_starts[b + 1]
+            if min_balance is not None:
+                start += np.searchsorted(self.balance[start:end], min_balance, side='left')
+            if max_balance is not None:
+                end = start + np.searchsorted(self.balance[start:end], max_balance, side='right')
+            if end <= start:
+                continue
+            matched += end - start
+            if k > 0:
+                candidates.append(start + _top(self.scores[start:end], k))
+        if not candidates:
+            return np.empty(0, dtype=np.intp), matched
+        positions = np.concatenate(candidates)
+        positions = positions[_top(self.scores[positions], k)]
+        return positions[np.argsort(-self.scores[positions], kind='stable')], matched
+
+    # The rows at positions as a DataFrame, scores included
+    def frame(self, positions):
+        import pandas as pd
+
+        shown = [name for name in (*ID_COLUMNS, *FILTER_COLUMNS, RANGE_COLUMN, *DISPLAY_COLUMNS)
+                 if name in self.columns]
+        result = pd.DataFrame({name: self.columns[name][positions] for name in shown})
+        result['ChurnProbability'] = self.scores[positions]
+        result['RiskLevel'] = risk_levels(result['ChurnProbability'].to_numpy())
+        return result
+
+    # Same index with every row repeated n times, for timing queries at scale
+    def tiled(self, n):
+        tiled = TopKIndex.__new__(TopKIndex)
+        tiled.unscored = self.unscored * n
+        tiled.categories = self.categories
+        tiled.block_shape = self.block_shape
+        # Rows are sorted within each block, so repeating each row keeps them sorted
+        tiled.balance = np.repeat(self.balance, n)
+        tiled.scores = np.repeat(self.scores, n)
+        tiled.columns = {name: np.repeat(values, n) for name, values in self.columns.items()}
+        tiled.block_starts = self.block_starts * n
+        return tiled
+
+    def _codes(self, name, values):
+        categories = self.categories[name]
+        if values is None:
+            return range(len(categories))
+        values = np.atleast_1d(np.asarray(values, dtype=categories.dtype))
+        codes = np.searchsorted(categories, values)
+        found = codes < len(categories)
+        codes = codes[found]
+        # Values the table does not contain select nothing
+        return np.unique(codes[categories[codes] == values[found]])
+
+
+# Positions of the k largest values, in no particular order
+def _top(values, k):
+    if len(values) <= k:
+        return np.arange(len(values))
+    return np.argpartition(values, len(values) - k)[len(values) - k:]
+
+
+# Score a CSV in chunks and index it, keeping only the columns results show
+def build_index(model, feature_transform, data_path=DEFAULT_DATA_PATH, chunk_size=100_000):
+    import pandas as pd
+
+    kept = (*ID_COLUMNS, *FILTER_COLUMNS, RANGE_COLUMN, *DISPLAY_COLUMNS)
+    parts, scores = [], []
+    for chunk in pd.read_csv(data_path, chunksize=chunk_size):
+        check_columns(chunk.columns)
+        scores.append(score_columns(chunk, model, feature_transform))
+        parts.append(chunk[[name for name in kept if name in chunk.columns]])
+    table = pd.concat(parts, ignore_index=True)
+    return TopKIndex({name: table[name].to_numpy() for name in table.columns}, np.concatenate(scores))
+
+
+def main():
+    import artifacts
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--data', default=DEFAULT_DATA_PATH)
+    parser.add_argument('-k', type=int, default=DEFAULT_K)
+    parser.add_argument('--geography', nargs='+')
+    parser.add_argument('--gender', nargs='+')
+    parser.add_argument('--products', nargs='+', type=int)
+    parser.add_argument('--min-balance', type=float)
+    parser.add_argument('--max-balance', type=float)
+    parser.add_argument('--tile', type=int, default=1, help='repeat the scored table this many times')
+    parser.add_argument('--output', help='write the top K customers to this CSV')
+    args = parser.parse_args()
+
+    runtime = artifacts.current()
+    start = time.perf_counter()
+    index = build_index(runtime.model(), runtime.feature_transform(), args.data)
+    print(f"Scored and indexed {len(index):,} rows in {time.perf_counter() - start:.2f} s"
+          + (f", {index.unscored:,} rows left out (missing values)" if index.unscored else ''))
+    if args.tile > 1:
+        index = index.tiled(args.tile)
+        print(f"Tiled to {len(index):,} rows")
+
+    filters = dict(geography=args.geography, gender=args.gender, products=args.products,
+                   min_balance=args.min_balance, max_balance=args.max_balance)
+    timings = []
+    for _ in range(5):
+        start = time.perf_counter()
+        positions, matched = index.query(args.k, **filters)
+        timings.append(time.perf_counter() - start)
+    query_ms = min(timings) * 1000
+
+    # The same answer from a boolean mask over every row and a full sort of the matches
+    start = time.perf_counter()
+    mask = np.ones(len(index), dtype=bool)
+    for name, values in zip(FILTER_COLUMNS, (args.geography, args.gender, args.products)):
+        if values is not None:
+            mask &= np.isin(index.columns[name], values)
+    if args.min_balance is not None:
+        mask &= index.balance >= args.min_balance
+    if args.max_balance is not None:
+        mask &= index.balance <= args.max_balance
+    matches = np.flatnonzero(mask)
+    expected = matches[np.argsort(-index.scores[matches], kind='stable')[:args.k]]
+    scan_ms = (time.perf_counter() - start) * 1000
+    assert np.array_equal(index.scores[positions], index.scores[expected])
+
+    print(f"Top {len(positions):,} of {matched:,} matching rows in {query_ms:.2f} ms "
+          f"(filter + full sort: {scan_ms:.1f} ms)")
+    top = index.frame(positions)
+    print(top.head(10).to_string(index=False))
+    if args.output:
+        top.to_csv(args.output, index=False)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,262 @@
+"""Train the churn ANN from a CSV without holding the dataset in memory.
+
+1. One streaming pass over the CSV (pandas chunks) collects the Gender and
+   Geography categories and running mean/variance of every feature, which
+   is all LabelEncoder, OneHotEncoder and StandardScaler need.
+2. A tf.data pipeline re-reads the file line by line, parses and scales
+   batches with parallel map and prefetches them while the same
+   Dense 64 -> 32 -> 1 network as experiments.ipynb trains.
+3. model.h5, the three pickles and the model bundle are written side by side.
+
+Rows are assigned to the validation split by a seeded hash of their line
+number, so both passes agree without storing the split.
+
+Usage: python train.py --data Churn_Modelling.csv --output-dir .
+"""
+import argparse
+import os
+import pickle
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from batch import FEATURE_COLUMNS
+
+NUMERIC_COLUMNS = ['CreditScore', 'Age', 'Tenure', 'Balance', 'NumOfProducts',
+                   'HasCrCard', 'IsActiveMember', 'EstimatedSalary']
+TARGET_COLUMN = 'Exited'
+
+HASH_MULTIPLIER = 2654435761
+
+
+# Deterministic split: a row is in validation when the hash of its line number
+# falls below val_fraction. Mirrored in TensorFlow ops by _tf_is_validation().
+def is_validation(line_numbers, val_fraction, seed):
+    hashed = (np.asarray(line_numbers, dtype=np.uint64) * np.uint64(HASH_MULTIPLIER)
+              + np.uint64(seed)) % np.uint64(2 ** 32)
+    return hashed < np.uint64(int(val_fraction * 2 ** 32))
+
+
+# Running count/mean/M2 per column, merged chunk by chunk (Chan et al.)
+class RunningStats:
+    def __init__(self, n_columns):
+        self.count = 0
+        self.mean = np.zeros(n_columns)
+        self.m2 = np.zeros(n_columns)
+
+    def update(self, values):
+        n = len(values)
+        if n == 0:
+            return
+        batch_mean = values.mean(axis=0)
+        batch_m2 = ((values - batch_mean) ** 2).sum(axis=0)
+        total = self.count + n
+        delta = batch_mean - self.mean
+        self.mean = self.mean + delta * n / total
+        self.m2 = self.m2 + batch_m2 + delta ** 2 * self.count * n / total
+        self.count = total
+
+    @property
+    def var(self):
+        return self.m2 / self.count
+
+
+# Single pass over the training rows: numeric statistics plus category counts
+def collect_statistics(data_path, val_fraction, seed, chunk_size=100_000):
+    stats = RunningStats(len(NUMERIC_COLUMNS))
+    gender_counts = {}
+    geo_counts = {}
+    offset = 0
+    for chunk in pd.read_csv(data_path, usecols=FEATURE_COLUMNS + [TARGET_COLUMN], chunksize=chunk_size):
+        train = chunk[~is_validation(np.arange(offset, offset + len(chunk)), val_fraction, seed)]
+        offset += len(chunk)
+        stats.update(train[NUMERIC_COLUMNS].to_numpy(dtype=np.float64))
+        for counts, column in ((gender_counts, 'Gender'), (geo_counts, 'Geography')):
+            for value, count in train[column].value_counts().items():
+                counts[value] = counts.get(value, 0) + count
+    if stats.count == 0:
+        raise ValueError(f"No training rows found in {data_path}")
+    return stats, gender_counts, geo_counts
+
+
+# Build fitted sklearn encoders/scaler equivalent to fitting them on the training rows
+def build_encoders(stats, gender_counts, geo_counts):
+    from sklearn.preprocessing import LabelEncoder, OneHotEncoder, StandardScaler
+
+    n = stats.count
+    label_encoder_gender = LabelEncoder()
+    label_encoder_gender.classes_ = np.array(sorted(gender_counts), dtype=object)
+
+    geo_categories = sorted(geo_counts)
+    onehot_encoder_geo = OneHotEncoder()
+    onehot_encoder_geo.fit(pd.DataFrame({'Geography': geo_categories}))
+
+    # LabelEncoder codes are positions in the sorted classes
+    gender_codes = np.arange(len(label_encoder_gender.classes_), dtype=np.float64)
+    gender_freq = np.array([gender_counts[c] for c in label_encoder_gender.classes_]) / n
+    gender_mean = gender_codes @ gender_freq
+    gender_var = (gender_codes ** 2) @ gender_freq - gender_mean ** 2
+
+    # One-hot columns are Bernoulli: mean p, variance p(1 - p)
+    geo_freq = np.array([geo_counts[c] for c in geo_categories]) / n
+
+    # Same column order as experiments.ipynb produced
+    feature_names = (['CreditScore', 'Gender'] + NUMERIC_COLUMNS[1:]
+                     + list(onehot_encoder_geo.get_feature_names_out(['Geography'])))
+    numeric_mean = dict(zip(NUMERIC_COLUMNS, stats.mean))
+    numeric_var = dict(zip(NUMERIC_COLUMNS, stats.var))
+    numeric_mean['Gender'], numeric_var['Gender'] = gender_mean, gender_var
+    mean = np.array([numeric_mean[name] for name in feature_names[:9]] + list(geo_freq))
+    var = np.array([numeric_var[name] for name in feature_names[:9]] + list(geo_freq * (1 - geo_freq)))
+
+    scaler = StandardScaler()
+    scaler.feature_names_in_ = np.array(feature_names, dtype=object)
+    scaler.n_features_in_ = len(feature_names)
+    scaler.n_samples_seen_ = np.int64(n)
+    scaler.mean_ = mean
+    scaler.var_ = var
+    scaler.scale_ = np.where(var > 0, np.sqrt(var), 1.0)
+    return label_encoder_gender, onehot_encoder_geo, scaler
+
+
+def _tf_is_validation(tf, line_numbers, val_fraction, seed):
+    hashed = tf.math.floormod(
+        tf.cast(line_numbers, tf.uint64) * HASH_MULTIPLIER + seed, tf.constant(2 ** 32, tf.uint64))
+    return hashed < int(val_fraction * 2 ** 32)
+
+
+# Streaming input pipeline: read lines -> split filter -> (shuffle) -> batch ->
+# parallel parse/encode/scale -> prefetch
+def make_dataset(tf, data_path, feature_transform, validation, val_fraction, seed,
+                 batch_size, shuffle_buffer):
+    with open(data_path) as file:
+        header = file.readline().strip().split(',')
+    wanted = FEATURE_COLUMNS + [TARGET_COLUMN]
+    select_cols = sorted(header.index(name) for name in wanted)
+    selected_names = [header[i] for i in select_cols]
+    string_columns = {'Gender', 'Geography'}
+    defaults = [tf.constant([], tf.string) if name in string_columns else tf.constant([], tf.float64)
+                for name in selected_names]
+
+    gender_table = tf.lookup.StaticHashTable(
+        tf.lookup.KeyValueTensorInitializer(feature_transform.gender_classes,
+                                            list(range(len(feature_transform.gender_classes))),
+                                            value_dtype=tf.int64), -1)
+    geo_table = tf.lookup.StaticHashTable(
+        tf.lookup.KeyValueTensorInitializer(feature_transform.geo_categories,
+                                            list(range(len(feature_transform.geo_categories))),
+                                            value_dtype=tf.int64), -1)
+    mean = tf.constant(feature_transform.mean, tf.float64)
+    scale = tf.constant(feature_transform.scale, tf.float64)
+    n_geo = len(feature_transform.geo_categories)
+
+    def parse(lines):
+        fields = dict(zip(selected_names, tf.io.decode_csv(lines, defaults, select_cols=select_cols)))
+        fields['Gender'] = tf.cast(gender_table.lookup(fields['Gender']), tf.float64)
+        geo = tf.one_hot(geo_table.lookup(fields['Geography']), n_geo, dtype=tf.float64)
+        columns = [fields[name] for name in feature_transform.feature_names[:-n_geo]]
+        features = tf.concat([tf.stack(columns, axis=1), geo], axis=1)
+        return tf.cast((features - mean) / scale, tf.float32), tf.cast(fields[TARGET_COLUMN], tf.float32)
+
+    dataset = tf.data.TextLineDataset(data_path).skip(1).enumerate()
+    dataset = dataset.filter(
+        lambda i, line: tf.equal(_tf_is_validation(tf, i, val_fraction, seed), validation))
+    dataset = dataset.map(lambda i, line: line)
+    if shuffle_buffer:
+        dataset = dataset.shuffle(shuffle_buffer, seed=seed, reshuffle_each_iteration=True)
+    dataset = dataset.batch(batch_size)
+    dataset = dataset.map(parse, num_parallel_calls=tf.data.AUTOTUNE)
+    return dataset.prefetch(tf.data.AUTOTUNE)
+
+
+# Same architecture and optimizer as experiments.ipynb
+def build_model(tf, n_features, hidden_units=(64, 32), learning_rate=0.01):
+    layers = [tf.keras.Input(shape=(n_features,))]
+    layers += [tf.keras.layers.Dense(units, activation='relu') for units in hidden_units]
+    layers.append(tf.keras.layers.Dense(1, activation='sigmoid'))
+    model = tf.keras.Sequential(layers)
+    model.compile(optimizer=tf.keras.optimizers.Adam(learning_rate=learning_rate),
+                  loss='binary_crossentropy', metrics=['accuracy'])
+    return model
+
+
+LEGACY_FILES = ('model.h5', 'label_encoder_gender.pkl', 'onehot_encoder_geo.pkl', 'scaler.pkl')
+
+
+# Write the four legacy artifacts into a staging directory, so a run that fails
+# while saving leaves the existing files untouched. The model bundle the app
+# and server load is exported from the staged files first; the legacy files
+# (read only by the Keras backend and bundle re-exports) are then moved into
+# place one by one, which is not atomic as a set. os.replace keeps the staged
+# files' modification times, older than the bundle's, which is how the app's
+# watcher tells them from a legacy-only deploy it should re-export.
+def save_artifacts(output_dir, model, label_encoder_gender, onehot_encoder_geo, scaler):
+    import bundle
+
+    os.makedirs(output_dir, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix='.train-', dir=output_dir)
+    try:
+        model.save(os.path.join(staging, 'model.h5'))
+        for name, obj in (('label_encoder_gender.pkl', label_encoder_gender),
+                          ('onehot_encoder_geo.pkl', onehot_encoder_geo),
+                          ('scaler.pkl', scaler)):
+            with open(os.path.join(staging, name), 'wb') as file:
+                pickle.dump(obj, file)
+        manifest = bundle.export_bundle(os.path.join(output_dir, os.path.basename(bundle.DEFAULT_PATH)),
+                                        *(os.path.join(staging, name) for name in LEGACY_FILES))
+        for name in LEGACY_FILES:
+            os.replace(os.path.join(staging, name), os.path.join(output_dir, name))
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--data', default='Churn_Modelling.csv')
+    parser.add_argument('--output-dir', default='.')
+    parser.add_argument('--epochs', type=int, default=100)
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--val-fraction', type=float, default=0.2)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--patience', type=int, default=10)
+    parser.add_argument('--shuffle-buffer', type=int, default=10_000)
+    parser.add_argument('--threads', type=int, default=os.cpu_count(),
+                        help='TensorFlow intra/inter-op threads (default: all cores)')
+    parser.add_argument('--log-dir', help='write TensorBoard logs here')
+    args = parser.parse_args()
+
+    stats, gender_counts, geo_counts = collect_statistics(args.data, args.val_fraction, args.seed)
+    encoders = build_encoders(stats, gender_counts, geo_counts)
+    print(f"Fitted encoders and scaler on {stats.count:,} training rows")
+
+    import tensorflow as tf
+    from features import FeatureTransform
+
+    tf.config.threading.set_intra_op_parallelism_threads(args.threads)
+    tf.config.threading.set_inter_op_parallelism_threads(args.threads)
+    tf.keras.utils.set_random_seed(args.seed)
+
+    feature_transform = FeatureTransform.from_encoders(*encoders)
+    datasets = {
+        validation: make_dataset(tf, args.data, feature_transform, validation, args.val_fraction, args.seed,
+                                 args.batch_size, 0 if validation else args.shuffle_buffer)
+        for validation in (False, True)
+    }
+
+    model = build_model(tf, feature_transform.n_features)
+    callbacks = [tf.keras.callbacks.EarlyStopping(monitor='val_loss', patience=args.patience,
+                                                  restore_best_weights=True)]
+    if args.log_dir:
+        callbacks.append(tf.keras.callbacks.TensorBoard(log_dir=args.log_dir, histogram_freq=1))
+    model.fit(datasets[False], validation_data=datasets[True], epochs=args.epochs, callbacks=callbacks)
+
+    manifest = save_artifacts(args.output_dir, model, *encoders)
+    print(f"Saved model.h5, encoders and bundle {manifest['content_hash'][:12]} "
+          f"to {os.path.abspath(args.output_dir)}")
+
+
+if __name__ == '__main__':
+    main()
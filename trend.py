@@ -0,0 +1,41 @@
+import numpy as np
+
+# Upper bound on points sent to the browser per trend line
+MAX_POINTS = 500
+
+
+# Largest-Triangle-Three-Buckets downsampling (Steinarsson, 2013).
+# Returns the indices of at most `threshold` points that preserve the visual
+# shape of the series, always keeping the first and last point.
+def lttb(x, y, threshold=MAX_POINTS):
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    # threshold - 2 buckets between the fixed first and last points
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.intp)
+    selected = np.empty(threshold, dtype=np.intp)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        # Twice the triangle area between the last kept point, each candidate and the next bucket's mean
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+# Downsample a series to at most max_points, returning the kept (x, y)
+def downsample(x, y, max_points=MAX_POINTS):
+    x = np.asarray(x)
+    y = np.asarray(y)
+    keep = lttb(x, y, max_points)
+    return x[keep], y[keep]
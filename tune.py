@@ -0,0 +1,319 @@
+"""Parallel hyperparameter search for the churn ANN with successive halving.
+
+1. The CSV is encoded and scaled once, with the same split, encoders and
+   scaler as train.py, into a cache of .npy files that every worker
+   memory-maps. The cache is reused while the data file and split are unchanged.
+2. Candidates (hidden layers, learning rate, batch size) are sampled from
+   SEARCH_SPACE. The hand-picked train.py network is always trial 0.
+3. Successive halving: every trial trains for --min-epochs, the best 1/--eta
+   by validation loss continue from their checkpoint to --eta times as many
+   epochs, and so on up to --max-epochs. EarlyStopping also ends a trial
+   inside a rung once its validation loss stops improving. Trials run in
+   spawned worker processes limited to --threads-per-worker threads each.
+4. A leaderboard (printed and written to leaderboard.json) ranks the trials.
+   The winner is the smallest model whose validation AUC is within
+   --tolerance of the best one, saved like train.py does (model.h5, pickles, bundle).
+
+Usage: python tune.py --data Churn_Modelling.csv --trials 24 --workers 4 --output-dir tuned
+"""
+import argparse
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import pickle
+import random
+import shutil
+import sys
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+from batch import THREAD_ENV_VARS, available_cpus, input_identity
+
+# Candidate values per hyperparameter
+SEARCH_SPACE = {
+    'hidden_units': [(8,), (16,), (32,), (64,), (8, 8), (16, 8), (16, 16), (32, 16), (64, 32), (32, 32, 16)],
+    'learning_rate': [0.001, 0.003, 0.01, 0.03],
+    'batch_size': [32, 64, 128, 256],
+}
+
+# The hand-picked configuration from experiments.ipynb / train.py
+BASELINE = {'hidden_units': (64, 32), 'learning_rate': 0.01, 'batch_size': 32}
+
+CACHE_FILES = ('x_train.npy', 'y_train.npy', 'x_val.npy', 'y_val.npy')
+
+
+# Baseline first, then distinct random configurations
+def sample_trials(n_trials, seed):
+    grid = [dict(zip(SEARCH_SPACE, values)) for values in itertools.product(*SEARCH_SPACE.values())]
+    grid.remove(BASELINE)
+    random.Random(seed).shuffle(grid)
+    return [BASELINE] + grid[:max(0, n_trials - 1)]
+
+
+# Epoch budget of each rung: min_epochs, min_epochs * eta, ... capped at max_epochs
+def rung_epochs(min_epochs, max_epochs, eta):
+    epochs = [min_epochs]
+    while epochs[-1] < max_epochs:
+        epochs.append(min(max_epochs, epochs[-1] * eta))
+    return epochs
+
+
+# Encode and scale the CSV once into train/validation matrices, plus the fitted
+# encoders. Rebuilt only when the data file or the split settings change.
+def build_cache(data_path, cache_dir, val_fraction, seed, chunk_size=100_000, log=print):
+    import pandas as pd
+    from batch import FEATURE_COLUMNS
+    from features import FeatureTransform
+    from train import TARGET_COLUMN, build_encoders, collect_statistics, is_validation
+
+    key = {'data': input_identity(data_path), 'val_fraction': val_fraction, 'seed': seed}
+    meta_path = os.path.join(cache_dir, 'cache.json')
+    if os.path.exists(meta_path):
+        with open(meta_path) as file:
+            if json.load(file) == key:
+                log(f"Reusing preprocessed matrices in {cache_dir}")
+                return
+        shutil.rmtree(cache_dir)
+
+    started = time.perf_counter()
+    encoders = build_encoders(*collect_statistics(data_path, val_fraction, seed, chunk_size))
+    feature_transform = FeatureTransform.from_encoders(*encoders)
+    parts = {False: ([], []), True: ([], [])}
+    offset = 0
+    for chunk in pd.read_csv(data_path, usecols=FEATURE_COLUMNS + [TARGET_COLUMN], chunksize=chunk_size):
+        validation = is_validation(np.arange(offset, offset + len(chunk)), val_fraction, seed)
+        offset += len(chunk)
+        for split in (False, True):
+            rows = chunk[validation == split]
+            parts[split][0].append(feature_transform.transform(rows))
+            parts[split][1].append(rows[TARGET_COLUMN].to_numpy(dtype=np.float32))
+
+    os.makedirs(cache_dir, exist_ok=True)
+    arrays = [np.concatenate(parts[split][i]) for split in (False, True) for i in (0, 1)]
+    for name, array in zip(CACHE_FILES, arrays):
+        np.save(os.path.join(cache_dir, name), array)
+    with open(os.path.join(cache_dir, 'encoders.pkl'), 'wb') as file:
+        pickle.dump(encoders, file)
+    with open(meta_path, 'w') as file:
+        json.dump(key, file, indent=2)
+    log(f"Preprocessed {len(arrays[0]):,} training and {len(arrays[2]):,} validation rows "
+        f"in {time.perf_counter() - started:.1f}s")
+
+
+def load_encoders(cache_dir):
+    with open(os.path.join(cache_dir, 'encoders.pkl'), 'rb') as file:
+        return pickle.load(file)
+
+
+# Per-process state of a worker: TensorFlow and the memory-mapped matrices
+_worker = {}
+
+
+def _init_worker(cache_dir, threads):
+    import tensorflow as tf
+
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(threads)
+    _worker['tf'] = tf
+    _worker['data'] = [np.load(os.path.join(cache_dir, name), mmap_mode='r') for name in CACHE_FILES]
+
+
+# Environment inherited by spawned workers: BLAS/OpenMP limited to `threads`
+@contextmanager
+def _worker_environment(threads):
+    saved = {name: os.environ.get(name) for name in THREAD_ENV_VARS + ('TF_CPP_MIN_LOG_LEVEL',)}
+    os.environ.update({name: str(threads) for name in THREAD_ENV_VARS})
+    os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '2')
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+# Single-row NumpyModel latency in microseconds, the app's per-customer path.
+# Measured in the main process once the workers are done, so trials don't
+# compete with training for the cores.
+def latency_us(dense_layers, repeats=2000):
+    from inference import NumpyModel
+
+    numpy_model = NumpyModel(dense_layers)
+    row = np.zeros((1, numpy_model.n_features), dtype=np.float32)
+    numpy_model.predict(row)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        numpy_model.predict(row)
+    return (time.perf_counter() - start) / repeats * 1e6
+
+
+# Train one trial from start_epoch to end_epoch, resuming from its checkpoint
+def _train_rung(task):
+    from quantize import roc_auc
+    from train import build_model
+
+    trial_id, config, start_epoch, end_epoch, checkpoint, patience, seed = task
+    tf = _worker['tf']
+    x_train, y_train, x_val, y_val = _worker['data']
+    tf.keras.utils.set_random_seed(seed + trial_id + start_epoch)
+
+    if start_epoch:
+        model = tf.keras.models.load_model(checkpoint)
+    else:
+        model = build_model(tf, x_train.shape[1], config['hidden_units'], config['learning_rate'])
+    stopper = tf.keras.callbacks.EarlyStopping(monitor='val_loss', patience=patience, restore_best_weights=True)
+    started = time.perf_counter()
+    history = model.fit(x_train, y_train, batch_size=config['batch_size'], epochs=end_epoch,
+                        initial_epoch=start_epoch, validation_data=(x_val, y_val), callbacks=[stopper],
+                        verbose=0)
+    train_seconds = time.perf_counter() - started
+    model.save(checkpoint)
+
+    # Direct call: model.predict() retraces its tf.function for every new model
+    scores = model(np.asarray(x_val), training=False).numpy()[:, 0]
+    loss = float(np.mean(-(y_val * np.log(np.clip(scores, 1e-7, 1))
+                           + (1 - y_val) * np.log(np.clip(1 - scores, 1e-7, 1)))))
+    return {
+        'trial': trial_id,
+        'epochs': start_epoch + len(history.epoch),
+        'stopped_early': stopper.stopped_epoch > 0,
+        'val_loss': loss,
+        'val_accuracy': float(np.mean((scores > 0.5) == (y_val > 0.5))),
+        'val_auc': float(roc_auc(y_val, scores)),
+        'params': int(model.count_params()),
+        'train_seconds': train_seconds,
+        'dense_layers': [(layer.kernel.numpy(), layer.bias.numpy(), layer.activation.__name__)
+                         for layer in model.layers],
+    }
+
+
+# Successive halving over the trials; returns {trial id: latest result (with 'rung')}
+def successive_halving(trials, cache_dir, checkpoint_dir, rungs, eta, workers, threads, patience, seed,
+                       log=print):
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    results = {}
+    active = list(range(len(trials)))
+    context = multiprocessing.get_context('spawn')
+    with _worker_environment(threads):
+        pool = context.Pool(workers, initializer=_init_worker, initargs=(cache_dir, threads))
+    with pool:
+        start_epoch = 0
+        for rung, end_epoch in enumerate(rungs):
+            # Trials that early-stopped have converged, their last result carries over
+            tasks = [(trial_id, trials[trial_id], start_epoch, end_epoch,
+                      os.path.join(checkpoint_dir, f'trial-{trial_id:03d}.keras'), patience, seed)
+                     for trial_id in active if not results.get(trial_id, {}).get('stopped_early')]
+            started = time.perf_counter()
+            for result in pool.imap_unordered(_train_rung, tasks):
+                result['rung'] = rung
+                results[result['trial']] = result
+                log(f"  rung {rung} trial {result['trial']:3d} {describe(trials[result['trial']]):<28} "
+                    f"epochs {result['epochs']:3d}  val_loss {result['val_loss']:.4f}  "
+                    f"auc {result['val_auc']:.4f}")
+            for trial_id in active:
+                results[trial_id]['rung'] = rung
+            log(f"Rung {rung}: {len(tasks)} trials to {end_epoch} epochs in {time.perf_counter() - started:.1f}s")
+
+            if rung + 1 < len(rungs):
+                keep = max(1, math.ceil(len(active) / eta))
+                active = sorted(active, key=lambda trial_id: results[trial_id]['val_loss'])[:keep]
+                start_epoch = end_epoch
+
+    for result in results.values():
+        result['latency_us'] = latency_us(result.pop('dense_layers'))
+    return results
+
+
+def describe(config):
+    layers = '-'.join(map(str, config['hidden_units']))
+    return f"{layers} lr={config['learning_rate']:g} bs={config['batch_size']}"
+
+
+# Trials reaching later rungs first, then by validation AUC
+def leaderboard(trials, results):
+    rows = [{**results[trial_id], **trials[trial_id], 'hidden_units': list(trials[trial_id]['hidden_units'])}
+            for trial_id in results]
+    return sorted(rows, key=lambda row: (-row['rung'], -row['val_auc']))
+
+
+# Smallest final-rung model within `tolerance` AUC of the best final-rung model
+def pick_winner(board, tolerance):
+    finalists = [row for row in board if row['rung'] == board[0]['rung']]
+    best_auc = max(row['val_auc'] for row in finalists)
+    eligible = [row for row in finalists if row['val_auc'] >= best_auc - tolerance]
+    return min(eligible, key=lambda row: (row['params'], -row['val_auc']))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--data', default='Churn_Modelling.csv')
+    parser.add_argument('--output-dir', default='tuned')
+    parser.add_argument('--cache-dir', help='preprocessed matrices (default: <output-dir>/cache)')
+    parser.add_argument('--trials', type=int, default=24)
+    parser.add_argument('--min-epochs', type=int, default=5)
+    parser.add_argument('--max-epochs', type=int, default=45)
+    parser.add_argument('--eta', type=int, default=3, help='keep the best 1/eta trials per rung')
+    parser.add_argument('--patience', type=int, default=10)
+    parser.add_argument('--workers', type=int, help='worker processes (default: cores / threads per worker)')
+    parser.add_argument('--threads-per-worker', type=int, default=1)
+    parser.add_argument('--tolerance', type=float, default=0.005,
+                        help='AUC a smaller model may give up against the best trial')
+    parser.add_argument('--val-fraction', type=float, default=0.2)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    if args.eta < 2 or args.min_epochs < 1 or args.max_epochs < args.min_epochs:
+        parser.error('need --eta >= 2 and 1 <= --min-epochs <= --max-epochs')
+
+    cache_dir = args.cache_dir or os.path.join(args.output_dir, 'cache')
+    build_cache(args.data, cache_dir, args.val_fraction, args.seed)
+
+    trials = sample_trials(args.trials, args.seed)
+    rungs = rung_epochs(args.min_epochs, args.max_epochs, args.eta)
+    workers = args.workers or max(1, available_cpus() // args.threads_per_worker)
+    workers = min(workers, len(trials))
+    print(f"{len(trials)} trials, rungs at {rungs} epochs, {workers} workers x {args.threads_per_worker} threads")
+
+    started = time.perf_counter()
+    checkpoint_dir = os.path.join(args.output_dir, 'checkpoints')
+    results = successive_halving(trials, cache_dir, checkpoint_dir, rungs, args.eta, workers,
+                                 args.threads_per_worker, args.patience, args.seed)
+    elapsed = time.perf_counter() - started
+
+    board = leaderboard(trials, results)
+    winner = pick_winner(board, args.tolerance)
+    print(f"\nSearch finished in {elapsed:.0f}s\n")
+    print(f"{'rank':>4} {'trial':>5} {'config':<28} {'rung':>4} {'epochs':>6} {'val_loss':>8} {'acc':>6} "
+          f"{'auc':>6} {'params':>7} {'latency':>9}")
+    for rank, row in enumerate(board, 1):
+        marker = ' *' if row is winner else ''
+        print(f"{rank:>4} {row['trial']:>5} {describe(row):<28} {row['rung']:>4} {row['epochs']:>6} "
+              f"{row['val_loss']:>8.4f} {row['val_accuracy']:>6.4f} {row['val_auc']:>6.4f} {row['params']:>7,} "
+              f"{row['latency_us']:>7.1f}us{marker}")
+
+    baseline = results[0]
+    print(f"\nBaseline {describe(BASELINE)}: auc {baseline['val_auc']:.4f}, {baseline['params']:,} params")
+    print(f"Winner   {describe(winner)}: auc {winner['val_auc']:.4f}, {winner['params']:,} params "
+          f"(* within {args.tolerance} AUC of the best finalist)")
+
+    with open(os.path.join(args.output_dir, 'leaderboard.json'), 'w') as file:
+        json.dump({'rungs': rungs, 'elapsed_seconds': elapsed, 'winner': winner['trial'], 'trials': board},
+                  file, indent=2)
+
+    from train import save_artifacts
+    import tensorflow as tf
+
+    model = tf.keras.models.load_model(os.path.join(checkpoint_dir, f"trial-{winner['trial']:03d}.keras"))
+    manifest = save_artifacts(args.output_dir, model, *load_encoders(cache_dir))
+    print(f"Saved the winner's model.h5, encoders and bundle {manifest['content_hash'][:12]} "
+          f"to {os.path.abspath(args.output_dir)}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,49 @@
+import numpy as np
+
+# Values each what-if curve sweeps over, matching the ranges of the app's inputs.
+# Open-ended amounts (Balance, Salary) are extended to cover the current value.
+GRIDS = {
+    'Age': np.arange(18, 93),
+    'CreditScore': np.arange(300, 851, 5),
+    'Balance': np.linspace(0, 250_000, 100),
+    'EstimatedSalary': np.linspace(0, 200_000, 100),
+    'Tenure': np.arange(0, 11),
+    'NumOfProducts': np.arange(1, 5),
+}
+
+LABELS = {
+    'Age': 'Age (years)', 'CreditScore': 'Credit Score', 'Balance': 'Balance ($)',
+    'EstimatedSalary': 'Estimated Salary ($)', 'Tenure': 'Tenure (years)', 'NumOfProducts': 'Products',
+}
+
+
+def _grid(field, value):
+    grid = GRIDS[field]
+    if grid.dtype.kind == 'f' and value > grid[-1]:
+        return np.linspace(0, value * 1.25, len(grid))
+    return grid
+
+
+# Churn probability along every grid with all other fields held at the customer's
+# values. All grids are stacked into one feature matrix and scored with a
+# single predict() call. Returns {field: (grid values, probabilities)}.
+def sensitivity_curves(model, feature_transform, record, fields=None):
+    fields = list(fields or GRIDS)
+    grids = [_grid(field, record[field]) for field in fields]
+    n_rows = sum(len(grid) for grid in grids)
+
+    columns = {name: np.full(n_rows, value) for name, value in record.items()}
+    start = 0
+    for field, grid in zip(fields, grids):
+        columns[field][start:start + len(grid)] = grid
+        start += len(grid)
+
+    features = feature_transform.transform(columns)
+    probabilities = np.asarray(model.predict(features, batch_size=len(features), verbose=0))[:, 0]
+
+    curves = {}
+    start = 0
+    for field, grid in zip(fields, grids):
+        curves[field] = (grid, probabilities[start:start + len(grid)])
+        start += len(grid)
+    return curves